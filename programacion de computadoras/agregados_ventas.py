@@ -0,0 +1,122 @@
+from datetime import datetime
+
+# --- Agregados de Ventas ---
+# Los gráficos de estadísticas agrupaban todo el historial (por día, por mes, por
+# producto...) cada vez que se dibujaban. Ahora cada venta suma, al registrarse,
+# sus números a unas tablas ya agrupadas:
+#
+#   agregados[dimension][clave] = {"ventas": compras, "cantidad": unidades, "total": dinero}
+#
+# con dimension en DIMENSIONES ("dia" -> "2024-05-01", "mes" -> "2024-05", "producto" ->
+# su nombre...). Dibujar un gráfico sólo lee tantas filas como días, meses o productos haya,
+# no importa cuántas ventas tenga el historial. Si faltan, se reconstruyen desde el historial.
+#
+# El archivo guarda además cuántas compras se sumaron y el id_transaccion de la última,
+# para reconocer unos agregados que quedaron atrás del historial (o adelante).
+
+DIMENSIONES = ("dia", "mes", "producto", "metodo_pago", "usuario")
+VERSION_AGREGADOS = 2
+
+
+def vacios():
+    return {dimension: {} for dimension in DIMENSIONES}
+
+
+def copiar(agregados):
+    """Copia independiente (p. ej. para que el escritor la guarde mientras siguen llegando ventas)."""
+    return {dimension: {clave: dict(valores) for clave, valores in grupo.items()}
+            for dimension, grupo in agregados.items()}
+
+
+def _numero(valor):
+    if isinstance(valor, bool):
+        return None
+    if isinstance(valor, (int, float)):
+        return valor if valor == valor else None  # NaN no cuenta
+    try:
+        return float(valor)
+    except (TypeError, ValueError):
+        return None
+
+
+def contribuciones(registro):
+    """(dimension, clave, ventas, cantidad, total) que suma una compra; nada si su fecha o su total no son válidos.
+
+    Son las mismas compras que las estadísticas descartaban al convertir fechas y montos.
+    """
+    total = _numero(registro.get("total_pagado"))
+    try:
+        fecha = datetime.fromisoformat(str(registro.get("fecha")))
+    except ValueError:
+        return []
+    if total is None:
+        return []
+
+    por_producto = {}  # nombre -> [cantidad, subtotal]; una compra cuenta una sola vez por producto
+    productos = registro.get("productos")
+    for item in productos if isinstance(productos, list) else ():
+        cantidad = _numero(item.get("cantidad"))
+        if cantidad is None:
+            continue
+        precio = _numero(item.get("precio_unitario"))
+        linea = por_producto.setdefault(str(item.get("nombre")), [0, 0])
+        linea[0] += cantidad
+        linea[1] += cantidad * precio if precio is not None else 0
+    unidades = sum(cantidad for cantidad, _ in por_producto.values())
+
+    filas = [("dia", fecha.strftime("%Y-%m-%d"), 1, unidades, total),
+             ("mes", fecha.strftime("%Y-%m"), 1, unidades, total)]
+    for dimension in ("metodo_pago", "usuario"):
+        if registro.get(dimension) is not None:
+            filas.append((dimension, str(registro[dimension]), 1, unidades, total))
+    filas.extend(("producto", nombre, 1, cantidad, subtotal) for nombre, (cantidad, subtotal) in por_producto.items())
+    return filas
+
+
+def sumar_venta(agregados, registro):
+    """Suma una compra a los agregados. Devuelve False si la compra no se pudo contar."""
+    filas = contribuciones(registro)
+    for dimension, clave, ventas, cantidad, total in filas:
+        valores = agregados[dimension].setdefault(clave, {"ventas": 0, "cantidad": 0, "total": 0})
+        valores["ventas"] += ventas
+        valores["cantidad"] += cantidad
+        valores["total"] += total
+    return bool(filas)
+
+
+def calcular(historial):
+    """Agregados de todo un historial (para crearlos la primera vez o reconstruirlos)."""
+    agregados = vacios()
+    for registro in historial:
+        sumar_venta(agregados, registro)
+    return agregados
+
+
+def total_ventas(agregados):
+    """Compras contadas: cada una aparece exactamente una vez por día."""
+    return sum(valores["ventas"] for valores in agregados["dia"].values())
+
+
+def a_archivo(agregados, compras, ultima_transaccion):
+    """Contenido del archivo: los agregados, cuántas compras del historial suman y la última de ellas."""
+    return {"version": VERSION_AGREGADOS, "compras": compras, "ultima_transaccion": ultima_transaccion,
+            "agregados": agregados}
+
+
+def invalidos():
+    """Contenido que marca el archivo como inservible: al leerlo, los agregados se rehacen desde el historial."""
+    return {"version": VERSION_AGREGADOS, "invalido": True}
+
+
+def desde_archivo(datos):
+    """(agregados, compras, ultima_transaccion) guardados con a_archivo(), o None si el archivo no sirve
+    (falta, es de otra versión, se marcó con invalidos()...)."""
+    if not isinstance(datos, dict) or datos.get("version") != VERSION_AGREGADOS or datos.get("invalido"):
+        return None
+    agregados = datos.get("agregados")
+    if not isinstance(agregados, dict) or any(dimension not in agregados for dimension in DIMENSIONES):
+        return None
+    compras = datos.get("compras")
+    if not isinstance(compras, int) or isinstance(compras, bool):
+        return None
+    return agregados, compras, datos.get("ultima_transaccion")
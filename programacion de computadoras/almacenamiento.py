@@ -0,0 +1,795 @@
+import argparse
+import functools
+import json
+import os
+import sqlite3
+import threading
+
+import agregados_ventas
+import archivos
+import diario
+from escritura_diferida import DURABILIDADES, EscritorDiferido
+
+# --- Almacenamiento de Datos ---
+# Las tres versiones de la tienda guardan usuarios, productos y compras a través
+# de un "almacén". AlmacenJSON usa los archivos de siempre; AlmacenSQLite usa una
+# base de datos con tablas indexadas, así que buscar un usuario, cambiar un stock
+# o registrar una venta es una sola consulta en vez de reescribir un archivo entero.
+
+
+def _reportar_en_consola(titulo, mensaje):
+    print(f"{titulo}: {mensaje}")
+
+
+# --- Funciones JSON ---
+def cargar_json(filepath, reportar_error=_reportar_en_consola):
+    try:
+        datos, recuperado = archivos.leer_json(filepath)
+    except json.JSONDecodeError:
+        reportar_error("¡Ups, un archivo dañado!", f"Parece que el archivo '{filepath}' está un poco revuelto y no tiene una copia de respaldo. ¡No te preocupes, lo reiniciaremos para ti!")
+        return []
+    except Exception as e:
+        reportar_error("Error al cargar", f"No pudimos leer '{filepath}'. Algo inesperado pasó: {e}")
+        return []
+    if recuperado:
+        reportar_error("¡Ups, un archivo dañado!", f"El archivo '{filepath}' estaba dañado, así que recuperamos su última copia guardada ('{archivos.ruta_respaldo(filepath)}').")
+    return datos
+
+
+def guardar_json(datos, filepath, reportar_error=_reportar_en_consola, formato="legible"):
+    """Guarda de forma atómica: si algo falla a mitad de camino, el archivo anterior queda intacto."""
+    try:
+        archivos.escribir_json(datos, filepath, formato)
+    except IOError as e:
+        reportar_error("Problemas al guardar", f"No pudimos guardar tus cambios en '{filepath}'. Revisa si hay algún problema de permisos: {e}")
+
+
+def _reporta_errores(mensaje, por_defecto=None):
+    """Atrapa los errores de la base de datos, los reporta y devuelve un valor por defecto."""
+    def decorador(metodo):
+        @functools.wraps(metodo)
+        def envoltura(self, *args, **kwargs):
+            try:
+                return metodo(self, *args, **kwargs)
+            except (sqlite3.Error, OSError, ValueError) as e:
+                self.reportar_error("Problemas con los datos", f"{mensaje}: {e}")
+                return por_defecto() if callable(por_defecto) else por_defecto
+        return envoltura
+    return decorador
+
+
+# --- Índice de Usuarios ---
+_firma_archivo = archivos.firma_archivo
+
+
+class IndiceUsuarios:
+    """Usuarios de un archivo JSON en memoria, indexados por nombre exacto y sin mayúsculas.
+
+    Se carga una sola vez y se mantiene al día con cada escritura; si el archivo
+    cambia en disco (otro programa lo editó) se vuelve a cargar. Las escrituras las
+    hace `escritor` en segundo plano: mientras tenga algo pendiente, manda la memoria.
+    """
+
+    def __init__(self, filepath, clave_usuario, reportar_error, escritor):
+        self.filepath = filepath
+        self.clave_usuario = clave_usuario
+        self.reportar_error = reportar_error
+        self.escritor = escritor
+        self._firma = None
+        self._cargado = False
+        self.usuarios = []
+        self._posiciones = {}
+        self._plegados = {}
+
+    def _reconstruir(self):
+        self._posiciones = {}
+        self._plegados = {}
+        for i, u in enumerate(self.usuarios):
+            nombre = u[self.clave_usuario]
+            self._posiciones.setdefault(nombre, i)
+            self._plegados.setdefault(nombre.casefold(), []).append(nombre)
+
+    def _vigente(self):
+        if self._cargado and not self.escritor.cambio_desde_afuera(self.filepath, self._firma):
+            return
+        self._firma = _firma_archivo(self.filepath)
+        self.usuarios = cargar_json(self.filepath, self.reportar_error)
+        self._reconstruir()
+        self._cargado = True
+
+    def _guardar(self):
+        # Los usuarios se reemplazan, nunca se modifican en su lugar: basta con copiar la lista.
+        self.escritor.reemplazar(self.filepath, list(self.usuarios))
+
+    def listar(self):
+        self._vigente()
+        return [dict(u) for u in self.usuarios]
+
+    def obtener(self, nombre):
+        self._vigente()
+        i = self._posiciones.get(nombre)
+        return dict(self.usuarios[i]) if i is not None else None
+
+    def nombre_ocupado(self, nombre, excepto=None):
+        self._vigente()
+        excepto = excepto.casefold() if excepto else None
+        return any(n.casefold() != excepto for n in self._plegados.get(nombre.casefold(), ()))
+
+    def agregar(self, usuario):
+        """Agrega el usuario; devuelve False (y avisa) si su nombre ya está en uso, sin distinguir mayúsculas."""
+        self._vigente()
+        usuario = dict(usuario)
+        nombre = usuario[self.clave_usuario]
+        if self.nombre_ocupado(nombre):
+            self.reportar_error("Problemas con los datos", f"No pudimos guardar el usuario nuevo: el nombre '{nombre}' ya está en uso.")
+            return False
+        self._posiciones.setdefault(nombre, len(self.usuarios))
+        self._plegados.setdefault(nombre.casefold(), []).append(nombre)
+        self.usuarios.append(usuario)
+        self._guardar()
+        return True
+
+    def actualizar(self, nombre, usuario):
+        self._vigente()
+        i = self._posiciones.get(nombre)
+        if i is None:
+            return
+        self.usuarios[i] = dict(usuario)
+        if usuario[self.clave_usuario] != nombre:
+            self._reconstruir()
+        self._guardar()
+
+    def eliminar(self, nombre):
+        self._vigente()
+        if nombre not in self._posiciones:
+            return
+        self.usuarios = [u for u in self.usuarios if u[self.clave_usuario] != nombre]
+        self._reconstruir()
+        self._guardar()
+
+
+# --- Almacén en archivos JSON ---
+class AlmacenJSON:
+    """Guarda cada colección en su archivo JSON; compras y productos pueden ir a un diario .jsonl.
+
+    Con modo_historial="diario" cada venta y cada cambio de un producto (stock, edición,
+    alta o baja) es una línea nueva en el diario, en vez de reescribir el archivo entero.
+    Todas las escrituras pasan por un EscritorDiferido; `durabilidad` (ver DURABILIDADES)
+    dice si cada venta espera a que todo esté en disco, y `formato` (ver archivos.FORMATOS)
+    cómo se escriben los archivos. Al leer, el formato se reconoce solo.
+
+    Los agregados de ventas (ver agregados_ventas) van en "<historial>_agregados.json" y se
+    actualizan con cada venta; si el archivo falta, está dañado o no coincide con el historial
+    (p. ej. un corte de luz entre la escritura de la venta y la de los agregados), se rehacen.
+    """
+
+    def __init__(self, archivo_usuarios, archivo_compras, archivo_productos=None,
+                 clave_usuario="user", modo_historial="diario", durabilidad="por_venta",
+                 formato="legible", reportar_error=_reportar_en_consola):
+        if durabilidad not in DURABILIDADES:
+            raise ValueError(f"Durabilidad desconocida: {durabilidad}")
+        if formato not in archivos.FORMATOS:
+            raise ValueError(f"Formato desconocido: {formato}")
+        self.archivo_usuarios = archivo_usuarios
+        self.archivo_compras = archivo_compras
+        self.archivo_productos = archivo_productos
+        self.clave_usuario = clave_usuario
+        self.modo_historial = modo_historial
+        self.durabilidad = durabilidad
+        self.formato = formato
+        self.reportar_error = reportar_error
+        self.escritor = EscritorDiferido(reportar_error=reportar_error, formato=formato)
+        self.usuarios = IndiceUsuarios(archivo_usuarios, clave_usuario, reportar_error, self.escritor)
+        self._productos = None  # id -> producto, se carga la primera vez que hace falta
+        self._firma_productos = None
+        self.archivo_agregados = os.path.splitext(archivo_compras)[0] + "_agregados.json"
+        self._agregados = None  # se carga la primera vez que hace falta
+        self._compras_contadas = 0  # compras del historial que ya suman los agregados
+        self._ultima_transaccion = None
+        self._cerrojo_agregados = threading.Lock()  # las estadísticas los leen desde otro hilo
+
+    # Usuarios
+    def listar_usuarios(self):
+        return self.usuarios.listar()
+
+    def obtener_usuario(self, nombre):
+        return self.usuarios.obtener(nombre)
+
+    def nombre_ocupado(self, nombre, excepto=None):
+        """Dice si otro usuario ya usa ese nombre, sin distinguir mayúsculas."""
+        return self.usuarios.nombre_ocupado(nombre, excepto)
+
+    def agregar_usuario(self, usuario):
+        """Devuelve True si el usuario quedó guardado."""
+        return self.usuarios.agregar(usuario)
+
+    def actualizar_usuario(self, nombre, usuario):
+        """Reemplaza al usuario llamado `nombre` (puede haber cambiado de nombre en `usuario`)."""
+        self.usuarios.actualizar(nombre, usuario)
+
+    def eliminar_usuario(self, nombre):
+        self.usuarios.eliminar(nombre)
+
+    def _al_dia(self, *rutas):
+        """Escribe lo pendiente de esas rutas antes de leerlas del disco."""
+        for ruta in rutas:
+            self.escritor.vaciar(ruta)
+
+    def _rutas_productos(self):
+        return (self.archivo_productos, diario.ruta_diario(self.archivo_productos))
+
+    # Productos
+    def leer_productos(self):
+        """Lee los productos sin atrapar errores; no usa la interfaz, así que sirve desde otro hilo."""
+        self._al_dia(*self._rutas_productos())
+        return diario.cargar_registros(self.archivo_productos)
+
+    def listar_productos(self):
+        try:
+            return self.leer_productos()
+        except json.JSONDecodeError:
+            self.reportar_error("¡Ups, un archivo dañado!", f"Parece que el archivo '{self.archivo_productos}' está un poco revuelto o vacío. ¡No te preocupes, lo reiniciaremos para ti!")
+            return []
+        except Exception as e:
+            self.reportar_error("Error al cargar", f"No pudimos leer '{self.archivo_productos}'. Algo inesperado pasó: {e}")
+            return []
+
+    def _productos_por_id(self):
+        """Productos vigentes por id; se vuelven a leer sólo si los archivos cambiaron desde afuera."""
+        rutas = self._rutas_productos()
+        if self._productos is None or any(self.escritor.cambio_desde_afuera(ruta, firma)
+                                          for ruta, firma in zip(rutas, self._firma_productos)):
+            self._productos = {p["id"]: p for p in self.listar_productos()}
+            self._firma_productos = tuple(_firma_archivo(ruta) for ruta in rutas)
+        return self._productos
+
+    def _anotar_producto(self, registro):
+        """Anota un cambio de producto para el diario y lo refleja en memoria."""
+        productos = self._productos_por_id()
+        self.escritor.anexar(diario.ruta_diario(self.archivo_productos), registro)
+        if registro.get("_eliminado"):
+            productos.pop(registro["id"], None)
+        else:
+            productos[registro["id"]] = registro
+
+    def guardar_productos(self, productos):
+        productos = [dict(p) for p in productos]
+        if self.modo_historial != "diario":
+            self.escritor.reemplazar(self.archivo_productos, productos)
+            return
+        self._al_dia(*self._rutas_productos())
+        try:
+            diario.reemplazar_registros(self.archivo_productos, productos, self.formato)
+        except IOError as e:
+            self.reportar_error("Problemas al guardar", f"No pudimos guardar tus cambios en '{self.archivo_productos}'. Revisa si hay algún problema de permisos: {e}")
+        self._productos = None
+
+    def guardar_producto(self, producto):
+        if self.modo_historial == "diario":
+            self._anotar_producto(dict(producto))
+            return
+        productos = self.listar_productos()
+        for i, p in enumerate(productos):
+            if p["id"] == producto["id"]:
+                productos[i] = producto
+                break
+        else:
+            productos.append(producto)
+        self.guardar_productos(productos)
+
+    def eliminar_producto(self, id_producto):
+        if self.modo_historial == "diario":
+            self._anotar_producto({"id": id_producto, "_eliminado": True})
+            return
+        self.guardar_productos([p for p in self.listar_productos() if p["id"] != id_producto])
+
+    def ajustar_stock(self, id_producto, cambio):
+        if self.modo_historial == "diario":
+            producto = self._productos_por_id().get(id_producto)
+            if producto is not None:
+                self._anotar_producto(dict(producto, stock=producto["stock"] + cambio))
+            return
+        productos = self.listar_productos()
+        for p in productos:
+            if p["id"] == id_producto:
+                p["stock"] += cambio
+                break
+        self.guardar_productos(productos)
+
+    # Compras
+    def leer_compras(self):
+        """Lee el historial sin atrapar errores; no usa la interfaz, así que sirve desde otro hilo."""
+        self._al_dia(self.archivo_compras, diario.ruta_diario(self.archivo_compras))
+        if self.modo_historial != "diario":
+            return archivos.leer_json(self.archivo_compras)[0]
+        return diario.cargar_historial(self.archivo_compras)
+
+    def listar_compras(self):
+        if self.modo_historial != "diario":
+            self._al_dia(self.archivo_compras)
+            return cargar_json(self.archivo_compras, self.reportar_error)
+        try:
+            return self.leer_compras()
+        except json.JSONDecodeError:
+            self.reportar_error("¡Ups, un archivo dañado!", f"Parece que el archivo '{self.archivo_compras}' está un poco revuelto o vacío. ¡No te preocupes, lo reiniciaremos para ti!")
+            return []
+        except Exception as e:
+            self.reportar_error("Error al cargar", f"No pudimos leer el historial de compras. Algo inesperado pasó: {e}")
+            return []
+
+    def registrar_compra(self, registro):
+        with self._cerrojo_agregados:
+            # Los agregados se cargan antes de anotar la venta: si hubiera que rehacerlos
+            # desde el historial, la venta no puede estar ya en él o se contaría dos veces.
+            try:
+                agregados = self._cargar_agregados()
+            except Exception as e:
+                # La venta no se suma: el archivo queda marcado para rehacerlo desde el historial,
+                # que ya la incluirá, en vez de volver a leer unos agregados a los que les falta.
+                agregados = None
+                self._agregados = None
+                self.escritor.reemplazar(self.archivo_agregados, agregados_ventas.invalidos())
+                self.reportar_error("Error al cargar", f"No pudimos leer las estadísticas de ventas; se rehacen desde el historial la próxima vez: {e}")
+            if self.modo_historial != "diario":
+                historial = self.listar_compras()
+                historial.append(registro)
+                self.escritor.reemplazar(self.archivo_compras, historial)
+            else:
+                self.escritor.anexar(diario.ruta_diario(self.archivo_compras), dict(registro))
+            if agregados is not None:
+                agregados_ventas.sumar_venta(agregados, registro)
+                self._compras_contadas += 1
+                self._ultima_transaccion = registro.get("id_transaccion")
+                self._guardar_agregados()
+        if self.durabilidad == "por_venta":
+            self.escritor.vaciar()  # la venta (y el stock que descontó) ya está en disco al volver
+
+    def siguiente_numero_compra(self):
+        """Número de la próxima compra (1, 2, ...) para armar su id; lo llevan los agregados, sin leer el historial."""
+        with self._cerrojo_agregados:
+            self._cargar_agregados()
+            return self._compras_contadas + 1
+
+    # Agregados de ventas
+    def _guardar_agregados(self):
+        self.escritor.reemplazar(self.archivo_agregados, agregados_ventas.a_archivo(
+            agregados_ventas.copiar(self._agregados), self._compras_contadas, self._ultima_transaccion))
+
+    def _ultima_del_diario(self):
+        """Última compra del historial si se puede saber sin leerlo entero (del diario), o None."""
+        if self.modo_historial != "diario":
+            return None
+        ruta = diario.ruta_diario(self.archivo_compras)
+        self._al_dia(ruta)
+        if os.path.exists(ruta + ".compactando"):
+            return None  # compactación a medias: el final del historial puede estar en otro lado
+        return diario.ultima_entrada(ruta)
+
+    def _cargar_agregados(self):
+        """Agregados en memoria; la primera vez se leen del archivo o se rehacen desde el historial.
+
+        Los del archivo sólo se usan si su última compra es la última del historial; si el diario
+        está vacío (recién compactado) se lee el historial y también se compara cuántas compras hay.
+        """
+        if self._agregados is None:
+            try:
+                guardados = agregados_ventas.desde_archivo(archivos.leer_json(self.archivo_agregados)[0])
+            except json.JSONDecodeError:
+                guardados = None  # dañado y sin respaldo: se rehace
+            historial = None
+            if guardados is not None:
+                ultima = self._ultima_del_diario()
+                if ultima is not None:
+                    al_dia = isinstance(ultima, dict) and ultima.get("id_transaccion") == guardados[2]
+                else:
+                    historial = self.leer_compras()
+                    al_dia = (guardados[1] == len(historial)
+                              and guardados[2] == (historial[-1].get("id_transaccion") if historial else None))
+                if not al_dia:
+                    guardados = None
+            rehechos = guardados is None
+            if rehechos:
+                if historial is None:
+                    historial = self.leer_compras()
+                guardados = (agregados_ventas.calcular(historial), len(historial),
+                             historial[-1].get("id_transaccion") if historial else None)
+            self._agregados, self._compras_contadas, self._ultima_transaccion = guardados
+            if rehechos:
+                self._guardar_agregados()
+        return self._agregados
+
+    def leer_agregados(self):
+        """Copia de los agregados sin atrapar errores; no usa la interfaz, así que sirve desde otro hilo."""
+        with self._cerrojo_agregados:
+            return agregados_ventas.copiar(self._cargar_agregados())
+
+    def listar_agregados(self):
+        try:
+            return self.leer_agregados()
+        except Exception as e:
+            self.reportar_error("Error al cargar", f"No pudimos leer las estadísticas de ventas. Algo inesperado pasó: {e}")
+            return agregados_ventas.vacios()
+
+    def compactar(self):
+        self.escritor.vaciar()
+        if self.modo_historial == "diario":
+            try:
+                diario.compactar_si_necesario(self.archivo_compras, formato=self.formato)
+                if self.archivo_productos:
+                    diario.compactar_si_necesario(self.archivo_productos, compactar=diario.compactar_registros,
+                                                  formato=self.formato)
+            except (OSError, ValueError) as e:
+                self.reportar_error("Problemas al guardar", f"No pudimos compactar el historial de compras: {e}")
+
+    def cerrar(self):
+        self.escritor.cerrar()
+
+
+# --- Almacén en SQLite ---
+ESQUEMA_SQLITE = """
+-- nombre_clave es nombre.casefold(): "Ñandú" y "ñandú" chocan igual que en IndiceUsuarios
+-- (COLLATE NOCASE sólo pliega letras ASCII). Su índice único se crea en _preparar_nombres_clave().
+CREATE TABLE IF NOT EXISTS usuarios (
+    nombre TEXT PRIMARY KEY,
+    nombre_clave TEXT,
+    datos TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS productos (
+    id TEXT PRIMARY KEY,
+    nombre TEXT NOT NULL,
+    precio NUMERIC NOT NULL,
+    stock INTEGER NOT NULL,
+    datos TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_productos_nombre_nocase ON productos(nombre COLLATE NOCASE);
+
+CREATE TABLE IF NOT EXISTS ventas (
+    id_transaccion TEXT PRIMARY KEY,
+    usuario TEXT NOT NULL,
+    fecha TEXT NOT NULL,
+    metodo_pago TEXT,
+    total_pagado NUMERIC NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_ventas_fecha ON ventas(fecha);
+CREATE INDEX IF NOT EXISTS idx_ventas_usuario ON ventas(usuario);
+
+CREATE TABLE IF NOT EXISTS lineas_venta (
+    id_transaccion TEXT NOT NULL REFERENCES ventas(id_transaccion) ON DELETE CASCADE,
+    nombre TEXT NOT NULL,
+    precio_unitario NUMERIC NOT NULL,
+    cantidad INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_lineas_venta_transaccion ON lineas_venta(id_transaccion);
+CREATE INDEX IF NOT EXISTS idx_lineas_venta_nombre ON lineas_venta(nombre);
+
+-- Ventas ya agrupadas por día, mes, producto... (ver agregados_ventas); se suman al registrar cada venta.
+CREATE TABLE IF NOT EXISTS agregados (
+    dimension TEXT NOT NULL,
+    clave TEXT NOT NULL,
+    ventas INTEGER NOT NULL,
+    cantidad NUMERIC NOT NULL,
+    total NUMERIC NOT NULL,
+    PRIMARY KEY (dimension, clave)
+);
+"""
+
+_SUMAR_AGREGADO = (
+    "INSERT INTO agregados (dimension, clave, ventas, cantidad, total) VALUES (?, ?, ?, ?, ?) "
+    "ON CONFLICT(dimension, clave) DO UPDATE SET ventas = ventas + excluded.ventas, "
+    "cantidad = cantidad + excluded.cantidad, total = total + excluded.total")
+
+# Campos de un producto que tienen su propia columna; el resto va en "datos".
+_COLUMNAS_PRODUCTO = ("id", "nombre", "precio", "stock")
+
+
+class AlmacenSQLite:
+    """Guarda usuarios, productos, ventas y líneas de venta en tablas indexadas de SQLite."""
+
+    def __init__(self, ruta_bd, clave_usuario="user", durabilidad="por_venta", reportar_error=_reportar_en_consola):
+        if durabilidad not in DURABILIDADES:
+            raise ValueError(f"Durabilidad desconocida: {durabilidad}")
+        self.ruta_bd = ruta_bd
+        self.clave_usuario = clave_usuario
+        self.reportar_error = reportar_error
+        self.conexion = sqlite3.connect(ruta_bd)
+        self.conexion.execute("PRAGMA journal_mode=WAL")
+        # SQLite ya agrupa por su cuenta: con WAL y synchronous=NORMAL los commits no esperan al
+        # disco y se sincronizan juntos en cada checkpoint; FULL sincroniza cada commit (cada venta).
+        self.conexion.execute("PRAGMA synchronous=" + ("FULL" if durabilidad == "por_venta" else "NORMAL"))
+        self.conexion.execute("PRAGMA foreign_keys=ON")
+        self.conexion.executescript(ESQUEMA_SQLITE)
+        self._preparar_nombres_clave()
+        if self._faltan_agregados():
+            self._rehacer_agregados()
+
+    # Usuarios
+    def _preparar_nombres_clave(self):
+        """Agrega nombre_clave a las bases de datos creadas sin ella y le pone su índice único."""
+        columnas = {fila[1] for fila in self.conexion.execute("PRAGMA table_info(usuarios)")}
+        if "nombre_clave" not in columnas:
+            with self.conexion:
+                self.conexion.execute("ALTER TABLE usuarios ADD COLUMN nombre_clave TEXT")
+                nombres = self.conexion.execute("SELECT nombre FROM usuarios").fetchall()
+                self.conexion.executemany("UPDATE usuarios SET nombre_clave = ? WHERE nombre = ?",
+                                          [(nombre.casefold(), nombre) for (nombre,) in nombres])
+                self.conexion.execute("DROP INDEX IF EXISTS idx_usuarios_nombre_nocase")
+        try:
+            with self.conexion:
+                self.conexion.execute(
+                    "CREATE UNIQUE INDEX IF NOT EXISTS idx_usuarios_nombre_clave ON usuarios(nombre_clave)")
+        except sqlite3.IntegrityError:
+            # Datos de antes con dos usuarios que sólo se distinguen por mayúsculas: se avisa y se sigue.
+            self.reportar_error("Problemas con los datos", "Hay usuarios cuyos nombres sólo se distinguen por "
+                                "mayúsculas; renómbralos para que los nombres no se confundan.")
+            self.conexion.execute("CREATE INDEX IF NOT EXISTS idx_usuarios_nombre_clave_repetido ON usuarios(nombre_clave)")
+
+    @_reporta_errores("No pudimos leer los usuarios", por_defecto=list)
+    def listar_usuarios(self):
+        filas = self.conexion.execute("SELECT datos FROM usuarios ORDER BY rowid")
+        return [json.loads(datos) for (datos,) in filas]
+
+    @_reporta_errores("No pudimos buscar el usuario")
+    def obtener_usuario(self, nombre):
+        fila = self.conexion.execute("SELECT datos FROM usuarios WHERE nombre = ?", (nombre,)).fetchone()
+        return json.loads(fila[0]) if fila else None
+
+    @_reporta_errores("No pudimos revisar el nombre de usuario", por_defecto=False)
+    def nombre_ocupado(self, nombre, excepto=None):
+        fila = self.conexion.execute(
+            "SELECT 1 FROM usuarios WHERE nombre_clave = ? AND nombre_clave <> ? LIMIT 1",
+            (nombre.casefold(), (excepto or "").casefold())).fetchone()
+        return fila is not None
+
+    def _fila_usuario(self, usuario):
+        nombre = usuario[self.clave_usuario]
+        return nombre, nombre.casefold(), json.dumps(usuario, ensure_ascii=False)
+
+    @_reporta_errores("No pudimos guardar el usuario nuevo", por_defecto=False)
+    def agregar_usuario(self, usuario):
+        """Devuelve True si el usuario quedó guardado (un nombre repetido, aun con otras mayúsculas, no)."""
+        with self.conexion:
+            self.conexion.execute("INSERT INTO usuarios (nombre, nombre_clave, datos) VALUES (?, ?, ?)",
+                                  self._fila_usuario(usuario))
+        return True
+
+    @_reporta_errores("No pudimos actualizar el usuario")
+    def actualizar_usuario(self, nombre, usuario):
+        with self.conexion:
+            self.conexion.execute("UPDATE usuarios SET nombre = ?, nombre_clave = ?, datos = ? WHERE nombre = ?",
+                                  (*self._fila_usuario(usuario), nombre))
+
+    @_reporta_errores("No pudimos eliminar el usuario")
+    def eliminar_usuario(self, nombre):
+        with self.conexion:
+            self.conexion.execute("DELETE FROM usuarios WHERE nombre = ?", (nombre,))
+
+    # Productos
+    @staticmethod
+    def _fila_producto(producto):
+        extras = {k: v for k, v in producto.items() if k not in _COLUMNAS_PRODUCTO}
+        return (producto["id"], producto["nombre"], producto["precio"], producto["stock"],
+                json.dumps(extras, ensure_ascii=False))
+
+    @staticmethod
+    def _productos_de(conexion):
+        productos = []
+        for id_producto, nombre, precio, stock, datos in conexion.execute(
+                "SELECT id, nombre, precio, stock, datos FROM productos ORDER BY rowid"):
+            producto = {"id": id_producto, "nombre": nombre, "precio": precio, "stock": stock}
+            producto.update(json.loads(datos))
+            productos.append(producto)
+        return productos
+
+    def leer_productos(self):
+        """Lee los productos con una conexión propia y sin atrapar errores, así que sirve desde otro hilo."""
+        conexion = sqlite3.connect(self.ruta_bd)
+        try:
+            return self._productos_de(conexion)
+        finally:
+            conexion.close()
+
+    @_reporta_errores("No pudimos leer los productos", por_defecto=list)
+    def listar_productos(self):
+        return self._productos_de(self.conexion)
+
+    @_reporta_errores("No pudimos guardar los productos")
+    def guardar_productos(self, productos):
+        with self.conexion:
+            self.conexion.execute("DELETE FROM productos")
+            self.conexion.executemany("INSERT INTO productos (id, nombre, precio, stock, datos) VALUES (?, ?, ?, ?, ?)",
+                                      [self._fila_producto(p) for p in productos])
+
+    @_reporta_errores("No pudimos guardar el producto")
+    def guardar_producto(self, producto):
+        with self.conexion:
+            self.conexion.execute(
+                "INSERT INTO productos (id, nombre, precio, stock, datos) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT(id) DO UPDATE SET nombre = excluded.nombre, precio = excluded.precio, "
+                "stock = excluded.stock, datos = excluded.datos",
+                self._fila_producto(producto))
+
+    @_reporta_errores("No pudimos eliminar el producto")
+    def eliminar_producto(self, id_producto):
+        with self.conexion:
+            self.conexion.execute("DELETE FROM productos WHERE id = ?", (id_producto,))
+
+    @_reporta_errores("No pudimos actualizar el stock")
+    def ajustar_stock(self, id_producto, cambio):
+        with self.conexion:
+            self.conexion.execute("UPDATE productos SET stock = stock + ? WHERE id = ?", (cambio, id_producto))
+
+    # Compras
+    @staticmethod
+    def _compras_de(conexion):
+        lineas = {}
+        for id_transaccion, nombre, precio_unitario, cantidad in conexion.execute(
+                "SELECT id_transaccion, nombre, precio_unitario, cantidad FROM lineas_venta ORDER BY rowid"):
+            lineas.setdefault(id_transaccion, []).append(
+                {"nombre": nombre, "precio_unitario": precio_unitario, "cantidad": cantidad})
+        return [{"id_transaccion": id_transaccion, "usuario": usuario, "fecha": fecha,
+                 "metodo_pago": metodo_pago, "total_pagado": total_pagado,
+                 "productos": lineas.get(id_transaccion, [])}
+                for id_transaccion, usuario, fecha, metodo_pago, total_pagado in conexion.execute(
+                    "SELECT id_transaccion, usuario, fecha, metodo_pago, total_pagado FROM ventas ORDER BY rowid")]
+
+    def leer_compras(self):
+        """Lee el historial con una conexión propia y sin atrapar errores, así que sirve desde otro hilo."""
+        conexion = sqlite3.connect(self.ruta_bd)
+        try:
+            return self._compras_de(conexion)
+        finally:
+            conexion.close()
+
+    @_reporta_errores("No pudimos leer el historial de compras", por_defecto=list)
+    def listar_compras(self):
+        return self._compras_de(self.conexion)
+
+    @staticmethod
+    def _validar_compra(registro):
+        """Lanza ValueError si a la compra o a alguna de sus líneas le falta un dato con columna propia."""
+        if not isinstance(registro, dict):
+            raise ValueError(f"la compra no es un registro válido: {registro!r}")
+        faltan = [c for c in ("id_transaccion", "usuario", "fecha", "total_pagado") if c not in registro]
+        if faltan:
+            raise ValueError(f"a la compra {registro.get('id_transaccion')!r} le falta {', '.join(faltan)}")
+        productos = registro.get("productos", [])
+        if not isinstance(productos, list):
+            raise ValueError(f"los productos de la compra {registro['id_transaccion']!r} no son una lista")
+        for p in productos:
+            if not isinstance(p, dict) or any(c not in p for c in ("nombre", "precio_unitario", "cantidad")):
+                raise ValueError(f"la compra {registro['id_transaccion']!r} tiene una línea incompleta: {p!r}")
+
+    def _insertar_compra(self, registro, ignorar_repetidas=False):
+        self._validar_compra(registro)
+        insertar = "INSERT OR IGNORE INTO" if ignorar_repetidas else "INSERT INTO"
+        cursor = self.conexion.execute(
+            f"{insertar} ventas (id_transaccion, usuario, fecha, metodo_pago, total_pagado) VALUES (?, ?, ?, ?, ?)",
+            (registro["id_transaccion"], registro["usuario"], registro["fecha"],
+             registro.get("metodo_pago"), registro["total_pagado"]))
+        if cursor.rowcount:
+            self.conexion.executemany(
+                "INSERT INTO lineas_venta (id_transaccion, nombre, precio_unitario, cantidad) VALUES (?, ?, ?, ?)",
+                [(registro["id_transaccion"], p["nombre"], p["precio_unitario"], p["cantidad"])
+                 for p in registro.get("productos", [])])
+            # En la misma transacción que la venta: o quedan las dos cosas o ninguna.
+            self.conexion.executemany(_SUMAR_AGREGADO, agregados_ventas.contribuciones(registro))
+        return cursor.rowcount > 0
+
+    @_reporta_errores("No pudimos guardar la compra en el historial")
+    def registrar_compra(self, registro):
+        with self.conexion:
+            self._insertar_compra(registro)
+
+    def siguiente_numero_compra(self):
+        """Número de la próxima compra (1, 2, ...) para armar su id: el rowid que le toca en ventas."""
+        return self.conexion.execute("SELECT COALESCE(MAX(rowid), 0) + 1 FROM ventas").fetchone()[0]
+
+    # Agregados de ventas
+    def _faltan_agregados(self):
+        """True en una base de datos creada antes de que existieran los agregados (tiene ventas y ningún agregado)."""
+        return (self.conexion.execute("SELECT 1 FROM agregados LIMIT 1").fetchone() is None
+                and self.conexion.execute("SELECT 1 FROM ventas LIMIT 1").fetchone() is not None)
+
+    def _rehacer_agregados(self):
+        with self.conexion:
+            self.conexion.execute("DELETE FROM agregados")
+            for registro in self._compras_de(self.conexion):
+                self.conexion.executemany(_SUMAR_AGREGADO, agregados_ventas.contribuciones(registro))
+
+    @staticmethod
+    def _agregados_de(conexion):
+        agregados = agregados_ventas.vacios()
+        for dimension, clave, ventas, cantidad, total in conexion.execute(
+                "SELECT dimension, clave, ventas, cantidad, total FROM agregados"):
+            agregados.setdefault(dimension, {})[clave] = {"ventas": ventas, "cantidad": cantidad, "total": total}
+        return agregados
+
+    def leer_agregados(self):
+        """Lee los agregados con una conexión propia y sin atrapar errores, así que sirve desde otro hilo."""
+        conexion = sqlite3.connect(self.ruta_bd)
+        try:
+            return self._agregados_de(conexion)
+        finally:
+            conexion.close()
+
+    @_reporta_errores("No pudimos leer las estadísticas de ventas", por_defecto=agregados_ventas.vacios)
+    def listar_agregados(self):
+        return self._agregados_de(self.conexion)
+
+    def compactar(self):
+        try:
+            self.conexion.execute("PRAGMA optimize")
+        except sqlite3.Error as e:
+            self.reportar_error("Problemas con los datos", f"No pudimos optimizar la base de datos: {e}")
+
+    def cerrar(self):
+        self.conexion.close()
+
+
+def crear_almacen(motor, archivo_usuarios, archivo_compras, archivo_productos=None, ruta_bd="tienda.db",
+                  clave_usuario="user", modo_historial="diario", durabilidad="por_venta", formato="legible",
+                  reportar_error=_reportar_en_consola):
+    """Crea el almacén configurado: "json" (archivos de siempre) o "sqlite". `formato` sólo aplica a "json"."""
+    if motor == "sqlite":
+        return AlmacenSQLite(ruta_bd, clave_usuario=clave_usuario, durabilidad=durabilidad, reportar_error=reportar_error)
+    if motor == "json":
+        return AlmacenJSON(archivo_usuarios, archivo_compras, archivo_productos, clave_usuario=clave_usuario,
+                           modo_historial=modo_historial, durabilidad=durabilidad, formato=formato,
+                           reportar_error=reportar_error)
+    raise ValueError(f"Motor de almacenamiento desconocido: {motor}")
+
+
+# --- Migración de JSON a SQLite ---
+def migrar_json_a_sqlite(ruta_bd, archivo_usuarios=None, archivo_compras=None, archivo_productos=None, clave_usuario="user",
+                         reportar_error=_reportar_en_consola):
+    """Copia los archivos JSON existentes a la base de datos. Se puede repetir sin duplicar datos.
+
+    Devuelve cuántos usuarios, productos y compras se agregaron de verdad. Los usuarios cuyo
+    nombre sólo se distingue de otro por mayúsculas no caben en la base de datos
+    (ver nombre_clave): no se copian y se avisa cuáles son, para renombrarlos y repetir.
+    """
+    almacen = AlmacenSQLite(ruta_bd, clave_usuario=clave_usuario, reportar_error=reportar_error)
+    usuarios = cargar_json(archivo_usuarios, reportar_error) if archivo_usuarios else []
+    productos = diario.cargar_registros(archivo_productos) if archivo_productos else []
+    compras = diario.cargar_historial(archivo_compras) if archivo_compras else []
+    repetidos = []
+    try:
+        with almacen.conexion:
+            n_usuarios = 0
+            for usuario in usuarios:
+                nombre, nombre_clave, datos = almacen._fila_usuario(usuario)
+                fila = almacen.conexion.execute("SELECT nombre FROM usuarios WHERE nombre_clave = ?",
+                                                (nombre_clave,)).fetchone()
+                if fila is None:
+                    almacen.conexion.execute("INSERT INTO usuarios (nombre, nombre_clave, datos) VALUES (?, ?, ?)",
+                                             (nombre, nombre_clave, datos))
+                    n_usuarios += 1
+                elif fila[0] != nombre:
+                    repetidos.append(f"'{nombre}' (choca con '{fila[0]}')")
+            for p in productos:
+                p.setdefault("id", p["nombre"])
+            n_productos = almacen.conexion.executemany(
+                "INSERT OR IGNORE INTO productos (id, nombre, precio, stock, datos) VALUES (?, ?, ?, ?, ?)",
+                [almacen._fila_producto(p) for p in productos]).rowcount
+            n_compras = sum(almacen._insertar_compra(registro, ignorar_repetidas=True) for registro in compras)
+    finally:
+        almacen.cerrar()
+    if repetidos:
+        reportar_error("Usuarios sin migrar", "Estos usuarios sólo se distinguen de otro por mayúsculas "
+                       f"y no se copiaron; renómbralos en el JSON y repite la migración: {', '.join(repetidos)}")
+    return n_usuarios, n_productos, n_compras
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Migra los archivos JSON de la tienda a una base de datos SQLite.")
+    parser.add_argument("--bd", default="tienda.db", help="archivo de la base de datos (por defecto: tienda.db)")
+    parser.add_argument("--usuarios", help="archivo JSON de usuarios (data.json o usuarios.json)")
+    parser.add_argument("--compras", help="archivo del historial de compras (historial_compras.json)")
+    parser.add_argument("--productos", help="archivo JSON de productos (productos.json)")
+    parser.add_argument("--clave-usuario", default="user", help='campo con el nombre de usuario ("user" o "usuario")')
+    args = parser.parse_args()
+
+    n_usuarios, n_productos, n_compras = migrar_json_a_sqlite(
+        args.bd, args.usuarios, args.compras, args.productos, args.clave_usuario)
+    print(f"Migración lista en '{args.bd}': se agregaron {n_usuarios} usuarios, {n_productos} productos y {n_compras} compras.")
@@ -0,0 +1,214 @@
+import json
+import os
+import shutil
+import threading
+
+try:
+    import orjson  # codificador en C, varias veces más rápido; opcional
+except ImportError:
+    orjson = None
+
+# --- Escritura Segura de Archivos ---
+# Guardar nunca escribe encima del archivo: primero va a un temporal, se fuerza a
+# disco y recién entonces reemplaza al original con os.replace, que es atómico.
+# Un corte de luz deja el archivo viejo o el nuevo, nunca uno a medias. Antes de
+# reemplazarlo, la versión anterior queda como "<archivo>.bak", y al leer un
+# archivo dañado se recupera esa copia en lugar de empezar de cero.
+
+
+# --- Formatos ---
+# "legible":  JSON con sangría de 4 espacios, como siempre (se puede abrir y editar a mano).
+# "compacto": JSON sin espacios, escrito con orjson si está instalado.
+# "tabla":    JSON sin espacios donde cada diccionario se guarda como [n, valor, valor...] y
+#             sus claves se escriben una sola vez en "esquemas" (la lista n). En el historial
+#             "precio_unitario", "cantidad"... dejan de repetirse en cada línea de cada venta.
+# Al leer no hace falta saber el formato: un archivo "tabla" se reconoce por su encabezado.
+FORMATOS = ("legible", "compacto", "tabla")
+
+
+def _a_tabla(valor, esquemas, numeros):
+    if isinstance(valor, dict):
+        claves = tuple(valor)
+        numero = numeros.get(claves)
+        if numero is None:
+            numero = numeros[claves] = len(esquemas)
+            esquemas.append(list(claves))
+        return [numero, *(_a_tabla(v, esquemas, numeros) for v in valor.values())]
+    if isinstance(valor, list):
+        return [-1, *(_a_tabla(v, esquemas, numeros) for v in valor)]  # -1 marca una lista de verdad
+    return valor
+
+
+def _desde_tabla(valor, esquemas):
+    # Sólo las listas necesitan traducirse; el resto de los valores se usan tal cual.
+    valores = [_desde_tabla(v, esquemas) if type(v) is list else v for v in valor[1:]]
+    return valores if valor[0] < 0 else dict(zip(esquemas[valor[0]], valores))
+
+
+def codificar(datos, formato="legible"):
+    """Bytes del archivo que guarda `datos` en `formato`."""
+    if formato == "legible":
+        return json.dumps(datos, indent=4, ensure_ascii=False).encode("utf-8")
+    if formato == "tabla":
+        esquemas = []
+        datos = {"formato": "tabla", "version": 1, "esquemas": esquemas, "datos": _a_tabla(datos, esquemas, {})}
+    elif formato != "compacto":
+        raise ValueError(f"Formato desconocido: {formato}")
+    if orjson is not None:
+        return orjson.dumps(datos)
+    return json.dumps(datos, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+def decodificar(contenido):
+    """Datos guardados en `contenido` (bytes), en cualquiera de los FORMATOS."""
+    # orjson.JSONDecodeError hereda de json.JSONDecodeError: quien llama atrapa uno solo.
+    datos = orjson.loads(contenido) if orjson is not None else json.loads(contenido)
+    if isinstance(datos, dict) and datos.get("formato") == "tabla" and "esquemas" in datos:
+        try:
+            contenido = datos["datos"]
+            return _desde_tabla(contenido, datos["esquemas"]) if type(contenido) is list else contenido
+        except (IndexError, KeyError, TypeError) as e:
+            raise json.JSONDecodeError(f"tabla dañada: {e}", "", 0) from e
+    return datos
+
+
+# --- Caché de Lecturas ---
+# Leer el mismo archivo sin cambios (p. ej. el historial cada vez que se abren las
+# estadísticas) no vuelve a decodificarlo: se guarda lo leído junto con la fecha de
+# modificación, el tamaño y el inodo del archivo. Como escribir_json reemplaza el
+# archivo con os.replace, cada guardado cambia el inodo; además lo olvida de la caché.
+
+
+class CacheLecturas:
+    """Ruta -> ((mtime, tamaño, inodo), datos ya decodificados)."""
+
+    def __init__(self):
+        self._entradas = {}
+        self._cerrojo = threading.Lock()  # también se lee desde hilos (carga del catálogo, escritor)
+        self.aciertos = 0
+        self.fallos = 0
+
+    def obtener(self, filepath, firma):
+        with self._cerrojo:
+            entrada = self._entradas.get(filepath)
+            if entrada is not None and entrada[0] == firma:
+                self.aciertos += 1
+                return entrada[1]
+            self.fallos += 1
+            return None
+
+    def guardar(self, filepath, firma, datos):
+        with self._cerrojo:
+            self._entradas[filepath] = (firma, datos)
+
+    def olvidar(self, filepath):
+        with self._cerrojo:
+            self._entradas.pop(filepath, None)
+
+    def limpiar(self):
+        with self._cerrojo:
+            self._entradas.clear()
+
+
+CACHE_LECTURAS = CacheLecturas()
+
+
+def ruta_respaldo(filepath):
+    return filepath + ".bak"
+
+
+def firma_archivo(filepath):
+    """(mtime, tamaño) del archivo, o None si no existe. Sirve para notar cambios hechos desde afuera."""
+    try:
+        st = os.stat(filepath)
+    except FileNotFoundError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+
+def _sincronizar_carpeta(filepath):
+    """Fuerza a disco el cambio de nombre. En Windows no se puede abrir una carpeta, así que se omite."""
+    if os.name != "posix":
+        return
+    fd = os.open(os.path.dirname(os.path.abspath(filepath)), os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def _reemplazar_con_copia(origen, destino):
+    temporal = destino + ".tmp"
+    try:
+        if os.path.exists(temporal):
+            os.remove(temporal)
+        os.link(origen, temporal)  # enlace duro: no copia ni un byte
+    except OSError:
+        shutil.copy2(origen, temporal)  # sistemas de archivos sin enlaces duros
+    os.replace(temporal, destino)
+
+
+def escribir_json(datos, filepath, formato="legible"):
+    """Escribe `datos` en `filepath` de forma atómica y deja la versión anterior como respaldo."""
+    contenido = codificar(datos, formato)
+    temporal = filepath + ".tmp"
+    with open(temporal, "wb") as f:
+        f.write(contenido)
+        f.flush()
+        os.fsync(f.fileno())
+    if os.path.exists(filepath):
+        _reemplazar_con_copia(filepath, ruta_respaldo(filepath))
+    os.replace(temporal, filepath)
+    CACHE_LECTURAS.olvidar(filepath)
+    _sincronizar_carpeta(filepath)
+
+
+def _leer(filepath, usar_cache=False):
+    with open(filepath, "rb") as f:
+        st = os.fstat(f.fileno())
+        firma = (st.st_mtime_ns, st.st_size, st.st_ino)
+        if usar_cache:
+            data = CACHE_LECTURAS.obtener(filepath, firma)
+            if data is not None:
+                return data
+        contenido = f.read()
+    if not contenido:
+        raise json.JSONDecodeError("archivo vacío", "", 0)
+    data = decodificar(contenido)
+    data = data if data is not None else []
+    if usar_cache:
+        CACHE_LECTURAS.guardar(filepath, firma, data)
+    return data
+
+
+def _copia_superficial(datos):
+    if isinstance(datos, list):
+        return list(datos)
+    if isinstance(datos, dict):
+        return dict(datos)
+    return datos
+
+
+def leer_json(filepath):
+    """Devuelve (datos, recuperado). Si el archivo no existe da []; si está dañado usa el respaldo.
+
+    Pasa por CACHE_LECTURAS: la lista (o diccionario) de primer nivel es una copia que se puede
+    modificar, pero sus elementos se comparten con la caché y no se deben cambiar en su lugar.
+
+    `recuperado` es True cuando se usó el respaldo; en ese caso el respaldo vuelve a ocupar el
+    lugar del archivo, para que el próximo guardado no lo pise con la versión dañada.
+    Si no hay respaldo que sirva, se lanza el JSONDecodeError original.
+    """
+    if not os.path.exists(filepath):
+        return [], False
+    try:
+        return _copia_superficial(_leer(filepath, usar_cache=True)), False
+    except json.JSONDecodeError:
+        respaldo = ruta_respaldo(filepath)
+        if not os.path.exists(respaldo):
+            if os.path.getsize(filepath) == 0:
+                return [], False  # archivo recién creado y vacío, como antes
+            raise
+        datos = _leer(respaldo)
+        _reemplazar_con_copia(respaldo, filepath)
+        return datos, True
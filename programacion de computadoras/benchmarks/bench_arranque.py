@@ -0,0 +1,79 @@
+"""Mide cuánto tarda cada versión de la tienda en llegar a la ventana de inicio de sesión.
+
+Uso:  python benchmarks/bench_arranque.py [--modulos interfaz_final interfaz_grafica2 prueba] [--repeticiones 5] [--top 10] [--ventana]
+
+Para cada módulo arranca un intérprete nuevo que lo importa (lo mismo que hace
+"python interfaz_final.py" antes de abrir la ventana) y mide el tiempo total, desde
+una carpeta temporal para no tocar los datos de la tienda. Luego lo importa una vez
+más con -X importtime y muestra las importaciones más lentas. La última fila mide lo
+que costaba antes importar pandas, matplotlib y seaborn al arrancar.
+Con --ventana además se crea y dibuja una ventana de Tk (hace falta una pantalla).
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+CARPETA_TIENDA = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ANALISIS_ANTES = "import pandas, matplotlib.pyplot, seaborn, matplotlib.backends.backend_tkagg"
+
+
+def codigo_arranque(modulo, ventana):
+    codigo = f"import {modulo}"
+    if ventana:
+        codigo += "; import tkinter; r = tkinter.Tk(); r.update(); r.destroy()"
+    return codigo
+
+
+def ejecutar(codigo, carpeta, importtime=False):
+    entorno = dict(os.environ, PYTHONPATH=CARPETA_TIENDA)
+    opciones = ["-X", "importtime"] if importtime else []
+    inicio = time.perf_counter()
+    resultado = subprocess.run([sys.executable, *opciones, "-c", codigo], cwd=carpeta, env=entorno,
+                               capture_output=True, text=True)
+    duracion = time.perf_counter() - inicio
+    if resultado.returncode != 0:
+        raise RuntimeError(f"falló '{codigo}':\n{resultado.stderr.strip()}")
+    return duracion, resultado.stderr
+
+
+def importaciones(salida):
+    """(nombre, propio_us, acumulado_us) de cada línea que deja -X importtime."""
+    filas = []
+    for linea in salida.splitlines():
+        if not linea.startswith("import time:") or "self [us]" in linea:
+            continue
+        propio, acumulado, nombre = linea[len("import time:"):].split("|")
+        filas.append((nombre.strip(), int(propio), int(acumulado)))
+    return filas
+
+
+def medir(nombre, codigo, carpeta, repeticiones, top):
+    tiempos = [ejecutar(codigo, carpeta)[0] for _ in range(repeticiones)]
+    filas = importaciones(ejecutar(codigo, carpeta, importtime=True)[1])
+    total_importaciones = sum(propio for _, propio, _ in filas)
+    print(f"{nombre:<22}{statistics.median(tiempos) * 1000:>10.0f}ms{total_importaciones / 1000:>12.0f}ms{len(filas):>10}")
+    # Sólo paquetes de primer nivel: su acumulado ya incluye todo lo que importan.
+    primer_nivel = sorted((f for f in filas if "." not in f[0]), key=lambda f: f[2], reverse=True)
+    for modulo, _, acumulado in primer_nivel[:top]:
+        print(f"{'':<4}{modulo:<30}{acumulado / 1000:>8.0f}ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--modulos", nargs="+", default=["interfaz_final", "interfaz_grafica2", "prueba"],
+                        help="versiones de la tienda a medir")
+    parser.add_argument("--repeticiones", type=int, default=5, help="arranques por módulo (se usa la mediana)")
+    parser.add_argument("--top", type=int, default=10, help="importaciones más lentas que se muestran")
+    parser.add_argument("--ventana", action="store_true", help="también crear y dibujar una ventana de Tk")
+    args = parser.parse_args()
+
+    print(f"{'Arranque':<22}{'total':>12}{'importar':>12}{'módulos':>10}")
+    with tempfile.TemporaryDirectory() as carpeta:
+        medir("(intérprete vacío)", "pass", carpeta, args.repeticiones, 0)
+        for modulo in args.modulos:
+            medir(modulo, codigo_arranque(modulo, args.ventana), carpeta, args.repeticiones, args.top)
+        medir("(análisis, antes)", ANALISIS_ANTES, carpeta, args.repeticiones, args.top)
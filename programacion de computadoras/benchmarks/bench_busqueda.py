@@ -0,0 +1,68 @@
+"""Mide el tiempo de búsqueda en el catálogo con el índice y con el recorrido lineal de antes.
+
+Uso:  python benchmarks/bench_busqueda.py [--productos 100000] [--repeticiones 200]
+
+Genera un catálogo sintético con nombres y descripciones en español (con tildes)
+y compara IndiceBusqueda.buscar() con la búsqueda por subcadena que hacía buscar().
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from indice_busqueda import IndiceBusqueda
+
+TIPOS = ["comida", "arena", "juguete", "collar", "cama", "snack", "shampoo", "vitaminas"]
+ANIMALES = ["gatos", "perros", "cachorros", "gatitos", "aves", "peces", "conejos", "hámsters"]
+DETALLES = ["pequeño", "grande", "orgánico", "premium", "económico", "clásico", "light", "senior"]
+PALABRAS = ["nutrición", "balanceado", "delicioso", "energía", "pelaje", "digestión", "crecimiento",
+            "natural", "proteína", "fórmula", "ideal", "vitalidad", "sabor", "salmón", "pollo"]
+CONSULTAS = ["gato", "comida perros", "pequeno", "PEQUEÑO", "premium sal", "cam senior", "vitam", "zzz"]
+
+
+def generar_catalogo(cantidad, semilla=7):
+    azar = random.Random(semilla)
+    return [{
+        "id": f"P{i + 1:05d}",
+        "nombre": f"{azar.choice(TIPOS)} para {azar.choice(ANIMALES)} {azar.choice(DETALLES)} {i}",
+        "precio": azar.randint(1, 100) * 1000,
+        "stock": azar.randint(0, 50),
+        "imagen": "",
+        "descripcion": " ".join(azar.choices(PALABRAS, k=10)),
+    } for i in range(cantidad)]
+
+
+def lineal(productos, consulta):
+    termino = consulta.lower()
+    return [p for p in productos if termino in p["nombre"].lower() or termino in p.get("descripcion", "").lower()]
+
+
+def medir(funcion, repeticiones):
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        resultado = funcion()
+        tiempos.append(time.perf_counter() - inicio)
+    return statistics.median(tiempos), len(resultado)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--productos", type=int, default=100_000, help="tamaño del catálogo sintético")
+    parser.add_argument("--repeticiones", type=int, default=200, help="búsquedas medidas por consulta")
+    args = parser.parse_args()
+
+    productos = generar_catalogo(args.productos)
+    inicio = time.perf_counter()
+    indice = IndiceBusqueda(productos)
+    print(f"Índice de {args.productos:,} productos construido en {time.perf_counter() - inicio:.2f}s\n")
+
+    print(f"{'Consulta':<16}{'resultados':>12}{'índice':>12}{'lineal':>12}")
+    for consulta in CONSULTAS:
+        t_indice, n = medir(lambda: indice.buscar(consulta), args.repeticiones)
+        t_lineal, _ = medir(lambda: lineal(productos, consulta), max(1, args.repeticiones // 50))
+        print(f"{consulta!r:<16}{n:>12,}{t_indice * 1000:>10.3f}ms{t_lineal * 1000:>10.1f}ms")
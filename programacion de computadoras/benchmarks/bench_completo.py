@@ -0,0 +1,340 @@
+"""Mide de punta a punta lo que hace un cliente en la tienda y guarda los tiempos en un JSON.
+
+Uso:  python benchmarks/bench_completo.py [--ventas 10000] [--motor json] [--repeticiones 20] [--salida resultados.json] [--comparar anterior.json]
+
+Genera datos sintéticos (ver generar_datos.py) en una carpeta temporal, o copia ahí
+los de --datos, y mide cada paso con el almacén real: abrir el catálogo, iniciar
+sesión, registrarse, cargar las miniaturas de una página, buscar, agregar al carrito,
+pagar, abrir las estadísticas y dibujar cada gráfico. Si hay pantalla, también pinta
+el catálogo en una ListaVirtual de Tk y lo desplaza; si no, esos pasos se marcan como
+omitidos. Cada paso guarda mediana, p95 y mínimo en milisegundos. Con --comparar se
+muestra cuánto cambió cada paso respecto de una corrida anterior (p. ej. de otro commit).
+"""
+import argparse
+import datetime
+import itertools
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+CARPETA_TIENDA = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, CARPETA_TIENDA)
+
+import matplotlib
+matplotlib.use("Agg")  # los gráficos se dibujan sin pantalla
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from PIL import Image
+
+import agregados_ventas
+import almacenamiento
+import archivos
+import contrasenas
+import estadisticas
+import graficas
+import imagenes
+from bench_busqueda import CONSULTAS
+from catalogo import Carrito, Catalogo
+from generar_datos import CLAVE_USUARIOS, METODOS_PAGO, generar
+from indice_busqueda import IndiceBusqueda
+
+PRODUCTOS_POR_PAGINA = 10  # los que caben en la ventana del catálogo
+PRODUCTOS_POR_COMPRA = 3
+# Ejes del gráfico personalizado de prueba.py: agregación -> nombre del eje X.
+GRAFICOS_PERSONALIZADOS = {"dia": "Fecha", "mes": "Mes", "producto": "Producto",
+                           "metodo_pago": "Método de Pago", "usuario": "Usuario"}
+
+
+# --- Medición ---
+class Resultados:
+    """Nombre del paso -> {"mediana_ms", "p95_ms", "min_ms", "repeticiones"} o {"omitido": motivo}."""
+
+    def __init__(self):
+        self.pasos = {}
+
+    def medir(self, nombre, funcion, repeticiones, preparar=None):
+        """Llama a `funcion()` `repeticiones` veces; `preparar()` corre antes de cada una y no se mide."""
+        tiempos = []
+        for _ in range(repeticiones):
+            if preparar is not None:
+                preparar()
+            inicio = time.perf_counter()
+            funcion()
+            tiempos.append((time.perf_counter() - inicio) * 1000)
+        tiempos.sort()
+        self.pasos[nombre] = {
+            "mediana_ms": round(statistics.median(tiempos), 3),
+            "p95_ms": round(tiempos[min(len(tiempos) - 1, int(len(tiempos) * 0.95))], 3),
+            "min_ms": round(tiempos[0], 3),
+            "repeticiones": repeticiones,
+        }
+        paso = self.pasos[nombre]
+        print(f"{nombre:<34}{paso['mediana_ms']:>12.2f}{paso['p95_ms']:>12.2f}{paso['min_ms']:>12.2f}")
+
+    def omitir(self, nombre, motivo):
+        self.pasos[nombre] = {"omitido": motivo}
+        print(f"{nombre:<34}{'omitido: ' + motivo:>36}")
+
+
+# --- Datos ---
+def preparar_datos(carpeta, args):
+    """Deja los datos en `carpeta` (generados o copiados de --datos) y devuelve cuántos usuarios hay."""
+    if args.datos:
+        shutil.copytree(args.datos, carpeta, dirs_exist_ok=True)
+        return len(archivos.leer_json(os.path.join(carpeta, "data.json"))[0])
+    usuarios = args.usuarios if args.usuarios is not None else max(1, args.ventas // 20)
+    generar(carpeta, args.ventas, usuarios, args.productos, args.imagenes, args.formato, args.semilla)
+    return usuarios
+
+
+def abrir_almacen(carpeta, motor, formato):
+    return almacenamiento.crear_almacen(
+        motor, archivo_usuarios=os.path.join(carpeta, "data.json"),
+        archivo_compras=os.path.join(carpeta, "historial_compras.json"),
+        archivo_productos=os.path.join(carpeta, "productos_tienda.json"),
+        ruta_bd=os.path.join(carpeta, "tienda.db"), formato=formato)
+
+
+# --- Pasos ---
+def medir_tienda(carpeta, args, n_usuarios, resultados):
+    repeticiones = args.repeticiones
+    carpeta_fotos = os.path.join(carpeta, "imagenes_productos")
+
+    # Arranque: leer los productos y armar el catálogo con su índice, con la caché de lecturas fría.
+    def abrir_catalogo():
+        almacen = abrir_almacen(carpeta, args.motor, args.formato)
+        catalogo = Catalogo(almacen.leer_productos())
+        IndiceBusqueda(catalogo, campos=("nombre",))
+        almacen.cerrar()
+    resultados.medir("abrir_catalogo", abrir_catalogo, repeticiones, preparar=archivos.CACHE_LECTURAS.limpiar)
+
+    almacen = abrir_almacen(carpeta, args.motor, args.formato)
+    try:
+        catalogo = Catalogo(almacen.leer_productos())
+        indice = IndiceBusqueda(catalogo, campos=("nombre",))
+        productos = list(catalogo)
+
+        # Usuarios: login con la caché de contraseñas vacía, como el primer intento de cada cliente.
+        numeros = itertools.count()
+        almacen.obtener_usuario("cliente0")  # el índice de usuarios se carga una sola vez al arrancar
+
+        def login():
+            usuario = almacen.obtener_usuario(f"cliente{next(numeros) % n_usuarios}")
+            correcta, _ = contrasenas.verificar_password(CLAVE_USUARIOS, usuario["pass"])
+            if not correcta:
+                raise RuntimeError("la contraseña de los datos generados no coincide")
+        resultados.medir("login", login, repeticiones, preparar=contrasenas.limpiar_cache)
+
+        nuevos = itertools.count()
+
+        def registro():
+            nombre = f"nuevo{next(nuevos)}"
+            if almacen.nombre_ocupado(nombre):
+                raise RuntimeError(f"el usuario {nombre} ya existía")
+            if not almacen.agregar_usuario({"user": nombre, "pass": contrasenas.hash_password(CLAVE_USUARIOS), "foto": ""}):
+                raise RuntimeError(f"no se pudo registrar a {nombre}")
+        resultados.medir("registro", registro, repeticiones)
+
+        # Catálogo: miniaturas de una página, sin Tk (lo que hace cargar_miniatura antes del PhotoImage).
+        pagina = [os.path.join(carpeta_fotos, p["imagen"]) for p in productos[:PRODUCTOS_POR_PAGINA] if p.get("imagen")]
+
+        def miniaturas():
+            for ruta in pagina:
+                with Image.open(imagenes._origen(ruta, (80, 80), True)) as imagen:
+                    if imagen.size != (80, 80):
+                        imagen = imagen.resize((80, 80))
+                    imagen.load()
+
+        def borrar_derivadas():
+            for ruta in pagina:
+                imagenes.eliminar_derivadas(ruta)
+        resultados.medir("miniaturas_pagina_primera_vez", miniaturas, repeticiones, preparar=borrar_derivadas)
+        resultados.medir("miniaturas_pagina", miniaturas, repeticiones)
+        medir_catalogo_tk(productos, carpeta_fotos, repeticiones, resultados)
+
+        resultados.medir("busqueda", lambda: [indice.buscar(consulta) for consulta in CONSULTAS], repeticiones)
+
+        # Carrito y pago como en interfaz_final.py: apartar stock sólo cambia la memoria y al
+        # pagar se descuenta lo vendido en el almacén.
+        carrito = Carrito()
+        vueltas = itertools.count()
+
+        def agregar_carrito():
+            producto = productos[next(vueltas) % len(productos)]
+            catalogo.ajustar_stock(producto, -1)
+            carrito.agregar(producto)
+        resultados.medir("agregar_carrito", agregar_carrito, repeticiones, preparar=carrito.vaciar)
+
+        def llenar_carrito():
+            carrito.vaciar()
+            for _ in range(PRODUCTOS_POR_COMPRA):
+                agregar_carrito()
+
+        def pagar():
+            ahora = datetime.datetime.now()
+            for linea in carrito:
+                almacen.ajustar_stock(linea["producto"]["id"], -linea["cantidad"])
+            almacen.registrar_compra({
+                "id_transaccion": ahora.strftime("%Y%m%d%H%M%S%f"),
+                "usuario": "cliente0",
+                "fecha": ahora.strftime("%Y-%m-%d %H:%M:%S"),
+                "metodo_pago": METODOS_PAGO[0],
+                "total_pagado": carrito.total(),
+                "productos": [{"nombre": l["producto"]["nombre"], "precio_unitario": l["precio_unitario"],
+                               "cantidad": l["cantidad"]} for l in carrito],
+            })
+            carrito.vaciar()
+        resultados.medir("pagar", pagar, repeticiones, preparar=llenar_carrito)
+
+        # Estadísticas: lo que espera la ventana desde que se abre hasta tener todas las partes.
+        def abrir_estadisticas():
+            calculo = estadisticas.CalculoEnSegundoPlano(almacen.leer_agregados)
+            while True:
+                for parte, datos, _ in calculo.recibir():
+                    if parte == "error":
+                        raise datos
+                    if parte == "fin":
+                        return
+                time.sleep(0.0005)
+        resultados.medir("estadisticas_abrir", abrir_estadisticas, repeticiones)
+        resultados.medir("agregados_rehacer", lambda: agregados_ventas.calcular(almacen.leer_compras()),
+                         max(1, repeticiones // 5))
+        medir_graficos(almacen.leer_agregados(), repeticiones, resultados)
+    finally:
+        almacen.cerrar()
+
+
+def medir_catalogo_tk(productos, carpeta_fotos, repeticiones, resultados):
+    """Pinta el catálogo en una ListaVirtual y lo desplaza; sin pantalla, estos pasos se omiten."""
+    import tkinter as tk
+    try:
+        root = tk.Tk()
+    except tk.TclError:
+        resultados.omitir("catalogo_pintar", "sin pantalla")
+        resultados.omitir("catalogo_desplazar", "sin pantalla")
+        return
+    from componentes_tk import ListaVirtual
+
+    root.geometry("800x600")
+
+    def crear_fila(padre):
+        fila = tk.Frame(padre, bg="white", relief="solid", bd=1, padx=5, pady=5)
+        fila.lbl_img = tk.Label(fila, bg="white")
+        fila.lbl_img.pack(side="left")
+        fila.lbl_nombre = tk.Label(fila, bg="white", font=("Arial", 12))
+        fila.lbl_nombre.pack(side="left", padx=10)
+        return fila
+
+    def llenar_fila(fila, producto):
+        fila.image = imagenes.cargar_miniatura(os.path.join(carpeta_fotos, producto["imagen"]), (80, 80), crear_derivada=True)
+        fila.lbl_img.config(image=fila.image)
+        fila.lbl_nombre.config(text=f"{producto['nombre']} - ${producto['precio']:,}")
+
+    lista = None
+
+    def pintar():
+        nonlocal lista
+        if lista is not None:
+            lista.destroy()
+        lista = ListaVirtual(root, productos, crear_fila, llenar_fila)
+        lista.pack(fill="both", expand=True)
+        root.update()
+
+    def desplazar():
+        for paso in range(1, 11):
+            lista.canvas.yview_moveto(paso / 10)
+            root.update()
+
+    try:
+        resultados.medir("catalogo_pintar", pintar, repeticiones, preparar=imagenes.CACHE_MINIATURAS.limpiar)
+        resultados.medir("catalogo_desplazar", desplazar, repeticiones)
+    finally:
+        root.destroy()
+
+
+def medir_graficos(agregados, repeticiones, resultados):
+    """Arma y dibuja cada gráfico de las estadísticas y los personalizados de barras."""
+    def dibujar(crear_figura):
+        figura = crear_figura()
+        FigureCanvasAgg(figura).draw()
+        figura.clear()
+
+    if not agregados_ventas.total_ventas(agregados):
+        resultados.omitir("graficos", "no hay ventas")
+        return
+    repeticiones = max(1, repeticiones // 5)  # cada dibujo tarda cientos de milisegundos
+    partes = {parte: calcular(agregados) for parte, calcular in estadisticas.PARTES}
+    resultados.medir("grafico_metodos_pago", lambda: dibujar(lambda: graficas.figura_metodos_pago(partes["metodos_pago"])), repeticiones)
+    resultados.medir("grafico_top_productos", lambda: dibujar(lambda: graficas.figura_top_productos(partes["top_productos"])), repeticiones)
+    resultados.medir("grafico_ventas_diarias", lambda: dibujar(lambda: graficas.figura_ventas_diarias(partes["ventas_diarias"])), repeticiones)
+    for dimension, nombre_x in GRAFICOS_PERSONALIZADOS.items():
+        datos = estadisticas.serie(agregados, dimension, "total")
+        resultados.medir(f"grafico_barras_{dimension}", lambda: dibujar(lambda: graficas.figura_personalizada(
+            "Barras", list(datos.index), list(datos.values), nombre_x, "Total Pagado", True)), repeticiones)
+
+
+# --- Resultados ---
+def commit_actual():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=CARPETA_TIENDA,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def comparar(pasos, ruta_anterior):
+    with open(ruta_anterior, encoding="utf-8") as f:
+        anterior = json.load(f)
+    print(f"\nComparado con {ruta_anterior} (commit {anterior.get('commit')}):")
+    print(f"{'Paso':<34}{'antes ms':>12}{'ahora ms':>12}{'cambio':>10}")
+    for nombre, paso in pasos.items():
+        antes = anterior.get("resultados", {}).get(nombre, {})
+        if "mediana_ms" not in paso or "mediana_ms" not in antes:
+            continue
+        cambio = paso["mediana_ms"] / antes["mediana_ms"] if antes["mediana_ms"] else float("inf")
+        print(f"{nombre:<34}{antes['mediana_ms']:>12.2f}{paso['mediana_ms']:>12.2f}{cambio:>9.2f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--datos", help="carpeta con datos ya generados (se copia; por defecto se generan nuevos)")
+    parser.add_argument("--ventas", type=int, default=10_000, help="compras del historial generado")
+    parser.add_argument("--usuarios", type=int, help="usuarios generados (por defecto: una vigésima parte de las ventas)")
+    parser.add_argument("--productos", type=int, default=500, help="productos del catálogo generado")
+    parser.add_argument("--imagenes", type=int, default=20, help="fotos distintas que comparten los productos")
+    parser.add_argument("--formato", choices=archivos.FORMATOS, default="legible", help="formato de los archivos JSON")
+    parser.add_argument("--semilla", type=int, default=7, help="semilla del generador")
+    parser.add_argument("--motor", choices=("json", "sqlite"), default="json", help='"json" (archivos) o "sqlite"')
+    parser.add_argument("--repeticiones", type=int, default=20, help="veces que se mide cada paso")
+    parser.add_argument("--salida", default="resultados_bench.json", help="archivo JSON donde se guardan los tiempos")
+    parser.add_argument("--comparar", help="JSON de una corrida anterior para comparar")
+    args = parser.parse_args()
+
+    resultados = Resultados()
+    with tempfile.TemporaryDirectory() as carpeta:
+        n_usuarios = preparar_datos(carpeta, args)
+        if args.motor == "sqlite":
+            almacenamiento.migrar_json_a_sqlite(
+                os.path.join(carpeta, "tienda.db"), os.path.join(carpeta, "data.json"),
+                os.path.join(carpeta, "historial_compras.json"), os.path.join(carpeta, "productos_tienda.json"))
+        print(f"{'Paso':<34}{'mediana ms':>12}{'p95 ms':>12}{'mín ms':>12}")
+        medir_tienda(carpeta, args, n_usuarios, resultados)
+
+    parametros = {clave: valor for clave, valor in vars(args).items() if clave not in ("salida", "comparar")}
+    with open(args.salida, "w", encoding="utf-8") as f:
+        json.dump({
+            "fecha": datetime.datetime.now().isoformat(timespec="seconds"),
+            "commit": commit_actual(),
+            "python": platform.python_version(),
+            "plataforma": platform.platform(),
+            "parametros": parametros,
+            "resultados": resultados.pasos,
+        }, f, ensure_ascii=False, indent=2)
+    print(f"\nResultados guardados en '{args.salida}'.")
+    if args.comparar:
+        comparar(resultados.pasos, args.comparar)
@@ -0,0 +1,66 @@
+"""Compara desglosar_lineas() con el recorrido con iterrows() que armaba la tabla de líneas de venta.
+
+Uso:  python benchmarks/bench_desglose.py [--compras 10000 100000 1000000] [--max-bucle 1000000]
+
+Para cada tamaño genera un historial sintético (ver bench_formatos.py), lo pasa por
+estadisticas.preparar_compras() y mide cuánto tarda obtener una fila por producto
+vendido: con el bucle de antes (una Serie por compra) y con la versión vectorizada.
+El bucle tarda minutos con un millón de compras; --max-bucle lo omite por encima de ese tamaño.
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd
+
+from bench_formatos import generar_historial
+from estadisticas import desglosar_lineas, preparar_compras
+
+
+def desglose_con_bucle(df_compras):
+    """El recorrido de antes (prueba.py, _mostrar_estadisticas)."""
+    productos_comprados_list = []
+    for _, row in df_compras.iterrows():
+        if isinstance(row['productos'], list):
+            for prod in row['productos']:
+                productos_comprados_list.append({
+                    'fecha': row['fecha'],
+                    'usuario': row['usuario'],
+                    'metodo_pago': row['metodo_pago'],
+                    'id_transaccion': row['id_transaccion'],
+                    'nombre_producto': prod['nombre'],
+                    'precio_unitario': prod['precio_unitario'],
+                    'cantidad': prod['cantidad'],
+                    'subtotal': prod['precio_unitario'] * prod['cantidad'],
+                })
+    return pd.DataFrame(productos_comprados_list)
+
+
+def medir(funcion, *args):
+    inicio = time.perf_counter()
+    resultado = funcion(*args)
+    return time.perf_counter() - inicio, resultado
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--compras", type=int, nargs="+", default=[10_000, 100_000, 1_000_000],
+                        help="tamaños del historial sintético")
+    parser.add_argument("--max-bucle", type=int, default=1_000_000,
+                        help="no medir el bucle con historiales más grandes que esto")
+    args = parser.parse_args()
+
+    print(f"{'Compras':>10}{'líneas':>12}{'iterrows':>12}{'vectorizado':>14}{'veces':>8}")
+    for cantidad in args.compras:
+        df_compras = preparar_compras(generar_historial(cantidad))
+        t_vector, detalle = medir(desglosar_lineas, df_compras)
+        if cantidad <= args.max_bucle:
+            t_bucle, esperado = medir(desglose_con_bucle, df_compras)
+            pd.testing.assert_frame_equal(detalle, esperado, check_like=True, check_dtype=False)
+            bucle, veces = f"{t_bucle:>11.2f}s", f"{t_bucle / t_vector:>7.0f}x"
+        else:
+            bucle, veces = f"{'omitido':>12}", f"{'-':>8}"
+        print(f"{cantidad:>10,}{len(detalle):>12,}{bucle}{t_vector:>13.3f}s{veces}")
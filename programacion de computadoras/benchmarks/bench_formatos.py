@@ -0,0 +1,78 @@
+"""Compara guardar y cargar el historial de compras en cada formato de archivo.
+
+Uso:  python benchmarks/bench_formatos.py [--compras 100000] [--repeticiones 3]
+
+Genera un historial sintético con la misma forma que el de la tienda (cada compra con
+su lista de "productos") y lo guarda y vuelve a leer con archivos.escribir_json() y
+archivos.leer_json() en cada formato (sin la caché de lecturas), con y sin orjson. La
+primera fila es el formato de siempre: JSON con sangría y la biblioteca estándar.
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import archivos
+
+PRODUCTOS = [("Comida para perros", 25000), ("Arena para gatos", 18000), ("Juguete mordedor", 9000),
+             ("Collar ajustable", 15000), ("Cama acolchada", 60000), ("Snack dental", 7000),
+             ("Shampoo antipulgas", 22000), ("Vitaminas caninas", 31000)]
+METODOS = ["Tarjeta de Crédito", "PSE", "Efectivo", "Nequi"]
+
+
+def generar_historial(cantidad, semilla=7):
+    azar = random.Random(semilla)
+    historial = []
+    for i in range(cantidad):
+        items = [{"nombre": nombre, "precio_unitario": precio, "cantidad": azar.randint(1, 5)}
+                 for nombre, precio in azar.sample(PRODUCTOS, azar.randint(1, 4))]
+        historial.append({
+            "id_transaccion": f"2024{i:016d}",
+            "usuario": f"cliente{azar.randrange(cantidad // 20 + 1)}",
+            "fecha": f"2024-{azar.randint(1, 12):02d}-{azar.randint(1, 28):02d} {azar.randint(8, 20):02d}:{azar.randint(0, 59):02d}:00",
+            "metodo_pago": azar.choice(METODOS),
+            "total_pagado": sum(it["precio_unitario"] * it["cantidad"] for it in items),
+            "productos": items,
+        })
+    return historial
+
+
+def medir(funcion, repeticiones):
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion()
+        tiempos.append(time.perf_counter() - inicio)
+    return statistics.median(tiempos)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--compras", type=int, default=100_000, help="compras del historial sintético")
+    parser.add_argument("--repeticiones", type=int, default=3, help="mediciones por formato (se usa la mediana)")
+    args = parser.parse_args()
+
+    historial = generar_historial(args.compras)
+    con_orjson = archivos.orjson
+    casos = [("legible", None)] + [(formato, con_orjson) for formato in archivos.FORMATOS if con_orjson is not None]
+    casos += [(formato, None) for formato in archivos.FORMATOS if formato != "legible"]
+    if con_orjson is None:
+        print("orjson no está instalado: sólo se mide la biblioteca estándar.\n")
+
+    print(f"Historial de {args.compras:,} compras\n")
+    print(f"{'Formato':<22}{'tamaño':>12}{'guardar':>12}{'cargar':>12}")
+    with tempfile.TemporaryDirectory() as carpeta:
+        ruta = os.path.join(carpeta, "historial_compras.json")
+        for formato, codificador in casos:
+            archivos.orjson = codificador
+            guardar = medir(lambda: archivos.escribir_json(historial, ruta, formato), args.repeticiones)
+            cargar = medir(lambda: (archivos.CACHE_LECTURAS.limpiar(), archivos.leer_json(ruta)), args.repeticiones)
+            assert archivos.leer_json(ruta)[0] == historial
+            nombre = f"{formato} ({'orjson' if codificador else 'json'})"
+            print(f"{nombre:<22}{os.path.getsize(ruta) / 1e6:>10.1f}MB{guardar * 1000:>10.0f}ms{cargar * 1000:>10.0f}ms")
+    archivos.orjson = con_orjson
@@ -0,0 +1,79 @@
+"""Mide la latencia de inicio de sesión con distintos costos de hash.
+
+Uso:  python benchmarks/bench_login.py [--usuarios 10000] [--intentos 20]
+
+Crea un data.json temporal con muchos usuarios y repite el mismo camino que
+login(): buscar al usuario en el almacén y verificar la contraseña. Sirve para
+elegir COSTO_HASH en contrasenas.py: lo habitual es el costo más alto que deje
+el inicio de sesión por debajo de ~250 ms en el equipo de la caja.
+"""
+import argparse
+import hashlib
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import almacenamiento
+import contrasenas
+
+COSTOS = [
+    {"algoritmo": "scrypt", "n": 2 ** 12, "r": 8, "p": 1},
+    {"algoritmo": "scrypt", "n": 2 ** 14, "r": 8, "p": 1},
+    {"algoritmo": "scrypt", "n": 2 ** 15, "r": 8, "p": 1},
+    {"algoritmo": "scrypt", "n": 2 ** 16, "r": 8, "p": 1},
+    {"algoritmo": "pbkdf2_sha256", "iteraciones": 100_000},
+    {"algoritmo": "pbkdf2_sha256", "iteraciones": 300_000},
+    {"algoritmo": "pbkdf2_sha256", "iteraciones": 600_000},
+]
+
+
+def describir(costo):
+    if costo["algoritmo"] == "scrypt":
+        return f"scrypt n=2^{costo['n'].bit_length() - 1} r={costo['r']} p={costo['p']}"
+    return f"pbkdf2_sha256 {costo['iteraciones']:,} it."
+
+
+def medir(costo, num_usuarios, intentos, carpeta):
+    ruta = os.path.join(carpeta, "data.json")
+    # Sólo el usuario que inicia sesión necesita un hash real; el resto da volumen al índice.
+    usuarios = [{"user": f"cliente{i}", "pass": "x", "foto": ""} for i in range(num_usuarios)]
+    usuarios.append({"user": "cajero", "pass": contrasenas.hash_password("clave-segura", costo), "foto": ""})
+    almacenamiento.guardar_json(usuarios, ruta)
+    almacen = almacenamiento.AlmacenJSON(ruta, os.path.join(carpeta, "historial.json"))
+    almacen.obtener_usuario("cajero")  # carga el índice una vez, como tras el primer login
+
+    tiempos = []
+    for _ in range(intentos):
+        contrasenas.limpiar_cache()
+        inicio = time.perf_counter()
+        u = almacen.obtener_usuario("cajero")
+        correcta, _ = contrasenas.verificar_password("clave-segura", u["pass"], costo)
+        tiempos.append(time.perf_counter() - inicio)
+        assert correcta
+
+    inicio = time.perf_counter()
+    u = almacen.obtener_usuario("cajero")
+    contrasenas.verificar_password("clave-segura", u["pass"], costo)
+    en_cache = time.perf_counter() - inicio
+    return tiempos, en_cache
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--usuarios", type=int, default=10_000, help="usuarios de relleno en data.json")
+    parser.add_argument("--intentos", type=int, default=20, help="inicios de sesión medidos por costo")
+    args = parser.parse_args()
+
+    print(f"{'Costo':<28}{'mediana':>12}{'p95':>12}{'en caché':>12}")
+    with tempfile.TemporaryDirectory() as carpeta:
+        for costo in COSTOS:
+            if costo["algoritmo"] == "scrypt" and not hasattr(hashlib, "scrypt"):
+                print(f"{describir(costo):<28}{'(scrypt no disponible)':>36}")
+                continue
+            tiempos, en_cache = medir(costo, args.usuarios, args.intentos, carpeta)
+            p95 = sorted(tiempos)[min(len(tiempos) - 1, int(len(tiempos) * 0.95))]
+            print(f"{describir(costo):<28}{statistics.median(tiempos) * 1000:>10.1f}ms{p95 * 1000:>10.1f}ms{en_cache * 1000:>10.3f}ms")
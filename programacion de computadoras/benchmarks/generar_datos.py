@@ -0,0 +1,108 @@
+"""Genera datos sintéticos de la tienda (usuarios, productos con imágenes e historial de compras).
+
+Uso:  python benchmarks/generar_datos.py --destino datos_prueba [--ventas 100000] [--usuarios 5000] [--productos 500] [--imagenes 20]
+
+Deja en --destino los mismos archivos que usa interfaz_final.py (data.json,
+productos_tienda.json e historial_compras.json) y las fotos de los productos en
+imagenes_productos/. Todos los usuarios tienen la contraseña CLAVE_USUARIOS con el
+mismo hash (calcular un hash por usuario tardaría horas con un millón de ventas).
+Las compras van en orden de fecha durante un año, como si se hubieran anexado una
+a una, y usan los precios de los productos generados. Con la misma --semilla se
+obtienen siempre los mismos datos, así que los resultados se pueden comparar.
+"""
+import argparse
+import datetime
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PIL import Image, ImageOps
+
+import archivos
+import contrasenas
+from bench_busqueda import generar_catalogo
+
+CLAVE_USUARIOS = "clave-segura"
+METODOS_PAGO = ["Efectivo", "Tarjeta Visa", "Mastercard"]  # los de finalizar_pago()
+TAMANO_FOTOS = (800, 600)
+INICIO_HISTORIAL = datetime.datetime(2024, 1, 1, 8, 0, 0)
+
+
+def generar_usuarios(cantidad, clave=CLAVE_USUARIOS):
+    hash_clave = contrasenas.hash_password(clave)
+    return [{"user": f"cliente{i}", "pass": hash_clave, "foto": ""} for i in range(cantidad)]
+
+
+def generar_fotos(carpeta, cantidad, semilla=7):
+    """`cantidad` fotos JPEG con ruido de color (se decodifican como una foto de verdad). Devuelve sus nombres."""
+    azar = random.Random(semilla)
+    os.makedirs(carpeta, exist_ok=True)
+    nombres = []
+    for i in range(cantidad):
+        ruido = Image.effect_noise(TAMANO_FOTOS, 60)
+        color = tuple(azar.randrange(256) for _ in range(3))
+        foto = ImageOps.colorize(ruido, black="black", white=color)
+        nombres.append(f"producto_{i}.jpg")
+        foto.save(os.path.join(carpeta, nombres[-1]), format="JPEG", quality=85)
+    return nombres
+
+
+def generar_productos(cantidad, fotos, semilla=7):
+    productos = generar_catalogo(cantidad, semilla)
+    for i, producto in enumerate(productos):
+        producto["imagen"] = fotos[i % len(fotos)] if fotos else ""
+        producto["stock"] += 1000  # que no se agoten durante las mediciones
+    return productos
+
+
+def generar_historial(cantidad, usuarios, productos, semilla=7, dias=365):
+    azar = random.Random(semilla)
+    paso = dias * 86400 / max(cantidad, 1)
+    historial = []
+    for i in range(cantidad):
+        fecha = INICIO_HISTORIAL + datetime.timedelta(seconds=i * paso + azar.random() * paso)
+        items = [{"nombre": p["nombre"], "precio_unitario": p["precio"], "cantidad": azar.randint(1, 5)}
+                 for p in azar.sample(productos, min(len(productos), azar.randint(1, 4)))]
+        historial.append({
+            "id_transaccion": fecha.strftime("%Y%m%d%H%M%S") + f"{i:06d}",
+            "usuario": azar.choice(usuarios)["user"],
+            "fecha": fecha.strftime("%Y-%m-%d %H:%M:%S"),
+            "metodo_pago": azar.choice(METODOS_PAGO),
+            "total_pagado": sum(it["precio_unitario"] * it["cantidad"] for it in items),
+            "productos": items,
+        })
+    return historial
+
+
+def generar(destino, ventas, usuarios, productos, imagenes, formato="legible", semilla=7):
+    """Escribe todos los archivos en `destino`. Devuelve (usuarios, productos, historial)."""
+    os.makedirs(destino, exist_ok=True)
+    lista_usuarios = generar_usuarios(usuarios)
+    fotos = generar_fotos(os.path.join(destino, "imagenes_productos"), imagenes, semilla)
+    lista_productos = generar_productos(productos, fotos, semilla)
+    historial = generar_historial(ventas, lista_usuarios, lista_productos, semilla)
+    archivos.escribir_json(lista_usuarios, os.path.join(destino, "data.json"), formato)
+    archivos.escribir_json(lista_productos, os.path.join(destino, "productos_tienda.json"), formato)
+    archivos.escribir_json(historial, os.path.join(destino, "historial_compras.json"), formato)
+    return lista_usuarios, lista_productos, historial
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--destino", required=True, help="carpeta donde se escriben los datos")
+    parser.add_argument("--ventas", type=int, default=100_000, help="compras del historial (de 1.000 a 1.000.000)")
+    parser.add_argument("--usuarios", type=int, help="usuarios registrados (por defecto: una vigésima parte de las ventas)")
+    parser.add_argument("--productos", type=int, default=500, help="productos del catálogo")
+    parser.add_argument("--imagenes", type=int, default=20, help="fotos distintas que comparten los productos")
+    parser.add_argument("--formato", choices=archivos.FORMATOS, default="legible", help="formato de los archivos JSON")
+    parser.add_argument("--semilla", type=int, default=7, help="semilla del generador")
+    args = parser.parse_args()
+
+    inicio = time.perf_counter()
+    usuarios = args.usuarios if args.usuarios is not None else max(1, args.ventas // 20)
+    generar(args.destino, args.ventas, usuarios, args.productos, args.imagenes, args.formato, args.semilla)
+    print(f"Datos listos en '{args.destino}': {usuarios:,} usuarios, {args.productos:,} productos, "
+          f"{args.ventas:,} ventas ({time.perf_counter() - inicio:.1f} s). Contraseña de todos: {CLAVE_USUARIOS}")
@@ -0,0 +1,211 @@
+# --- Catálogo y Carrito Observables ---
+# Antes, comprar un producto volvía a dibujar todo el catálogo sólo para cambiar
+# una etiqueta de "En stock". Ahora los productos y el carrito avisan a las
+# vistas suscritas qué cambió, y cada vista actualiza únicamente esa fila.
+#
+# Los avisos llegan como oyente(evento, producto), con evento en:
+#   "agregado", "eliminado", "actualizado", "stock"   (catálogo)
+#   "recargado"                                        (catálogo completo reemplazado; producto es None)
+#   "agregado", "quitado", "vaciado"                   (carrito; en "vaciado" producto es None)
+
+
+import threading
+
+
+class Observable:
+    def __init__(self):
+        self._oyentes = []
+
+    def suscribir(self, oyente):
+        self._oyentes.append(oyente)
+        return oyente
+
+    def desuscribir(self, oyente):
+        if oyente in self._oyentes:
+            self._oyentes.remove(oyente)
+
+    def _avisar(self, evento, producto):
+        # Copia: un oyente puede redibujar su vista y desuscribirse mientras avisamos.
+        for oyente in list(self._oyentes):
+            oyente(evento, producto)
+
+
+def _clave_nombre(nombre):
+    return nombre.strip().casefold()
+
+
+class Catalogo(Observable):
+    """Lista de productos (diccionarios) que avisa de cada cambio.
+
+    Se puede recorrer e indexar como una lista, así que el código que sólo lee sigue igual;
+    los cambios deben pasar por sus métodos para que las vistas se enteren. Además guarda
+    diccionarios por id y por nombre para encontrar un producto sin recorrer la lista.
+    """
+
+    def __init__(self, productos=()):
+        super().__init__()
+        self._vaciar()
+        for producto in productos:
+            self._registrar(producto)
+
+    def _vaciar(self):
+        self._productos = []
+        self._por_id = {}
+        self._por_nombre = {}
+        self._ultimo_numero = 0
+
+    def _registrar(self, producto):
+        if not producto.get("id"):
+            producto["id"] = self.nuevo_id()
+        numero = producto["id"][1:]
+        if numero.isdigit():
+            self._ultimo_numero = max(self._ultimo_numero, int(numero))
+        self._productos.append(producto)
+        self._por_id[producto["id"]] = producto
+        self._por_nombre[_clave_nombre(producto["nombre"])] = producto
+
+    def __iter__(self):
+        return iter(self._productos)
+
+    def __len__(self):
+        return len(self._productos)
+
+    def __getitem__(self, indice):
+        return self._productos[indice]
+
+    # --- Búsquedas directas ---
+    def obtener(self, id_producto):
+        """Producto con ese id, o None."""
+        return self._por_id.get(id_producto)
+
+    def buscar_por_nombre(self, nombre):
+        """Producto con ese nombre (sin importar mayúsculas ni espacios a los lados), o None."""
+        return self._por_nombre.get(_clave_nombre(nombre))
+
+    def nombre_ocupado(self, nombre, excepto=None):
+        """True si otro producto (distinto de `excepto`) ya usa ese nombre."""
+        producto = self.buscar_por_nombre(nombre)
+        return producto is not None and producto is not excepto
+
+    def nuevo_id(self):
+        """Id que nunca se ha usado en este catálogo ("P001", "P002", ...), aunque se hayan borrado productos."""
+        return f"P{self._ultimo_numero + 1:03d}"
+
+    # --- Cambios ---
+    def cargar(self, productos):
+        """Reemplaza todo el catálogo (p. ej. con lo leído del almacén) con un solo aviso "recargado"."""
+        self._vaciar()
+        for producto in productos:
+            self._registrar(producto)
+        self._avisar("recargado", None)
+
+    def agregar(self, producto):
+        """Agrega el producto; si no trae id se le asigna uno nuevo."""
+        self._registrar(producto)
+        self._avisar("agregado", producto)
+
+    def eliminar(self, producto):
+        self._productos = [p for p in self._productos if p is not producto]
+        self._por_id.pop(producto["id"], None)
+        if self._por_nombre.get(_clave_nombre(producto["nombre"])) is producto:
+            del self._por_nombre[_clave_nombre(producto["nombre"])]
+        self._avisar("eliminado", producto)
+
+    def actualizar(self, producto, **cambios):
+        if self._por_nombre.get(_clave_nombre(producto["nombre"])) is producto:
+            del self._por_nombre[_clave_nombre(producto["nombre"])]
+        producto.update(cambios)
+        self._por_nombre[_clave_nombre(producto["nombre"])] = producto
+        self._avisar("actualizado", producto)
+
+    def ajustar_stock(self, producto, cambio):
+        producto["stock"] += cambio
+        self._avisar("stock", producto)
+
+
+class CargaEnSegundoPlano:
+    """Ejecuta `leer()` en un hilo aparte para no frenar el primer dibujo de la ventana.
+
+    Tkinter sólo se puede usar desde su propio hilo, así que el resultado no se entrega
+    solo: la interfaz pregunta con `terminada()` (p. ej. desde un after()) y, la primera vez
+    que la lectura ya acabó, se llama a `al_terminar(datos, error)` en ese mismo hilo.
+    """
+
+    def __init__(self, leer, al_terminar):
+        self._al_terminar = al_terminar
+        self._datos = None
+        self._error = None
+        self._entregada = False
+        self._hilo = threading.Thread(target=self._leer, args=(leer,), daemon=True)
+        self._hilo.start()
+
+    def _leer(self, leer):
+        try:
+            self._datos = leer()
+        except Exception as e:
+            self._error = e
+
+    def terminada(self):
+        if not self._entregada and not self._hilo.is_alive():
+            self._entregada = True
+            self._al_terminar(self._datos, self._error)
+        return self._entregada
+
+
+class Carrito(Observable):
+    """Una línea por producto: {"producto", "precio_unitario", "cantidad"}, indexada por id.
+
+    El precio se guarda al agregar el producto por primera vez, y el total se lleva al día en
+    cada cambio: comprar 500 bolsas sigue siendo una sola línea.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._lineas = {}   # id de producto -> línea, en el orden en que se agregaron
+        self._total = 0
+        self._unidades = 0
+
+    def __iter__(self):
+        return iter(self._lineas.values())
+
+    def __len__(self):
+        return self._unidades
+
+    def linea(self, id_producto):
+        return self._lineas.get(id_producto)
+
+    def cantidad(self, id_producto):
+        linea = self._lineas.get(id_producto)
+        return linea["cantidad"] if linea else 0
+
+    def agregar(self, producto, cantidad=1):
+        linea = self._lineas.get(producto["id"])
+        if linea is None:
+            linea = self._lineas[producto["id"]] = {"producto": producto, "precio_unitario": producto["precio"], "cantidad": 0}
+        linea["cantidad"] += cantidad
+        self._total += linea["precio_unitario"] * cantidad
+        self._unidades += cantidad
+        self._avisar("agregado", producto)
+
+    def quitar(self, id_producto, cantidad=1):
+        """Quita unidades de un producto y lo devuelve (None si no estaba en el carrito)."""
+        linea = self._lineas.get(id_producto)
+        if linea is None:
+            return None
+        cantidad = min(cantidad, linea["cantidad"])
+        linea["cantidad"] -= cantidad
+        self._total -= linea["precio_unitario"] * cantidad
+        self._unidades -= cantidad
+        if linea["cantidad"] == 0:
+            del self._lineas[id_producto]
+        self._avisar("quitado", linea["producto"])
+        return linea["producto"]
+
+    def vaciar(self):
+        self._lineas.clear()
+        self._total = 0
+        self._unidades = 0
+        self._avisar("vaciado", None)
+
+    def total(self):
+        return self._total
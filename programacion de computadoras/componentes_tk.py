@@ -0,0 +1,175 @@
+import tkinter as tk
+
+
+class _UnaVezPorVuelta:
+    """Llama a `funcion` cuando el bucle de eventos queda libre, aunque se pida muchas veces antes.
+
+    Al desplazar o cambiar el tamaño de una ventana llegan decenas de eventos seguidos;
+    acomodar todo con cada uno es trabajo tirado, basta con hacerlo una vez al final.
+    """
+
+    def __init__(self, widget, funcion):
+        self.widget = widget
+        self.funcion = funcion
+        self._pendiente = None
+
+    def pedir(self, event=None):
+        if self._pendiente is None:
+            self._pendiente = self.widget.after_idle(self._ejecutar)
+
+    def cancelar(self):
+        if self._pendiente is not None:
+            self.widget.after_cancel(self._pendiente)
+            self._pendiente = None
+
+    def _ejecutar(self):
+        self._pendiente = None
+        self.funcion()
+
+
+# --- Contenedor Desplazable ---
+# Un Frame dentro de un Canvas con barra de desplazamiento. La ventana del canvas que
+# muestra el Frame se crea una sola vez: cuando cambia el tamaño del canvas o del
+# contenido sólo se actualizan su ancho y la región desplazable (crearla en cada
+# <Configure> dejaba una ventana nueva en el canvas por cada cambio).
+
+
+class ContenedorDesplazable(tk.Frame):
+    """Frame con barra de desplazamiento vertical; los widgets se ponen dentro de `interior`."""
+
+    def __init__(self, master, bg="white", **opciones_canvas):
+        super().__init__(master, bg=bg)
+        self.canvas = tk.Canvas(self, bg=bg, highlightthickness=0, **opciones_canvas)
+        self.scrollbar = tk.Scrollbar(self, orient="vertical", command=self.canvas.yview)
+        self.canvas.configure(yscrollcommand=self.scrollbar.set)
+        self.scrollbar.pack(side="right", fill="y")
+        self.canvas.pack(side="left", fill="both", expand=True)
+
+        self.interior = tk.Frame(self.canvas, bg=bg)
+        self._ventana = self.canvas.create_window((0, 0), window=self.interior, anchor="nw")
+        self._acomodo = _UnaVezPorVuelta(self, self._acomodar)
+        self.interior.bind("<Configure>", self._acomodo.pedir)
+        self.canvas.bind("<Configure>", self._acomodo.pedir)
+
+    def limpiar(self):
+        """Destruye el contenido y vuelve arriba."""
+        for widget in self.interior.winfo_children():
+            widget.destroy()
+        self.canvas.yview_moveto(0)
+
+    def _acomodar(self):
+        # El interior siempre ocupa el ancho del canvas.
+        self.canvas.itemconfigure(self._ventana, width=self.canvas.winfo_width())
+        self.canvas.configure(scrollregion=(0, 0, self.canvas.winfo_width(), self.interior.winfo_reqheight()))
+
+    def destroy(self):
+        self._acomodo.cancelar()
+        super().destroy()
+
+
+# --- Lista Virtual ---
+# Con miles de productos no podemos crear un Frame, varias etiquetas y una imagen
+# por cada uno. La lista sólo crea widgets para las filas que se ven (más unas
+# pocas de reserva arriba y abajo) y, al desplazarse, reutiliza las filas que
+# salen de la vista para mostrar las que entran. Todas las filas miden lo mismo,
+# así que saber qué productos se ven es una simple división.
+
+
+class ListaVirtual(tk.Frame):
+    """Lista desplazable que sólo dibuja las filas visibles y las recicla.
+
+    `crear_fila(padre)` arma los widgets de una fila vacía y la devuelve;
+    `llenar_fila(fila, item)` la actualiza para mostrar `item`.
+    """
+
+    def __init__(self, master, items, crear_fila, llenar_fila, alto_fila=110, filas_extra=2, bg="white"):
+        super().__init__(master, bg=bg)
+        self.crear_fila = crear_fila
+        self.llenar_fila = llenar_fila
+        self.alto_fila = alto_fila
+        self.filas_extra = filas_extra
+        self.items = items
+        self._visibles = {}  # índice del item -> fila que lo muestra
+        self._libres = []    # filas creadas que ahora no muestran nada
+
+        self.canvas = tk.Canvas(self, bg=bg, highlightthickness=0)
+        self.scrollbar = tk.Scrollbar(self, orient="vertical", command=self.canvas.yview)
+        self.canvas.configure(yscrollcommand=self._al_desplazar)
+        self.scrollbar.pack(side="right", fill="y")
+        self.canvas.pack(side="left", fill="both", expand=True)
+        # Las filas se reacomodan una vez por vuelta del bucle de eventos, no con cada evento.
+        self._movimiento = _UnaVezPorVuelta(self, self._actualizar)
+        self._redimension = _UnaVezPorVuelta(self, self._reacomodar)
+        self.canvas.bind("<Configure>", self._redimension.pedir)
+        self._ajustar_region()
+
+    # --- Datos ---
+    def mostrar(self, items):
+        """Cambia la lista completa de items (p. ej. resultados de una búsqueda) y vuelve arriba."""
+        self.items = items
+        self.canvas.yview_moveto(0)
+        self.recargar()
+
+    def recargar(self):
+        """Vuelve a acomodar las filas tras agregar o quitar items, sin mover la vista."""
+        for fila in self._visibles.values():
+            self._ocultar(fila)
+        self._visibles.clear()
+        self._ajustar_region()
+        self._actualizar()
+
+    def refrescar(self, item=None):
+        """Vuelve a llenar la fila de `item` si está a la vista (o todas las visibles si no se indica)."""
+        for indice, fila in self._visibles.items():
+            if item is None or self.items[indice] is item:
+                self.llenar_fila(fila, self.items[indice])
+
+    # --- Filas ---
+    def _nueva_fila(self):
+        fila = self.crear_fila(self.canvas)
+        fila.ventana = self.canvas.create_window(0, 0, window=fila, anchor="nw",
+                                                 width=self.canvas.winfo_width() - 10, height=self.alto_fila - 10)
+        return fila
+
+    def _ocultar(self, fila):
+        self.canvas.itemconfigure(fila.ventana, state="hidden")
+        self._libres.append(fila)
+
+    def _actualizar(self):
+        alto_vista = self.canvas.winfo_height()
+        if alto_vista <= 1:
+            return  # todavía no se dibuja; <Configure> nos vuelve a llamar
+        arriba = self.canvas.canvasy(0)
+        primero = max(0, int(arriba // self.alto_fila) - self.filas_extra)
+        ultimo = min(len(self.items), int((arriba + alto_vista) // self.alto_fila) + 1 + self.filas_extra)
+
+        for indice in [i for i in self._visibles if not primero <= i < ultimo]:
+            self._ocultar(self._visibles.pop(indice))
+        for indice in range(primero, ultimo):
+            if indice in self._visibles:
+                continue
+            fila = self._libres.pop() if self._libres else self._nueva_fila()
+            self._visibles[indice] = fila
+            self.canvas.coords(fila.ventana, 5, indice * self.alto_fila + 5)
+            self.canvas.itemconfigure(fila.ventana, state="normal")
+            self.llenar_fila(fila, self.items[indice])
+
+    def _ajustar_region(self):
+        self.canvas.configure(scrollregion=(0, 0, self.canvas.winfo_width(), max(len(self.items) * self.alto_fila, 1)))
+
+    # --- Eventos ---
+    def _al_desplazar(self, primero, ultimo):
+        self.scrollbar.set(primero, ultimo)
+        self._movimiento.pedir()
+
+    def _reacomodar(self):
+        ancho = self.canvas.winfo_width()
+        for fila in list(self._visibles.values()) + self._libres:
+            self.canvas.itemconfigure(fila.ventana, width=ancho - 10)
+        self._ajustar_region()
+        self._actualizar()
+
+    def destroy(self):
+        self._movimiento.cancelar()
+        self._redimension.cancelar()
+        super().destroy()
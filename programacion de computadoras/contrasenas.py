@@ -0,0 +1,100 @@
+import hashlib
+import hmac
+import os
+from collections import OrderedDict
+
+# --- Hash de Contraseñas ---
+# Las contraseñas se guardan con sal y una función lenta (scrypt o PBKDF2):
+#   "scrypt$n$r$p$sal$hash"  o  "pbkdf2_sha256$iteraciones$sal$hash"   (sal y hash en hexadecimal)
+# Los hashes viejos (SHA-256 sin sal) y las contraseñas en texto plano se siguen
+# aceptando, y quien los usa recibe la indicación de actualizarlos al entrar.
+
+# Costo del hash. Súbelo o bájalo según lo que mida benchmarks/bench_login.py en tu equipo.
+COSTO_HASH = {"algoritmo": "scrypt", "n": 2 ** 14, "r": 8, "p": 1}
+# Si tu Python no trae scrypt (depende de OpenSSL) se usa PBKDF2 con este costo.
+COSTO_RESPALDO = {"algoritmo": "pbkdf2_sha256", "iteraciones": 600_000}
+
+# Verificaciones exitosas recientes, para que volver a entrar no pague el hash lento otra vez.
+TAMANO_CACHE_VERIFICACION = 64
+_clave_cache = os.urandom(32)
+_verificadas = OrderedDict()
+
+
+def _costo_actual(costo=None):
+    costo = costo or COSTO_HASH
+    if costo["algoritmo"] == "scrypt" and not hasattr(hashlib, "scrypt"):
+        return COSTO_RESPALDO
+    return costo
+
+
+def _derivar(password, sal, costo):
+    if costo["algoritmo"] == "scrypt":
+        n, r, p = costo["n"], costo["r"], costo["p"]
+        return hashlib.scrypt(password.encode("utf-8"), salt=sal, n=n, r=r, p=p,
+                              maxmem=256 * n * r + 1024 * 1024, dklen=32)
+    return hashlib.pbkdf2_hmac("sha256", password.encode("utf-8"), sal, costo["iteraciones"])
+
+
+def _leer_formato(guardado):
+    """Devuelve (costo, sal, hash) de un hash moderno, o None si es un formato viejo."""
+    partes = guardado.split("$")
+    if partes[0] == "scrypt" and len(partes) == 6:
+        costo = {"algoritmo": "scrypt", "n": int(partes[1]), "r": int(partes[2]), "p": int(partes[3])}
+    elif partes[0] == "pbkdf2_sha256" and len(partes) == 4:
+        costo = {"algoritmo": "pbkdf2_sha256", "iteraciones": int(partes[1])}
+    else:
+        return None
+    return costo, bytes.fromhex(partes[-2]), bytes.fromhex(partes[-1])
+
+
+def _es_sha256_viejo(guardado):
+    return len(guardado) == 64 and all(c in "0123456789abcdef" for c in guardado)
+
+
+def hash_password(password, costo=None):
+    """Calcula el hash con sal que se guarda en el usuario."""
+    costo = _costo_actual(costo)
+    sal = os.urandom(16)
+    clave = _derivar(password, sal, costo).hex()
+    if costo["algoritmo"] == "scrypt":
+        return f"scrypt${costo['n']}${costo['r']}${costo['p']}${sal.hex()}${clave}"
+    return f"pbkdf2_sha256${costo['iteraciones']}${sal.hex()}${clave}"
+
+
+def verificar_password(password, guardado, costo=None):
+    """Compara una contraseña con lo guardado calculando el hash una sola vez.
+
+    Devuelve (correcta, necesita_actualizar). `necesita_actualizar` es True cuando
+    lo guardado es texto plano, SHA-256 viejo o un hash con otro costo.
+    """
+    costo = _costo_actual(costo)
+    if not guardado:
+        # Usuario inexistente: igual hacemos el trabajo para no delatar qué usuarios existen.
+        _derivar(password, b"\0" * 16, costo)
+        return False, False
+
+    formato = _leer_formato(guardado)
+    if formato is None:
+        if _es_sha256_viejo(guardado):
+            correcta = hmac.compare_digest(hashlib.sha256(password.encode("utf-8")).hexdigest(), guardado)
+        else:
+            correcta = hmac.compare_digest(password.encode("utf-8"), guardado.encode("utf-8"))
+        return correcta, correcta
+
+    costo_guardado, sal, esperado = formato
+    huella = hmac.new(_clave_cache, password.encode("utf-8"), hashlib.sha256).digest()
+    clave_cache = (guardado, huella)
+    if clave_cache in _verificadas:
+        _verificadas.move_to_end(clave_cache)
+        correcta = True
+    else:
+        correcta = hmac.compare_digest(_derivar(password, sal, costo_guardado), esperado)
+        if correcta:
+            _verificadas[clave_cache] = True
+            if len(_verificadas) > TAMANO_CACHE_VERIFICACION:
+                _verificadas.popitem(last=False)
+    return correcta, correcta and costo_guardado != costo
+
+
+def limpiar_cache():
+    _verificadas.clear()
@@ -0,0 +1,181 @@
+import json
+import os
+
+import archivos
+
+# --- Diario de Compras (JSON Lines) ---
+# Cada venta se agrega como una línea al final de "historial_compras.jsonl" en
+# lugar de reescribir todo "historial_compras.json". Los lectores juntan el
+# archivo base con el diario y devuelven la misma lista de diccionarios.
+# Los productos usan el mismo mecanismo (ver "Registros por Clave" más abajo).
+
+# Si el diario pasa de este tamaño se compacta (se pasa al archivo base) al arrancar.
+LIMITE_COMPACTACION_BYTES = 8 * 1024 * 1024
+
+
+def ruta_diario(filepath):
+    """Devuelve la ruta del diario .jsonl que acompaña a un archivo JSON."""
+    base, _ = os.path.splitext(filepath)
+    return base + ".jsonl"
+
+
+def agregar_entrada(ruta, entrada):
+    """Anexa una entrada al diario y la fuerza a disco. Cuesta lo mismo sin importar el tamaño del historial."""
+    agregar_entradas(ruta, [entrada])
+
+
+def agregar_entradas(ruta, entradas):
+    """Anexa varias entradas de una vez, con un solo fsync para todas."""
+    lineas = b"".join((json.dumps(e, ensure_ascii=False) + "\n").encode("utf-8") for e in entradas)
+    with open(ruta, "a+b") as f:
+        # Si una escritura anterior quedó a medias, cerramos esa línea para no pegarle la nueva.
+        if f.tell() > 0:
+            f.seek(-1, os.SEEK_END)
+            if f.read(1) != b"\n":
+                lineas = b"\n" + lineas
+        f.write(lineas)
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def leer_entradas(ruta):
+    """Lee todas las entradas de un diario. Las líneas dañadas (p. ej. por un corte de luz) se ignoran."""
+    if not os.path.exists(ruta):
+        return []
+    entradas = []
+    with open(ruta, "r", encoding="utf-8") as f:
+        for numero, linea in enumerate(f, start=1):
+            linea = linea.strip()
+            if not linea:
+                continue
+            try:
+                entradas.append(json.loads(linea))
+            except json.JSONDecodeError:
+                print(f"Línea {numero} de '{ruta}' dañada, la ignoramos.")
+    return entradas
+
+
+def ultima_entrada(ruta, bloque=64 * 1024):
+    """La última entrada válida del diario, leyéndolo desde el final (None si está vacío o no existe)."""
+    if not os.path.exists(ruta):
+        return None
+    with open(ruta, "rb") as f:
+        fin = f.seek(0, os.SEEK_END)
+        cortada = b""  # comienzo de una línea que sigue antes del bloque ya leído
+        while fin > 0:
+            inicio = max(0, fin - bloque)
+            f.seek(inicio)
+            lineas = (f.read(fin - inicio) + cortada).split(b"\n")
+            fin = inicio
+            # La primera línea puede estar incompleta si todavía no llegamos al principio del archivo.
+            cortada = lineas.pop(0) if inicio > 0 else b""
+            for linea in reversed(lineas):
+                if not linea.strip():
+                    continue
+                try:
+                    return json.loads(linea)
+                except ValueError:
+                    continue  # línea dañada: se ignora, igual que en leer_entradas()
+    return None
+
+
+def _leer_base(filepath):
+    datos, _ = archivos.leer_json(filepath)
+    return datos
+
+
+def _escribir_base(filepath, datos, formato="legible"):
+    archivos.escribir_json(datos, filepath, formato)
+
+
+def _compactar(filepath, fusionar, formato="legible"):
+    """Pasa las entradas del diario al archivo base con `fusionar(base, entradas)` y deja el diario vacío."""
+    diario = ruta_diario(filepath)
+    en_proceso = diario + ".compactando"
+    if not os.path.exists(en_proceso):
+        if not os.path.exists(diario) or os.path.getsize(diario) == 0:
+            return
+        # Renombrar es atómico: los cambios nuevos empiezan un diario limpio mientras compactamos.
+        os.replace(diario, en_proceso)
+    _escribir_base(filepath, fusionar(_leer_base(filepath), leer_entradas(en_proceso)), formato)
+    os.remove(en_proceso)
+
+
+# --- Historial de Compras ---
+def registrar_compra(registro, filepath):
+    """Guarda una compra nueva anexándola al diario del historial."""
+    agregar_entrada(ruta_diario(filepath), registro)
+
+
+def _sumar_compras(historial, entradas):
+    """Agrega al historial las compras que todavía no tiene (por id_transaccion)."""
+    ids = {r.get("id_transaccion") for r in historial}
+    historial.extend(r for r in entradas if r.get("id_transaccion") not in ids)
+    return historial
+
+
+def cargar_historial(filepath):
+    """Devuelve el historial completo (archivo base + diario) como lista de diccionarios."""
+    historial = _leer_base(filepath)
+    en_proceso = ruta_diario(filepath) + ".compactando"
+    if os.path.exists(en_proceso):
+        # Una compactación se interrumpió: recuperamos lo que no alcanzó a llegar al archivo base.
+        _sumar_compras(historial, leer_entradas(en_proceso))
+    historial.extend(leer_entradas(ruta_diario(filepath)))
+    return historial
+
+
+def compactar_historial(filepath, formato="legible"):
+    """Pasa las compras del diario al archivo base (escrito en `formato`) y deja el diario vacío."""
+    _compactar(filepath, _sumar_compras, formato)
+
+
+# --- Registros por Clave (productos) ---
+# Cada línea del diario es el registro completo tal como quedó tras un cambio
+# (p. ej. un producto con su nuevo stock), o {"id": ..., "_eliminado": true}
+# si se borró. Al leer, la última línea de cada id es la que vale.
+
+def registrar_cambio(filepath, registro):
+    """Anexa al diario la versión nueva de un registro (o su eliminación)."""
+    agregar_entrada(ruta_diario(filepath), registro)
+
+
+def _aplicar_cambios(registros, cambios, clave="id"):
+    if not cambios:
+        return registros
+    por_clave = {r[clave]: r for r in registros}
+    for cambio in cambios:
+        if cambio.get("_eliminado"):
+            por_clave.pop(cambio[clave], None)
+        else:
+            por_clave[cambio[clave]] = cambio  # un id que ya estaba conserva su lugar
+    return list(por_clave.values())
+
+
+def cargar_registros(filepath, clave="id"):
+    """Devuelve los registros vigentes (archivo base + diario) en el orden en que se crearon."""
+    en_proceso = ruta_diario(filepath) + ".compactando"
+    cambios = leer_entradas(en_proceso) + leer_entradas(ruta_diario(filepath))
+    # Copias: el catálogo modifica sus productos (p. ej. el stock) y la base se comparte con la caché de lecturas.
+    return _aplicar_cambios([dict(r) for r in _leer_base(filepath)], cambios, clave)
+
+
+def compactar_registros(filepath, clave="id", formato="legible"):
+    """Pasa los cambios del diario al archivo base y deja el diario vacío."""
+    _compactar(filepath, lambda registros, cambios: _aplicar_cambios(registros, cambios, clave), formato)
+
+
+def reemplazar_registros(filepath, registros, formato="legible"):
+    """Escribe todos los registros de una vez (p. ej. al cargar los productos iniciales) y descarta el diario."""
+    _escribir_base(filepath, registros, formato)
+    for ruta in (ruta_diario(filepath), ruta_diario(filepath) + ".compactando"):
+        if os.path.exists(ruta):
+            os.remove(ruta)
+
+
+def compactar_si_necesario(filepath, limite=LIMITE_COMPACTACION_BYTES, compactar=compactar_historial, formato="legible"):
+    """Compacta sólo si el diario creció más del límite (o quedó una compactación pendiente)."""
+    diario = ruta_diario(filepath)
+    pendiente = os.path.exists(diario + ".compactando")
+    if pendiente or (os.path.exists(diario) and os.path.getsize(diario) > limite):
+        compactar(filepath, formato=formato)
@@ -0,0 +1,167 @@
+import atexit
+import threading
+import time
+
+import archivos
+import diario
+
+# --- Escritura Diferida ---
+# Guardar un perfil, registrar un usuario o vender reescribía archivos (con fsync)
+# en el hilo de la interfaz, y la ventana se congelaba mientras tanto. Ahora los
+# cambios se anotan en memoria y un hilo aparte los escribe cada INTERVALO_ESCRITURA_S
+# segundos. Si un archivo cambia varias veces en ese lapso, sólo se escribe la última
+# versión; las líneas para un diario .jsonl se escriben todas juntas con un solo fsync.
+#
+# DURABILIDADES dice cuánto se puede perder si se corta la luz:
+#   "por_venta": cada venta espera a que todo lo pendiente esté en disco antes de seguir.
+#   "agrupada":  nada espera; se pueden perder los cambios del último intervalo.
+
+INTERVALO_ESCRITURA_S = 1.0
+DURABILIDADES = ("por_venta", "agrupada")
+
+
+class EscritorDiferido:
+    """Escribe archivos JSON y diarios .jsonl en segundo plano, agrupando los cambios por archivo.
+
+    Lo que se le entrega ya debe ser una copia: no se serializa hasta que el hilo lo escribe.
+    Los errores del hilo se guardan y se reportan con `reportar_error` la próxima vez que
+    el hilo principal use el escritor, porque Tkinter no se puede usar desde otro hilo.
+    """
+
+    def __init__(self, intervalo=INTERVALO_ESCRITURA_S, reportar_error=None, formato="legible"):
+        self.intervalo = intervalo
+        self.reportar_error = reportar_error
+        self.formato = formato  # ver archivos.FORMATOS
+        self._cambios = threading.Condition()  # protege todo lo pendiente
+        self._escribiendo = threading.Lock()   # un solo escritor a la vez, para respetar el orden
+        self._reemplazos = {}  # ruta -> datos que la van a reemplazar (gana el último)
+        self._anexos = {}      # ruta del diario -> entradas por anexar, en orden
+        self._en_curso = set()
+        self._firmas = {}      # ruta -> firma que dejó nuestra última escritura
+        self._fallos = {}      # ruta -> último error al escribirla
+        self._hilo = None
+        self._cerrado = False
+        self.cambios = 0
+        self.escrituras = 0
+
+    # --- Anotar cambios ---
+    def reemplazar(self, ruta, datos):
+        """Programa guardar `datos` como el contenido completo de `ruta`."""
+        with self._cambios:
+            self._reemplazos[ruta] = datos
+            self._anotado()
+        self._despues_de_anotar()
+
+    def anexar(self, ruta, entrada):
+        """Programa anexar `entrada` como una línea nueva del diario `ruta`."""
+        with self._cambios:
+            self._anexos.setdefault(ruta, []).append(entrada)
+            self._anotado()
+        self._despues_de_anotar()
+
+    def _anotado(self):
+        self.cambios += 1
+        if self._hilo is None and not self._cerrado:
+            self._hilo = threading.Thread(target=self._trabajar, name="escritor-diferido", daemon=True)
+            self._hilo.start()
+            atexit.register(self._escribir_pendientes)  # por si se sale sin llamar a cerrar()
+        self._cambios.notify()
+
+    def _despues_de_anotar(self):
+        if self._cerrado:
+            self._escribir_pendientes()  # ya no hay hilo: se escribe en el momento
+        self._avisar_fallos()
+
+    # --- Consultas ---
+    def pendiente(self, ruta):
+        """True si `ruta` tiene cambios que todavía no llegan al disco."""
+        with self._cambios:
+            return ruta in self._reemplazos or ruta in self._anexos or ruta in self._en_curso
+
+    def cambio_desde_afuera(self, ruta, firma_conocida):
+        """True si el archivo cambió en disco por algo que no fuimos nosotros (p. ej. otro programa)."""
+        if self.pendiente(ruta):
+            return False  # lo que hay en memoria es más nuevo que el disco
+        firma = archivos.firma_archivo(ruta)
+        with self._cambios:
+            return firma != firma_conocida and firma != self._firmas.get(ruta)
+
+    # --- Escribir ---
+    def vaciar(self, ruta=None):
+        """Escribe ya lo pendiente (de `ruta`, o de todos los archivos) y espera a que esté en disco."""
+        self._escribir_pendientes(ruta)
+        self._avisar_fallos()
+
+    def cerrar(self):
+        """Detiene el hilo y escribe lo que falte. Después, cada cambio se escribe en el momento."""
+        with self._cambios:
+            self._cerrado = True
+            self._cambios.notify()
+        if self._hilo is not None:
+            self._hilo.join()
+        self.vaciar()
+
+    def _trabajar(self):
+        while True:
+            with self._cambios:
+                while not (self._reemplazos or self._anexos or self._cerrado):
+                    self._cambios.wait()
+                # Esperamos el intervalo completo para juntar los cambios que sigan llegando.
+                limite = time.monotonic() + self.intervalo
+                while not self._cerrado and (restante := limite - time.monotonic()) > 0:
+                    self._cambios.wait(restante)
+                if self._cerrado:
+                    return  # cerrar() escribe lo que quede
+            self._escribir_pendientes()
+
+    def _tomar(self, ruta):
+        with self._cambios:
+            if ruta is None:
+                reemplazos, self._reemplazos = self._reemplazos, {}
+                anexos, self._anexos = self._anexos, {}
+            else:
+                reemplazos = {ruta: self._reemplazos.pop(ruta)} if ruta in self._reemplazos else {}
+                anexos = {ruta: self._anexos.pop(ruta)} if ruta in self._anexos else {}
+            self._en_curso.update(reemplazos)
+            self._en_curso.update(anexos)
+        return reemplazos, anexos
+
+    def _escribir_pendientes(self, ruta=None):
+        with self._escribiendo:
+            reemplazos, anexos = self._tomar(ruta)
+            for ruta_diario, entradas in anexos.items():
+                self._escribir(ruta_diario, entradas, anexar=True)
+            for ruta_datos, datos in reemplazos.items():
+                self._escribir(ruta_datos, datos, anexar=False)
+
+    def _escribir(self, ruta, datos, anexar):
+        try:
+            if anexar:
+                diario.agregar_entradas(ruta, datos)
+            else:
+                archivos.escribir_json(datos, ruta, self.formato)
+        except (OSError, TypeError, ValueError) as e:
+            with self._cambios:
+                self._fallos[ruta] = e
+                self._en_curso.discard(ruta)
+                if isinstance(e, OSError):
+                    # Disco lleno, sin permisos...: se reintenta en la próxima vuelta sin pisar algo más nuevo.
+                    if anexar:
+                        self._anexos[ruta] = datos + self._anexos.get(ruta, [])
+                    else:
+                        self._reemplazos.setdefault(ruta, datos)
+            return
+        firma = archivos.firma_archivo(ruta)
+        with self._cambios:
+            self._firmas[ruta] = firma
+            self._fallos.pop(ruta, None)
+            self._en_curso.discard(ruta)
+            self.escrituras += 1
+
+    def _avisar_fallos(self):
+        if self.reportar_error is None or threading.current_thread() is not threading.main_thread():
+            return
+        with self._cambios:
+            fallos, self._fallos = self._fallos, {}
+        for ruta, e in fallos.items():
+            self.reportar_error("Problemas al guardar", f"No pudimos guardar tus cambios en '{ruta}'. Revisa si hay algún problema de permisos: {e}")
@@ -0,0 +1,137 @@
+import queue
+import threading
+from itertools import chain
+
+import numpy as np
+import pandas as pd
+
+import agregados_ventas
+
+# --- Estadísticas de Ventas ---
+# Con un año de ventas, leer el historial, armar el DataFrame y convertir fechas
+# y montos tarda lo suficiente para congelar la tienda. Los cálculos viven aquí,
+# sin nada de Tkinter, y CalculoEnSegundoPlano los hace en un hilo aparte: la
+# ventana de estadísticas aparece enseguida y se va llenando con cada parte lista.
+#
+# Las partes que muestra la ventana salen de los agregados de ventas (ver
+# agregados_ventas), que ya vienen agrupados por día, producto, método de pago...:
+# cuestan lo mismo con cien ventas que con un millón. preparar_compras() y
+# desglosar_lineas() arman la tabla de líneas de venta del historial completo
+# (lineas_venta.csv de "reportes.py --detalle").
+
+
+def preparar_compras(historial):
+    """DataFrame de compras con montos y fechas ya convertidos; descarta las filas que no se pueden leer."""
+    df_compras = pd.DataFrame(historial)
+    df_compras['total_pagado'] = pd.to_numeric(df_compras['total_pagado'], errors='coerce')
+    df_compras['fecha'] = pd.to_datetime(df_compras['fecha'], errors='coerce')
+    df_compras.dropna(subset=['total_pagado', 'fecha'], inplace=True)
+    return df_compras
+
+
+# Columnas de la compra que se repiten en cada una de sus líneas al desglosarla.
+COLUMNAS_COMPRA = ('fecha', 'usuario', 'metodo_pago', 'id_transaccion')
+COLUMNAS_LINEA = ('nombre_producto', 'precio_unitario', 'cantidad', 'subtotal')
+
+
+def desglosar_lineas(df_compras):
+    """Una fila por producto vendido: las COLUMNAS_COMPRA de su compra más las COLUMNAS_LINEA.
+
+    En vez de recorrer las compras con iterrows() (que arma una Serie por fila), se juntan
+    todas las líneas en una sola lista y cada columna de la compra se repite con np.repeat
+    tantas veces como líneas tenga.
+    """
+    columnas_compra = [c for c in COLUMNAS_COMPRA if c in df_compras.columns]
+    if 'productos' not in df_compras.columns:
+        return pd.DataFrame(columns=columnas_compra + list(COLUMNAS_LINEA))
+    listas = [productos if isinstance(productos, list) else [] for productos in df_compras['productos']]
+    cantidades = np.fromiter(map(len, listas), dtype=np.intp, count=len(listas))
+    lineas = pd.DataFrame.from_records(list(chain.from_iterable(listas)),
+                                       columns=['nombre', 'precio_unitario', 'cantidad'])
+
+    detalle = df_compras[columnas_compra].iloc[np.repeat(np.arange(len(df_compras)), cantidades)].reset_index(drop=True)
+    detalle['nombre_producto'] = lineas['nombre']
+    detalle['precio_unitario'] = pd.to_numeric(lineas['precio_unitario'], errors='coerce')
+    detalle['cantidad'] = pd.to_numeric(lineas['cantidad'], errors='coerce')
+    detalle['subtotal'] = detalle['precio_unitario'] * detalle['cantidad']
+    return detalle
+
+
+def serie(agregados, dimension, medida):
+    """Serie de `medida` ("ventas", "cantidad" o "total") por clave de `dimension`, ordenada por clave."""
+    grupo = agregados.get(dimension, {})
+    claves = sorted(grupo)
+    return pd.Series([grupo[clave][medida] for clave in claves], index=claves, dtype="float64")
+
+
+def resumen(agregados):
+    metodos = agregados["metodo_pago"]
+    return {
+        "ganancias": sum(valores["total"] for valores in agregados["dia"].values()),
+        "ventas": agregados_ventas.total_ventas(agregados),
+        # Como mode(): el más usado y, si empatan, el primero en orden alfabético.
+        "metodo_preferido": min(metodos, key=lambda m: (-metodos[m]["ventas"], m)) if metodos else "Ninguno",
+    }
+
+
+def metodos_de_pago(agregados):
+    return serie(agregados, "metodo_pago", "ventas").astype("int64").sort_values(ascending=False, kind="stable")
+
+
+def productos_mas_vendidos(agregados, cuantos=5):
+    """Cantidad vendida de los `cuantos` productos más vendidos (Serie vacía si no hay)."""
+    return serie(agregados, "producto", "cantidad").sort_values(ascending=False, kind="stable").head(cuantos)
+
+
+def ventas_por_dia(agregados):
+    ventas_diarias = serie(agregados, "dia", "total")
+    ventas_diarias.index = pd.to_datetime(ventas_diarias.index)
+    return ventas_diarias
+
+
+# Partes que se calculan, en el orden en que llegan a la ventana.
+PARTES = (
+    ("resumen", resumen),
+    ("metodos_pago", metodos_de_pago),
+    ("top_productos", productos_mas_vendidos),
+    ("ventas_diarias", ventas_por_dia),
+)
+
+
+class CalculoEnSegundoPlano:
+    """Lee los agregados de ventas con `leer_agregados()` y calcula las PARTES en un hilo aparte.
+
+    Cada resultado se pone en una cola como (parte, datos, progreso), con progreso entre 0 y 1.
+    Además de las PARTES llegan "compras" (cuántas compras válidas hay), "error" (la excepción)
+    y al final "fin". Tkinter sólo se puede usar desde su hilo: la ventana llama a `recibir()`
+    con after(). La primera vez los agregados pueden tener que rehacerse desde el historial.
+    """
+
+    def __init__(self, leer_agregados):
+        self._cola = queue.Queue()
+        self._hilo = threading.Thread(target=self._calcular, args=(leer_agregados,), daemon=True)
+        self._hilo.start()
+
+    def _avisar(self, parte, datos, progreso):
+        self._cola.put((parte, datos, progreso))
+
+    def _calcular(self, leer_agregados):
+        try:
+            agregados = leer_agregados()
+            compras = agregados_ventas.total_ventas(agregados)
+            self._avisar("compras", compras, 0.2)
+            if compras:
+                for numero, (parte, calcular) in enumerate(PARTES, start=1):
+                    self._avisar(parte, calcular(agregados), 0.2 + 0.8 * numero / len(PARTES))
+        except Exception as e:
+            self._avisar("error", e, 1.0)
+        self._avisar("fin", None, 1.0)
+
+    def recibir(self):
+        """Lo que ya está listo, sin esperar: lista de (parte, datos, progreso)."""
+        recibido = []
+        while True:
+            try:
+                recibido.append(self._cola.get_nowait())
+            except queue.Empty:
+                return recibido
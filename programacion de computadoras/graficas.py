@@ -0,0 +1,152 @@
+from collections import OrderedDict
+
+import matplotlib.style
+import seaborn as sns
+from matplotlib.figure import Figure
+
+# --- Gráficas de Estadísticas ---
+# Las figuras se crean con matplotlib.figure.Figure y no con pyplot: pyplot guarda
+# cada figura en un registro global hasta que alguien llama a plt.close(), así que
+# cambiar de gráfico dejaba figuras vivas para siempre. Una Figure suelta se libera
+# sola cuando nadie la usa, y CacheGraficas la limpia de forma explícita al descartarla.
+#
+# CacheGraficas guarda además las gráficas ya dibujadas, con su widget de Tk, bajo la
+# clave (tipo, ejes, versión de los datos). Volver a un gráfico ya visto sólo lo vuelve
+# a mostrar: no se recalcula ni se redibuja.
+
+
+# --- Figuras ---
+def _rotar_etiquetas_x(ax, grados=45):
+    ax.tick_params(axis='x', labelrotation=grados)
+    for etiqueta in ax.get_xticklabels():
+        etiqueta.set_horizontalalignment('right' if grados else 'center')
+
+
+def figura_metodos_pago(metodos_pago_counts):
+    fig = Figure(figsize=(12, 5), dpi=100)
+    axes = fig.subplots(1, 2)  # Dos subplots en una figura
+
+    # Gráfico de Barras
+    sns.barplot(x=metodos_pago_counts.index, y=metodos_pago_counts.values, ax=axes[0], palette="viridis")
+    axes[0].set_title('Métodos de Pago Más Usados')
+    axes[0].set_ylabel('Número de Transacciones')
+    axes[0].set_xlabel('Método de Pago')
+    axes[0].tick_params(axis='x', rotation=45)
+
+    # Gráfico de Torta
+    axes[1].pie(metodos_pago_counts, labels=metodos_pago_counts.index, autopct='%1.1f%%', startangle=90, colors=sns.color_palette("viridis", len(metodos_pago_counts)))
+    axes[1].axis('equal')  # Para que la torta sea un círculo
+    axes[1].set_title('Distribución de Métodos de Pago')
+
+    fig.tight_layout()  # Ajusta el layout para evitar superposiciones
+    return fig
+
+
+def figura_top_productos(top_productos):
+    fig = Figure(figsize=(8, 6), dpi=100)
+    ax = fig.add_subplot(111)
+    sns.barplot(x=top_productos.values, y=top_productos.index, ax=ax, palette="magma")
+    ax.set_title('Top 5 Productos Más Vendidos')
+    ax.set_xlabel('Cantidad Total Vendida')
+    ax.set_ylabel('Producto')
+    fig.tight_layout()
+    return fig
+
+
+def figura_ventas_diarias(ventas_diarias):
+    fig = Figure(figsize=(10, 6), dpi=100)
+    ax = fig.add_subplot(111)
+    sns.lineplot(x=ventas_diarias.index, y=ventas_diarias.values, ax=ax, marker='o', color='purple')
+    ax.set_title('Ventas Totales por Día')
+    ax.set_ylabel('Ganancias ($)')
+    ax.set_xlabel('Fecha de Venta')
+    ax.tick_params(axis='x', rotation=45)
+    ax.grid(True)  # Añadir una cuadrícula para mejor lectura
+    fig.tight_layout()
+    return fig
+
+
+def figura_personalizada(tipo_grafica, x_labels, y_data, nombre_x, nombre_y, rotar_x=False):
+    """Gráfica de "Barras", "Líneas" o "Pastel" de `y_data` por `x_labels` (la que arma el usuario)."""
+    with matplotlib.style.context('ggplot'):
+        fig = Figure(figsize=(7, 5))
+        ax = fig.add_subplot(111)
+        if tipo_grafica == "Pastel":
+            ax.pie(y_data, labels=x_labels, autopct='%1.1f%%', startangle=90, colors=sns.color_palette("pastel", len(x_labels)))
+            ax.axis('equal')
+            ax.set_title(f'Distribución de {nombre_y} por {nombre_x}')
+        else:
+            if tipo_grafica == "Barras":
+                ax.bar(x_labels, y_data, color=sns.color_palette("viridis", len(x_labels)))
+            elif tipo_grafica == "Líneas":
+                ax.plot(x_labels, y_data, marker='o', color='purple')
+                ax.grid(True)
+            else:
+                raise ValueError(f"Tipo de gráfica desconocido: {tipo_grafica}")
+            ax.set_ylabel(nombre_y)
+            _rotar_etiquetas_x(ax, 45 if rotar_x else 0)
+            ax.set_title(f'{tipo_grafica} de {nombre_y} por {nombre_x}')
+            ax.set_xlabel(nombre_x)
+        fig.tight_layout()
+    return fig
+
+
+# --- Caché de Gráficas ---
+class CacheGraficas:
+    """Gráficas ya dibujadas dentro de `contenedor`, una a la vista; guarda hasta `maximo`.
+
+    `mostrar(tipo, ejes, version, dibujar)` muestra la gráfica de esa clave y sólo llama a
+    `dibujar()` (que devuelve una Figure) si no estaba guardada. Cuando llega otra `version`
+    de los datos, las gráficas anteriores se descartan. Las opciones de pack() se dan al crearla.
+    """
+
+    def __init__(self, contenedor, maximo=8, **opciones_pack):
+        self.contenedor = contenedor
+        self.maximo = maximo
+        self.opciones_pack = opciones_pack
+        self._graficas = OrderedDict()  # (tipo, ejes, version) -> FigureCanvasTkAgg, la más usada al final
+        self._version = None
+        self._visible = None
+        self.aciertos = 0
+        self.fallos = 0
+        contenedor.bind("<Destroy>", lambda event: self.limpiar() if event.widget is contenedor else None, add="+")
+
+    def mostrar(self, tipo, ejes, version, dibujar):
+        if version != self._version:
+            self.limpiar()
+            self._version = version
+        clave = (tipo, ejes, version)
+        self.ocultar()
+        canvas = self._graficas.get(clave)
+        if canvas is None:
+            # Sólo aquí hace falta Tk: las figuras también se dibujan sin pantalla (ver reportes.py).
+            from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+            self.fallos += 1
+            canvas = FigureCanvasTkAgg(dibujar(), master=self.contenedor)
+            canvas.draw()
+            self._graficas[clave] = canvas
+            while len(self._graficas) > self.maximo:
+                self._liberar(self._graficas.popitem(last=False)[1])
+        else:
+            self.aciertos += 1
+            self._graficas.move_to_end(clave)
+        canvas.get_tk_widget().pack(**self.opciones_pack)
+        self._visible = canvas
+
+    def ocultar(self):
+        if self._visible is not None:
+            self._visible.get_tk_widget().pack_forget()
+            self._visible = None
+
+    def limpiar(self):
+        """Descarta todas las gráficas guardadas y libera sus figuras."""
+        self._visible = None
+        while self._graficas:
+            self._liberar(self._graficas.popitem()[1])
+
+    @staticmethod
+    def _liberar(canvas):
+        widget = canvas.get_tk_widget()
+        if widget.winfo_exists():
+            widget.destroy()
+        canvas.figure.clear()
@@ -0,0 +1,121 @@
+import os
+from collections import OrderedDict
+
+from PIL import Image, ImageTk
+
+# --- Caché de Miniaturas ---
+# Las tarjetas de productos se dibujan una y otra vez (inicio, búsqueda, vista
+# previa). Guardamos cada imagen ya redimensionada y su PhotoImage para que volver
+# a dibujar el catálogo no lea ni redimensione nada. La clave incluye la fecha de
+# modificación y el tamaño del archivo, así que si la imagen cambia en disco se
+# vuelve a cargar sola.
+
+TAMANO_CACHE_MINIATURAS = 512
+
+# --- Miniaturas en Disco ---
+# Al subir la imagen de un producto se guardan junto al original copias ya
+# reducidas (catálogo y vista previa), p. ej. "perro__80x80.png". Así el catálogo
+# nunca tiene que decodificar la foto original, que puede pesar varios megapíxeles.
+TAMANOS_DERIVADAS = ((80, 80), (100, 100))
+
+
+def ruta_derivada(filepath, size):
+    base, _ = os.path.splitext(filepath)
+    return f"{base}__{size[0]}x{size[1]}.png"
+
+
+def generar_derivadas(filepath, tamanos=TAMANOS_DERIVADAS):
+    """Crea las miniaturas en disco de una imagen de producto."""
+    with Image.open(filepath) as image:
+        # En JPEG esto decodifica directo a una escala menor: mucho más rápido con fotos grandes.
+        image.draft("RGB", max(tamanos))
+        for size in tamanos:
+            destino = ruta_derivada(filepath, size)
+            temporal = destino + ".tmp"
+            image.resize(size, Image.LANCZOS, reducing_gap=3.0).save(temporal, format="PNG")
+            os.replace(temporal, destino)
+
+
+def eliminar_derivadas(filepath, tamanos=TAMANOS_DERIVADAS):
+    for size in tamanos:
+        derivada = ruta_derivada(filepath, size)
+        if os.path.exists(derivada):
+            os.remove(derivada)
+
+
+def preparar_imagen_producto(filepath):
+    """Genera las miniaturas de una imagen recién copiada; si no se puede procesar (no es una
+    imagen, está truncada...) borra la copia y lo que se alcanzó a generar, y relanza el error."""
+    try:
+        generar_derivadas(filepath)
+    except Exception:
+        eliminar_derivadas(filepath)
+        if os.path.exists(filepath):
+            os.remove(filepath)
+        raise
+
+
+def _origen(filepath, size, crear_derivada):
+    """Archivo del que conviene leer: la miniatura en disco si está al día, si no el original."""
+    if tuple(size) not in TAMANOS_DERIVADAS:
+        return filepath
+    derivada = ruta_derivada(filepath, size)
+    if os.path.exists(derivada) and os.path.getmtime(derivada) >= os.path.getmtime(filepath):
+        return derivada
+    if crear_derivada:
+        generar_derivadas(filepath)
+        return derivada
+    return filepath
+
+
+class CacheMiniaturas:
+    """LRU de miniaturas: (ruta, mtime, bytes, tamaño) -> imagen PIL redimensionada y su PhotoImage."""
+
+    def __init__(self, capacidad=TAMANO_CACHE_MINIATURAS):
+        self.capacidad = capacidad
+        self._entradas = OrderedDict()
+        self.aciertos = 0
+        self.fallos = 0
+
+    def obtener(self, filepath, size, crear_derivada=False):
+        origen = _origen(filepath, size, crear_derivada)
+        st = os.stat(origen)
+        clave = (origen, st.st_mtime_ns, st.st_size, tuple(size))
+        entrada = self._entradas.get(clave)
+        if entrada is not None:
+            self._entradas.move_to_end(clave)
+            self.aciertos += 1
+        else:
+            self.fallos += 1
+            with Image.open(origen) as image:
+                if image.size == tuple(size):
+                    image.load()
+                    entrada = {"imagen": image.copy(), "foto": None}
+                else:
+                    entrada = {"imagen": image.resize(size, Image.LANCZOS), "foto": None}
+            self._entradas[clave] = entrada
+            if len(self._entradas) > self.capacidad:
+                self._entradas.popitem(last=False)
+        if entrada["foto"] is None:
+            entrada["foto"] = ImageTk.PhotoImage(entrada["imagen"])
+        return entrada["foto"]
+
+    def descartar_fotos(self):
+        """Olvida los PhotoImage (pertenecen a una ventana Tk que se va a cerrar); las imágenes PIL se conservan."""
+        for entrada in self._entradas.values():
+            entrada["foto"] = None
+
+    def limpiar(self):
+        self._entradas.clear()
+
+
+CACHE_MINIATURAS = CacheMiniaturas()
+
+
+def cargar_miniatura(filepath, size, crear_derivada=False):
+    """PhotoImage de la imagen en `filepath` redimensionada a `size`, usando la caché compartida.
+
+    Con `crear_derivada=True` (imágenes de productos) se crea la miniatura en disco si falta,
+    para que el próximo arranque ya no tenga que abrir el original.
+    """
+    return CACHE_MINIATURAS.obtener(filepath, size, crear_derivada)
@@ -0,0 +1,158 @@
+import bisect
+import re
+import unicodedata
+from collections import OrderedDict
+
+# --- Índice de Búsqueda ---
+# En vez de recorrer todos los productos en cada búsqueda, guardamos para cada
+# palabra (sin tildes y en minúsculas) qué productos la contienen. Las palabras
+# también se guardan ordenadas, así que todas las que empiezan por "peq" quedan
+# juntas y se encuentran con una búsqueda binaria: "peq" encuentra "pequeño".
+# Si la consulta tiene varias palabras, el producto debe tenerlas todas.
+#
+# Mientras se escribe se repiten muchas consultas ("pe", "peq", borrar, "pe"...),
+# así que las últimas respuestas se guardan y se olvidan al cambiar el catálogo.
+
+TAMANO_CACHE_CONSULTAS = 128
+
+
+def normalizar(texto):
+    """Minúsculas y sin tildes: "Pequeño" -> "pequeno"."""
+    texto = texto.casefold()
+    if texto.isascii():
+        return texto
+    texto = unicodedata.normalize("NFKD", texto)
+    return "".join(c for c in texto if not unicodedata.combining(c))
+
+
+def tokenizar(texto):
+    return re.findall(r"\w+", normalizar(texto))
+
+
+class IndiceBusqueda:
+    """Índice invertido de productos por las palabras de `campos`, identificados por su "id".
+
+    Se puede suscribir al catálogo (`catalogo.suscribir(indice.al_cambiar_catalogo)`)
+    para que se mantenga al día solo cuando se agregan, editan o eliminan productos.
+    """
+
+    def __init__(self, productos=(), campos=("nombre", "descripcion")):
+        self.campos = campos
+        self._fuente = productos
+        self.aciertos = 0
+        self.fallos = 0
+        self._reconstruir()
+
+    # --- Mantenimiento ---
+    def _reconstruir(self):
+        """Indexa de nuevo todos los productos de la fuente (p. ej. cuando el catálogo se recarga)."""
+        # La clave de cada producto es su posición de llegada: ordenar claves da el orden del catálogo.
+        self._claves = {}       # producto["id"] -> clave
+        self._productos = {}    # clave -> producto
+        self._palabras_de = {}  # clave -> palabras con que se indexó
+        self._indice = {}       # palabra -> {claves}
+        self._siguiente = 0
+        self._cache = OrderedDict()  # palabras de la consulta -> claves resultado
+        self._vocabulario = []
+        for producto in self._fuente:
+            self._indexar(producto)
+        self._vocabulario = sorted(self._indice)
+
+    def _indexar(self, producto):
+        clave = self._claves.get(producto["id"])
+        if clave is None:
+            clave = self._claves[producto["id"]] = self._siguiente
+            self._siguiente += 1
+        else:
+            self._desindexar(clave)  # el mismo id con otros datos: se reemplaza
+        palabras = set()
+        for campo in self.campos:
+            palabras.update(tokenizar(str(producto.get(campo, ""))))
+        self._productos[clave] = producto
+        self._palabras_de[clave] = palabras
+        nuevas = []
+        for palabra in palabras:
+            if palabra not in self._indice:
+                self._indice[palabra] = set()
+                nuevas.append(palabra)
+            self._indice[palabra].add(clave)
+        return nuevas
+
+    def _desindexar(self, clave):
+        for palabra in self._palabras_de.pop(clave, ()):
+            claves = self._indice[palabra]
+            claves.discard(clave)
+            if not claves:
+                del self._indice[palabra]
+                i = bisect.bisect_left(self._vocabulario, palabra)
+                if i < len(self._vocabulario) and self._vocabulario[i] == palabra:  # al reconstruir aún no está
+                    del self._vocabulario[i]
+
+    def agregar(self, producto):
+        self._cache.clear()
+        for palabra in self._indexar(producto):
+            bisect.insort(self._vocabulario, palabra)
+
+    def quitar(self, producto):
+        self._cache.clear()
+        clave = self._claves.pop(producto["id"], None)
+        if clave is not None:
+            self._desindexar(clave)
+            del self._productos[clave]
+
+    def actualizar(self, producto):
+        """Vuelve a indexar un producto editado; conserva su lugar en los resultados."""
+        self.agregar(producto)
+
+    def al_cambiar_catalogo(self, evento, producto):
+        if evento == "agregado":
+            self.agregar(producto)
+        elif evento == "eliminado":
+            self.quitar(producto)
+        elif evento == "actualizado":
+            self.actualizar(producto)
+        elif evento == "recargado":
+            self._reconstruir()
+        # "stock" no cambia ningún texto indexado
+
+    # --- Consultas ---
+    def _con_prefijo(self, prefijo):
+        """Claves de los productos que tienen alguna palabra que empieza por `prefijo`."""
+        inicio = bisect.bisect_left(self._vocabulario, prefijo)
+        fin = bisect.bisect_left(self._vocabulario, prefijo + "\U0010ffff", inicio)
+        if fin - inicio == 1:
+            return self._indice[self._vocabulario[inicio]]
+        claves = set()
+        for palabra in self._vocabulario[inicio:fin]:
+            claves |= self._indice[palabra]
+        return claves
+
+    def _buscar_claves(self, palabras):
+        if not palabras:
+            return list(self._productos)  # las claves crecen al agregar: ya están en orden
+        conjuntos = sorted((self._con_prefijo(p) for p in palabras), key=len)
+        claves = set(conjuntos[0])
+        for conjunto in conjuntos[1:]:
+            if not claves:
+                break
+            claves &= conjunto
+        return sorted(claves)
+
+    def buscar(self, consulta):
+        """Productos que contienen todas las palabras de la consulta (como palabra o inicio de palabra).
+
+        Una consulta en blanco devuelve todo el catálogo; una con sólo signos ("-", "¿?"), nada.
+        """
+        palabras = tuple(sorted(set(tokenizar(consulta))))
+        if not palabras and consulta.strip():
+            return []
+        claves = self._cache.get(palabras)
+        if claves is not None:
+            self._cache.move_to_end(palabras)
+            self.aciertos += 1
+        else:
+            self.fallos += 1
+            claves = self._cache[palabras] = self._buscar_claves(palabras)
+            if len(self._cache) > TAMANO_CACHE_CONSULTAS:
+                self._cache.popitem(last=False)
+        return [self._productos[c] for c in claves]
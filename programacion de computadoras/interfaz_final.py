@@ -1,20 +1,39 @@
 import tkinter as tk
-from tkinter import messagebox, filedialog, simpledialog
+from tkinter import messagebox, filedialog, simpledialog, ttk
 from PIL import Image, ImageTk
 import os
-import json
 import datetime
-from collections import defaultdict
-import pandas as pd
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 import shutil
-import hashlib
-import seaborn as sns # Importar seaborn para estilos de gráficos más bonitos
+import almacenamiento
+import imagenes
+import precarga
+from componentes_tk import ContenedorDesplazable, ListaVirtual
+from catalogo import Catalogo, Carrito, CargaEnSegundoPlano
+from indice_busqueda import IndiceBusqueda
+from contrasenas import hash_password, verificar_password
 
 # --- Rutas de Archivos y Directorios ---
 ARCHIVO_DATOS = "data.json"
 HISTORIAL_COMPRAS_FILE = "historial_compras.json"
+# Productos y stock de la tienda; se guardan al cambiar, así que sobreviven a un reinicio.
+ARCHIVO_PRODUCTOS = "productos_tienda.json"
+# "diario": cada venta y cada cambio de un producto se anexa a su .jsonl. "json": se reescribe todo el archivo como antes.
+MODO_HISTORIAL = "diario"
+# "json" usa los archivos de siempre; "sqlite" usa ARCHIVO_BD. Para pasar los datos existentes a SQLite:
+#   python almacenamiento.py --bd tienda.db --usuarios data.json --compras historial_compras.json --productos productos_tienda.json
+MOTOR_ALMACEN = "json"
+ARCHIVO_BD = "tienda.db"
+# "por_venta": cada venta espera a estar en disco. "agrupada": los cambios se escriben juntos cada segundo
+# (la ventana nunca espera al disco, pero un corte de luz puede perder el último segundo).
+DURABILIDAD = "por_venta"
+# Cómo se escriben los archivos: "legible" (JSON con sangría, como siempre), "compacto" (JSON sin
+# espacios) o "tabla" (además guarda las claves una sola vez). Se puede cambiar cuando sea: al leer se reconoce solo.
+FORMATO_DATOS = "legible"
+# Milisegundos sin teclear antes de buscar; así no se busca en cada tecla mientras se escribe rápido.
+RETARDO_BUSQUEDA_MS = 150
+# pandas, matplotlib y seaborn se cargan al abrir las estadísticas. Con True se empiezan a cargar
+# en segundo plano apenas se abre la tienda, para que la primera vez las estadísticas no esperen.
+PRECARGAR_ANALISIS = True
 
 usuario_actual = None
 
@@ -22,7 +41,7 @@ BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 
 IMG_PRODUCTOS_DIR = os.path.join(BASE_DIR, "imagenes_productos")
 IMG_INTERFAZ_DIR = os.path.join(BASE_DIR, "imagenes_interfaz")
-REPORTES_DIR = os.path.join(BASE_DIR, "reportes_exportados") # Aunque no exportaremos individualmente, lo mantenemos por si acaso.
+REPORTES_DIR = os.path.join(BASE_DIR, "reportes_exportados") # Aquí deja reportes.py los CSV y gráficos de ventas.
 
 
 if not os.path.exists(IMG_PRODUCTOS_DIR):
@@ -34,63 +53,90 @@ if not os.path.exists(REPORTES_DIR):
 
 # --- Funciones JSON ---
 def cargar_json(filepath):
-    if not os.path.exists(filepath):
-        return []
-    try:
-        with open(filepath, "r", encoding="utf-8") as f:
-            data = json.load(f)
-            return data if data is not None else []
-    except json.JSONDecodeError:
-        messagebox.showerror("¡Ups, un archivo dañado!", f"Parece que el archivo '{filepath}' está un poco revuelto o vacío. ¡No te preocupes, lo reiniciaremos para ti!")
-        return []
-    except Exception as e:
-        messagebox.showerror("Error al cargar", f"No pudimos leer '{filepath}'. Algo inesperado pasó: {e}")
-        return []
+    return almacenamiento.cargar_json(filepath, reportar_error=messagebox.showerror)
 
 def guardar_json(datos, filepath):
-    try:
-        with open(filepath, "w", encoding="utf-8") as f:
-            json.dump(datos, f, indent=4)
-    except IOError as e:
-        messagebox.showerror("Problemas al guardar", f"No pudimos guardar tus cambios en '{filepath}'. Revisa si hay algún problema de permisos: {e}")
+    almacenamiento.guardar_json(datos, filepath, reportar_error=messagebox.showerror)
 
-# --- Funciones de Hashing de Contraseñas ---
-def hash_password(password):
-    return hashlib.sha256(password.encode('utf-8')).hexdigest()
+ALMACEN = almacenamiento.crear_almacen(MOTOR_ALMACEN, archivo_usuarios=ARCHIVO_DATOS, archivo_compras=HISTORIAL_COMPRAS_FILE,
+                                       archivo_productos=ARCHIVO_PRODUCTOS, ruta_bd=ARCHIVO_BD, modo_historial=MODO_HISTORIAL,
+                                       durabilidad=DURABILIDAD, formato=FORMATO_DATOS, reportar_error=messagebox.showerror)
 
 # --- Funciones de Carga de Imágenes ---
 def load_icon(filename):
     path = os.path.join(IMG_INTERFAZ_DIR, filename)
     try:
-        image = Image.open(path)
-        image = image.resize((30, 30), Image.LANCZOS)
-        return ImageTk.PhotoImage(image)
+        return imagenes.cargar_miniatura(path, (30, 30))
     except Exception as e:
         print(f"No pude cargar el icono en '{path}'. ¿Está ahí?: {e}")
         return None
 
 def load_image(filename_or_path, size=(80, 80)):
-    if not os.path.isabs(filename_or_path):
+    # Las imágenes de productos se guardan por nombre dentro de IMG_PRODUCTOS_DIR y tienen miniaturas en disco.
+    es_producto = not os.path.isabs(filename_or_path)
+    if es_producto:
         filepath = os.path.join(IMG_PRODUCTOS_DIR, filename_or_path)
     else:
         filepath = filename_or_path
 
     try:
-        image = Image.open(filepath)
-        image = image.resize(size, Image.LANCZOS)
-        return ImageTk.PhotoImage(image)
+        return imagenes.cargar_miniatura(filepath, size, crear_derivada=es_producto)
     except Exception as e:
         print(f"No pude cargar la imagen en '{filepath}'. ¿Está ahí?: {e}")
         return None
 
 # --- Datos de Productos ---
-productos_disponibles = [
-    {"nombre": "comida para gatos", "precio": 15000, "imagen": "ringogato.png", "stock": 10},
-    {"nombre": "comida para perro", "precio": 25000, "imagen": "perro.png", "stock": 15},
-    {"nombre": "comida para gatos pequenos", "precio": 10000, "imagen": "gato_pequeño.png", "stock": 20},
-    {"nombre": "comida para cachorros", "precio": 20000, "imagen": "perros_pequeños.png", "stock": 12},
+# Productos con los que arranca una tienda nueva; después manda lo guardado en el almacén.
+PRODUCTOS_INICIALES = [
+    {"id": "P001", "nombre": "comida para gatos", "precio": 15000, "imagen": "ringogato.png", "stock": 10},
+    {"id": "P002", "nombre": "comida para perro", "precio": 25000, "imagen": "perro.png", "stock": 15},
+    {"id": "P003", "nombre": "comida para gatos pequenos", "precio": 10000, "imagen": "gato_pequeño.png", "stock": 20},
+    {"id": "P004", "nombre": "comida para cachorros", "precio": 20000, "imagen": "perros_pequeños.png", "stock": 12},
 ]
 
+# El catálogo empieza vacío y se llena desde el almacén en segundo plano (ver empezar_carga_catalogo),
+# así la ventana aparece enseguida aunque el inventario sea grande.
+productos_disponibles = Catalogo()
+carga_catalogo = None
+
+# Índice de palabras para la búsqueda; se mantiene al día con cada cambio del catálogo.
+indice_productos = IndiceBusqueda(productos_disponibles, campos=("nombre",))
+productos_disponibles.suscribir(indice_productos.al_cambiar_catalogo)
+
+
+def guardar_cambio_producto(evento, producto):
+    """Cada cambio se guarda sólo para ese producto: una línea en el diario o una fila en SQLite.
+
+    Los cambios de stock ("stock") no se guardan: son unidades apartadas en un carrito y sólo
+    viven en memoria. Lo vendido se descuenta en el almacén al pagar (ver finalizar_pago).
+    """
+    if evento in ("agregado", "actualizado"):
+        ALMACEN.guardar_producto(producto)
+    elif evento == "eliminado":
+        ALMACEN.eliminar_producto(producto["id"])
+
+productos_disponibles.suscribir(guardar_cambio_producto)
+
+
+def poblar_catalogo(productos, error):
+    """Pasa al catálogo lo leído del almacén; una tienda sin productos arranca con PRODUCTOS_INICIALES."""
+    if error is not None:
+        messagebox.showerror("Error al cargar", f"No pudimos leer los productos guardados: {error}")
+        return
+    if not productos:
+        productos = [dict(p) for p in PRODUCTOS_INICIALES]
+        ALMACEN.guardar_productos(productos)
+    productos_disponibles.cargar(productos)
+
+
+def empezar_carga_catalogo():
+    global carga_catalogo
+    carga_catalogo = CargaEnSegundoPlano(ALMACEN.leer_productos, poblar_catalogo)
+
+
+def catalogo_listo():
+    return carga_catalogo is None or carga_catalogo.terminada()
+
 # --- Autenticación ---
 def iniciar_autenticacion():
     def login():
@@ -98,13 +144,18 @@ def iniciar_autenticacion():
         global usuario_actual
         user = entry_user.get()
         password = entry_pass.get()
-        for u in cargar_json(ARCHIVO_DATOS):
-            if u["user"] == user and u["pass"] == hash_password(password):
-                usuario_actual = u
-                messagebox.showinfo("¡Bienvenido de nuevo!", f"¡Hola {user}, qué bueno verte por aquí!")
-                root.destroy()
-                abrir_tienda()
-                return
+        u = ALMACEN.obtener_usuario(user)
+        correcta, actualizar_hash = verificar_password(password, u["pass"] if u else None)
+        if correcta:
+            if actualizar_hash:
+                # Hash viejo (texto plano, SHA-256 sin sal u otro costo): lo rehacemos con el esquema actual.
+                u["pass"] = hash_password(password)
+                ALMACEN.actualizar_usuario(user, u)
+            usuario_actual = u
+            messagebox.showinfo("¡Bienvenido de nuevo!", f"¡Hola {user}, qué bueno verte por aquí!")
+            root.destroy()
+            abrir_tienda()
+            return
         messagebox.showerror("Acceso denegado", "¡Uy! Parece que tu usuario o contraseña no son correctos. Intenta de nuevo.")
 
     def registrar():
@@ -117,13 +168,11 @@ def iniciar_autenticacion():
             messagebox.showerror("Contraseña débil", "Tu contraseña debe tener al menos 6 caracteres.")
             return
 
-        datos = cargar_json(ARCHIVO_DATOS)
-        for u in datos:
-            if u["user"] == user:
-                messagebox.showerror("Usuario ya existe", "¡Vaya! Parece que ese nombre de usuario ya está en uso. Elige otro, por favor.")
-                return
-        datos.append({"user": user, "pass": hash_password(password), "foto": ""})
-        guardar_json(datos, ARCHIVO_DATOS)
+        if ALMACEN.nombre_ocupado(user):
+            messagebox.showerror("Usuario ya existe", "¡Vaya! Parece que ese nombre de usuario ya está en uso. Elige otro, por favor.")
+            return
+        if not ALMACEN.agregar_usuario({"user": user, "pass": hash_password(password), "foto": ""}):
+            return  # el almacén ya mostró el error
         messagebox.showinfo("¡Registro exitoso!", "¡Felicidades! Ya estás registrado. Ahora puedes iniciar sesión.")
         frame_reg.pack_forget()
         frame_login.pack(fill="both", expand=True)
@@ -193,13 +242,53 @@ def abrir_tienda():
     icon_carrito = load_icon("carrito.png")
     icon_admin = load_icon("admin.png")
 
-    carrito = []
+    carrito = Carrito()
 
     def limpiar():
         for widget in frame.winfo_children():
             widget.destroy()
 
+    def esperar_catalogo(vista):
+        """Si los productos aún se están leyendo, muestra un aviso y abre `vista` cuando estén. Devuelve True si hay que esperar."""
+        if catalogo_listo():
+            return False
+        limpiar()
+        aviso = tk.Label(frame, text="Cargando productos...", bg="white", fg="gray")
+        aviso.pack(pady=20)
+
+        def revisar():
+            if not aviso.winfo_exists():
+                return  # el usuario ya se fue a otra vista
+            if catalogo_listo():
+                vista()
+            else:
+                aviso.after(100, revisar)
+
+        aviso.after(100, revisar)
+        return True
+
+    def devolver_carrito():
+        """Las unidades que quedaron en el carrito sin pagar vuelven al stock (el stock se aparta al agregarlas)."""
+        for linea in list(carrito):
+            producto = productos_disponibles.obtener(linea["producto"]["id"])
+            if producto is not None:
+                productos_disponibles.ajustar_stock(producto, linea["cantidad"])
+        carrito.vaciar()
+
+    def cerrar_tienda():
+        devolver_carrito()
+        root_tienda_app.destroy()
+
+    root_tienda_app.protocol("WM_DELETE_WINDOW", cerrar_tienda)
+
+    def seguir_cambios(widget, modelo, oyente):
+        """Suscribe `oyente` a los cambios de `modelo` mientras `widget` siga en pantalla."""
+        modelo.suscribir(oyente)
+        widget.bind("<Destroy>", lambda e: modelo.desuscribir(oyente), add="+")
+
     def go_inicio():
+        if esperar_catalogo(go_inicio):
+            return
         limpiar()
         tk.Label(frame, text="Nuestros Productos", font=("Arial", 16, "bold"), bg="white", fg="#195E5E").pack(pady=10)
 
@@ -207,47 +296,56 @@ def abrir_tienda():
             tk.Label(frame, text="¡Vaya! Parece que no hay productos disponibles en este momento.", bg="white", fg="gray").pack(pady=20)
             return
 
-        product_canvas = tk.Canvas(frame, bg="white")
-        product_canvas.pack(side="left", fill="both", expand=True)
+        # Sólo se crean widgets para los productos que se ven; al desplazarse se reutilizan.
+        lista = ListaVirtual(frame, productos_disponibles, crear_fila_producto, llenar_fila_producto, alto_fila=120)
+        lista.pack(fill="both", expand=True)
 
-        product_scrollbar = tk.Scrollbar(frame, orient="vertical", command=product_canvas.yview)
-        product_scrollbar.pack(side="right", fill="y")
-
-        product_canvas.configure(yscrollcommand=product_scrollbar.set)
-        scrollable_product_frame = tk.Frame(product_canvas, bg="white")
-        product_canvas.create_window((0, 0), window=scrollable_product_frame, anchor="nw")
+        def al_cambiar_catalogo(evento, prod):
+            if evento in ("agregado", "eliminado", "recargado"):
+                lista.recargar()
+            else:
+                lista.refrescar(prod)  # sólo la fila de ese producto, si está a la vista
 
-        def on_frame_configure(event):
-            product_canvas.configure(scrollregion=product_canvas.bbox("all"))
-            product_canvas.itemconfig(product_canvas.create_window((0, 0), window=scrollable_product_frame, anchor="nw"), width=product_canvas.winfo_width())
+        seguir_cambios(lista, productos_disponibles, al_cambiar_catalogo)
 
-        scrollable_product_frame.bind("<Configure>", on_frame_configure)
-        product_canvas.bind("<Configure>", on_frame_configure)
+    def crear_fila_producto(padre):
+        fila = tk.Frame(padre, bg="white", relief="solid", bd=1, padx=5, pady=5)
+        fila.lbl_img = tk.Label(fila, bg="white")
+        fila.lbl_img.pack(side="left")
 
+        info = tk.Frame(fila, bg="white")
+        info.pack(side="left", padx=10, expand=True, fill="x")
 
-        for prod in productos_disponibles:
-            f = tk.Frame(scrollable_product_frame, bg="white", relief="solid", bd=1, padx=5, pady=5)
-            f.pack(padx=5, pady=5, fill="x")
+        fila.lbl_nombre = tk.Label(info, bg="white", font=("Arial", 12))
+        fila.lbl_nombre.pack(anchor="w")
+        fila.lbl_precio = tk.Label(info, bg="white", fg="green")
+        fila.lbl_precio.pack(anchor="w")
+        fila.lbl_stock = tk.Label(info, bg="white", fg="blue")
+        fila.lbl_stock.pack(anchor="w")
 
-            img = load_image(prod["imagen"])
-            if img:
-                lbl_img = tk.Label(f, image=img, bg="white")
-                lbl_img.pack(side="left")
-                f.image = img
-            else:
-                tk.Label(f, text="[IMAGEN NO DISPONIBLE]", bg="white", width=10, height=5, relief="groove").pack(side="left")
+        fila.btn_comprar = tk.Button(info, text="comprar", bg="#C8E6C9")
+        fila.lbl_agotado = tk.Label(info, text="¡AGOTADO!", bg="white", fg="red", font=("Arial", 10, "bold"))
+        return fila
 
-            info = tk.Frame(f, bg="white")
-            info.pack(side="left", padx=10, expand=True, fill="x")
+    def llenar_fila_producto(fila, prod):
+        img = load_image(prod["imagen"])
+        if img:
+            fila.lbl_img.config(image=img, text="", width=0, height=0, relief="flat")
+        else:
+            fila.lbl_img.config(image="", text="[IMAGEN NO DISPONIBLE]", width=10, height=5, relief="groove")
+        fila.image = img
 
-            tk.Label(info, text=prod["nombre"], bg="white", font=("Arial", 12)).pack(anchor="w")
-            tk.Label(info, text=f"Precio: ${prod['precio']:,}", bg="white", fg="green").pack(anchor="w")
-            tk.Label(info, text=f"En stock: {prod['stock']}", bg="white", fg="blue").pack(anchor="w")
+        fila.lbl_nombre.config(text=prod["nombre"])
+        fila.lbl_precio.config(text=f"Precio: ${prod['precio']:,}")
+        fila.lbl_stock.config(text=f"En stock: {prod['stock']}")
 
-            if prod["stock"] > 0:
-                tk.Button(info, text="comprar", command=lambda p=prod: agregar_carrito(p), bg="#C8E6C9").pack(anchor="e", pady=5)
-            else:
-                tk.Label(info, text="¡AGOTADO!", bg="white", fg="red", font=("Arial", 10, "bold")).pack(anchor="e", pady=5)
+        if prod["stock"] > 0:
+            fila.lbl_agotado.pack_forget()
+            fila.btn_comprar.config(command=lambda p=prod: agregar_carrito(p))
+            fila.btn_comprar.pack(anchor="e", pady=5)
+        else:
+            fila.btn_comprar.pack_forget()
+            fila.lbl_agotado.pack(anchor="e", pady=5)
 
     def go_buscar():
         limpiar()
@@ -259,48 +357,71 @@ def abrir_tienda():
         query = tk.Entry(search_frame, width=30)
         query.pack(side="left", padx=5)
 
-        results_canvas = tk.Canvas(frame, bg="white")
-        results_canvas.pack(pady=10, fill="both", expand=True, side="left")
-
-        results_scrollbar = tk.Scrollbar(frame, orient="vertical", command=results_canvas.yview)
-        results_scrollbar.pack(side="right", fill="y")
-        results_canvas.configure(yscrollcommand=results_scrollbar.set)
-
-        results_frame = tk.Frame(results_canvas, bg="white")
-        results_canvas.create_window((0, 0), window=results_frame, anchor="nw")
-
-        def on_results_frame_configure(event):
-            results_canvas.configure(scrollregion = results_canvas.bbox("all"))
-            results_canvas.itemconfig(results_canvas.create_window((0, 0), window=results_frame, anchor="nw"), width=results_canvas.winfo_width())
-
-        results_frame.bind("<Configure>", on_results_frame_configure)
-        results_canvas.bind("<Configure>", on_results_frame_configure)
-
+        lbl_sin_resultados = tk.Label(frame, text="¡Uy! No encontramos productos con ese nombre. Intenta de nuevo.", bg="white", fg="gray")
+        lista_resultados = ListaVirtual(frame, [], crear_fila_resultado, llenar_fila_resultado, alto_fila=50)
+        lista_resultados.pack(pady=10, fill="both", expand=True)
 
         def buscar():
-            for widget in results_frame.winfo_children():
-                widget.destroy()
-
-            search_term = query.get().lower()
-            resultados = [p for p in productos_disponibles if search_term in p["nombre"].lower()]
-
-            if not resultados:
-                tk.Label(results_frame, text="¡Uy! No encontramos productos con ese nombre. Intenta de nuevo.", bg="white", fg="gray").pack(pady=10)
-                return
-
-            for p in resultados:
-                f_res = tk.Frame(results_frame, bg="white", relief="solid", bd=1, padx=5, pady=5)
-                f_res.pack(padx=5, pady=2, fill="x")
+            # Palabras completas o su comienzo, sin importar tildes ni mayúsculas ("pequeno" encuentra "pequeño").
+            resultados = indice_productos.buscar(query.get())
 
-                tk.Label(f_res, text=f"{p['nombre']} - ${p['precio']:,} - En stock: {p['stock']}", bg="white").pack(side="left")
+            if resultados:
+                lbl_sin_resultados.pack_forget()
+            else:
+                lbl_sin_resultados.pack(pady=10, before=lista_resultados)
+            lista_resultados.mostrar(resultados)
+
+        # Búsqueda mientras se escribe: cada tecla reinicia la espera y sólo se busca al hacer una pausa.
+        espera = {"id": None, "texto": None}
+
+        def programar_busqueda(event=None):
+            if espera["id"] is not None:
+                query.after_cancel(espera["id"])
+            espera["id"] = query.after(RETARDO_BUSQUEDA_MS, buscar_si_cambio)
+
+        def buscar_si_cambio():
+            espera["id"] = None
+            if query.get() != espera["texto"]:  # flechas, Shift, etc. no cambian el texto
+                espera["texto"] = query.get()
+                buscar()
+
+        def cancelar_espera(event):
+            if espera["id"] is not None:
+                query.after_cancel(espera["id"])
+                espera["id"] = None
+
+        query.bind("<KeyRelease>", programar_busqueda)
+        query.bind("<Destroy>", cancelar_espera)
+        query.focus_set()
+
+        def al_cambiar_catalogo(evento, prod):
+            if evento in ("agregado", "eliminado", "recargado"):
+                buscar()
+            else:
+                lista_resultados.refrescar(prod)
 
-                if p["stock"] > 0:
-                    tk.Button(f_res, text="comprar", command=lambda prod_item=p: agregar_carrito(prod_item), bg="#C8E6C9").pack(side="right", padx=5)
-                else:
-                    tk.Label(f_res, text="¡AGOTADO!", bg="white", fg="red", font=("Arial", 9, "bold")).pack(side="right", padx=5)
+        seguir_cambios(lista_resultados, productos_disponibles, al_cambiar_catalogo)
 
         tk.Button(search_frame, text="Buscar", command=buscar, bg="#AED581").pack(side="left", padx=5)
 
+    def crear_fila_resultado(padre):
+        fila = tk.Frame(padre, bg="white", relief="solid", bd=1, padx=5, pady=5)
+        fila.lbl_datos = tk.Label(fila, bg="white")
+        fila.lbl_datos.pack(side="left")
+        fila.btn_comprar = tk.Button(fila, text="comprar", bg="#C8E6C9")
+        fila.lbl_agotado = tk.Label(fila, text="¡AGOTADO!", bg="white", fg="red", font=("Arial", 9, "bold"))
+        return fila
+
+    def llenar_fila_resultado(fila, p):
+        fila.lbl_datos.config(text=f"{p['nombre']} - ${p['precio']:,} - En stock: {p['stock']}")
+        if p["stock"] > 0:
+            fila.lbl_agotado.pack_forget()
+            fila.btn_comprar.config(command=lambda prod_item=p: agregar_carrito(prod_item))
+            fila.btn_comprar.pack(side="right", padx=5)
+        else:
+            fila.btn_comprar.pack_forget()
+            fila.lbl_agotado.pack(side="right", padx=5)
+
     def go_usuario():
         limpiar()
         tk.Label(frame, text="Tu Perfil", font=("Arial", 16, "bold"), bg="white", fg="#195E5E").pack(pady=10)
@@ -324,11 +445,7 @@ def abrir_tienda():
         path = filedialog.askopenfilename(title="Elige tu nueva foto de perfil", filetypes=[("Imágenes", "*.png;*.jpg;*.jpeg;*.gif")])
         if path:
             usuario_actual["foto"] = path
-            datos = cargar_json(ARCHIVO_DATOS)
-            for u in datos:
-                if u["user"] == usuario_actual["user"]:
-                    u["foto"] = path
-            guardar_json(datos, ARCHIVO_DATOS)
+            ALMACEN.actualizar_usuario(usuario_actual["user"], usuario_actual)
             messagebox.showinfo("¡Foto actualizada!", "¡Tu foto de perfil ha sido cambiada exitosamente!")
             go_usuario()
 
@@ -336,10 +453,10 @@ def abrir_tienda():
         nuevo_user = simpledialog.askstring("Cambiar Usuario", "Escribe tu nuevo nombre de usuario:", initialvalue=usuario_actual["user"])
         nueva_pass = simpledialog.askstring("Cambiar Contraseña", "Escribe tu nueva contraseña (déjalo en blanco si no quieres cambiarla):", show="*")
 
+        nombre_anterior = usuario_actual["user"]
         cambios_realizados = False
-        if nuevo_user and nuevo_user != usuario_actual["user"]:
-            datos = cargar_json(ARCHIVO_DATOS)
-            if any(u["user"].lower() == nuevo_user.lower() for u in datos if u["user"].lower() != usuario_actual["user"].lower()):
+        if nuevo_user and nuevo_user != nombre_anterior:
+            if ALMACEN.nombre_ocupado(nuevo_user, excepto=nombre_anterior):
                 messagebox.showerror("¡Usuario no disponible!", "¡Lo sentimos! Ese nombre de usuario ya lo tiene otra persona.")
                 return
             usuario_actual["user"] = nuevo_user
@@ -353,12 +470,7 @@ def abrir_tienda():
             cambios_realizados = True
 
         if cambios_realizados:
-            datos = cargar_json(ARCHIVO_DATOS)
-            for i, u in enumerate(datos):
-                if u["user"] == (usuario_actual["user"] if not nuevo_user else nuevo_user):
-                    datos[i] = usuario_actual
-                    break
-            guardar_json(datos, ARCHIVO_DATOS)
+            ALMACEN.actualizar_usuario(nombre_anterior, usuario_actual)
             messagebox.showinfo("¡Perfil actualizado!", "¡Tu información ha sido guardada con éxito!")
             go_usuario()
         else:
@@ -367,65 +479,76 @@ def abrir_tienda():
     def eliminar_cuenta():
         if messagebox.askyesno("¡Atención! Eliminar Cuenta", "¿Estás ABSOLUTAMENTE seguro de que quieres eliminar tu cuenta?\n¡Esta acción no se puede deshacer!"):
             global usuario_actual
-            datos = cargar_json(ARCHIVO_DATOS)
-            datos = [u for u in datos if u["user"] != usuario_actual["user"]]
-            guardar_json(datos, ARCHIVO_DATOS)
+            ALMACEN.eliminar_usuario(usuario_actual["user"])
             messagebox.showinfo("¡Cuenta eliminada!", "¡Tu cuenta ha sido eliminada con éxito! Te extrañaremos.")
             cerrar_sesion(root_tienda_app)
 
     def cerrar_sesion(root_tienda_app_param):
         global usuario_actual
         usuario_actual = None
+        devolver_carrito()
+        imagenes.CACHE_MINIATURAS.descartar_fotos()
         root_tienda_app_param.destroy()
         iniciar_autenticacion()
 
     def go_carrito():
         limpiar()
-        tk.Label(frame, text="Tu Carrito de Compras", font=("Arial", 16, "bold"), bg="white", fg="#195E5E").pack(pady=10)
+        titulo = tk.Label(frame, text="Tu Carrito de Compras", font=("Arial", 16, "bold"), bg="white", fg="#195E5E")
+        titulo.pack(pady=10)
 
         if not carrito:
             tk.Label(frame, text="¡Tu carrito está vacío! ¿Qué esperas? ¡Agrega productos!", bg="white", fg="gray").pack(pady=20)
             return
 
-        total = 0
-        productos_agrupados = defaultdict(int)
-        for item in carrito:
-            productos_agrupados[item["nombre"]] += 1
-            total += int(item["precio"])
+        def texto_linea(linea):
+            return f"{linea['producto']['nombre']} (x{linea['cantidad']}) - ${linea['precio_unitario'] * linea['cantidad']:,}"
 
-        for nombre_prod, cantidad in productos_agrupados.items():
-            precio_unitario = 0
-            for p in productos_disponibles:
-                if p["nombre"] == nombre_prod:
-                    precio_unitario = int(p["precio"])
-                    break
+        # Las líneas van en un contenedor desplazable: un carrito largo no empuja el total fuera de la ventana.
+        lineas_frame = ContenedorDesplazable(frame, bg="white", height=250)
+        lineas_frame.pack(fill="both", expand=True)
 
-            item_frame = tk.Frame(frame, bg="white", relief="groove", bd=1)
+        filas_carrito = {}
+        for linea in carrito:
+            id_prod = linea["producto"]["id"]
+            item_frame = tk.Frame(lineas_frame.interior, bg="white", relief="groove", bd=1)
             item_frame.pack(anchor="w", padx=20, pady=2, fill="x")
-            tk.Label(item_frame, text=f"{nombre_prod} (x{cantidad}) - ${precio_unitario * cantidad:,}", bg="white").pack(side="left", fill="x", expand=True)
-            tk.Button(item_frame, text="Quitar uno", command=lambda name=nombre_prod: quitar_del_carrito(name), bg="lightcoral").pack(side="right", padx=5)
+            lbl_item = tk.Label(item_frame, text=texto_linea(linea), bg="white")
+            lbl_item.pack(side="left", fill="x", expand=True)
+            tk.Button(item_frame, text="Quitar uno", command=lambda pid=id_prod: quitar_del_carrito(pid), bg="lightcoral").pack(side="right", padx=5)
+            filas_carrito[id_prod] = (item_frame, lbl_item)
 
         tk.Frame(frame, height=2, bg="lightgray").pack(fill="x", padx=15, pady=10)
-        tk.Label(frame, text=f"Total a pagar: ${total:,}", bg="white", font=("Arial", 14, "bold"), fg="green").pack(pady=10)
-
-        if carrito:
-            tk.Button(frame, text="Proceder al Pago", command=lambda: pagar_con_opciones(total), bg="#B7CE63").pack(pady=10)
-
-    def quitar_del_carrito(product_name):
-        found = False
-        for i, item in enumerate(carrito):
-            if item["nombre"] == product_name:
-                for p in productos_disponibles:
-                    if p["nombre"] == product_name:
-                        p["stock"] += 1
-                        break
-                carrito.pop(i)
-                found = True
-                messagebox.showinfo("Carrito actualizado", f"Quitamos una unidad de '{product_name}' de tu carrito.")
-                break
-        if not found:
-            messagebox.showerror("¡Vaya!", f"'{product_name}' no se encontró en tu carrito.")
-        go_carrito()
+        lbl_total = tk.Label(frame, text=f"Total a pagar: ${carrito.total():,}", bg="white", font=("Arial", 14, "bold"), fg="green")
+        lbl_total.pack(pady=10)
+
+        tk.Button(frame, text="Proceder al Pago", command=lambda: pagar_con_opciones(carrito.total()), bg="#B7CE63").pack(pady=10)
+
+        def al_cambiar_carrito(evento, prod):
+            if evento == "vaciado":
+                return  # finalizar_pago vuelve a dibujar la vista
+            if not carrito or prod["id"] not in filas_carrito:
+                go_carrito()  # carrito vacío o producto nuevo: se dibuja la vista otra vez
+                return
+            linea = carrito.linea(prod["id"])
+            item_frame, lbl_item = filas_carrito[prod["id"]]
+            if linea is None:
+                item_frame.destroy()
+                del filas_carrito[prod["id"]]
+            else:
+                lbl_item.config(text=texto_linea(linea))
+            lbl_total.config(text=f"Total a pagar: ${carrito.total():,}")
+
+        seguir_cambios(titulo, carrito, al_cambiar_carrito)
+
+    def quitar_del_carrito(id_producto):
+        prod = carrito.quitar(id_producto)
+        if prod is not None:
+            en_catalogo = productos_disponibles.obtener(id_producto)
+            if en_catalogo is not None:
+                productos_disponibles.ajustar_stock(en_catalogo, +1)
+            messagebox.showinfo("Carrito actualizado", f"Quitamos una unidad de '{prod['nombre']}' de tu carrito.")
+        else:
+            messagebox.showerror("¡Vaya!", "Ese producto no se encontró en tu carrito.")
 
     def pagar_con_opciones(total_a_pagar):
         if not carrito:
@@ -497,20 +620,12 @@ def abrir_tienda():
                     messagebox.showerror("CVV inválido", "El CVV debe ser de 3 o 4 dígitos numéricos.")
                     return
 
-            historial = cargar_json(HISTORIAL_COMPRAS_FILE)
-
-            items_comprados_historial = defaultdict(lambda: {"precio_unitario": 0, "cantidad": 0})
-            for item_c in carrito:
-                items_comprados_historial[item_c["nombre"]]["precio_unitario"] = int(item_c["precio"])
-                items_comprados_historial[item_c["nombre"]]["cantidad"] += 1
-
-            lista_items_historial = []
-            for nombre, datos in items_comprados_historial.items():
-                lista_items_historial.append({
-                    "nombre": nombre,
-                    "precio_unitario": datos["precio_unitario"],
-                    "cantidad": datos["cantidad"]
-                })
+            # El carrito ya tiene una línea por producto con su cantidad.
+            lista_items_historial = [{
+                "nombre": linea["producto"]["nombre"],
+                "precio_unitario": linea["precio_unitario"],
+                "cantidad": linea["cantidad"]
+            } for linea in carrito]
 
             registro_compra = {
                 "id_transaccion": datetime.datetime.now().strftime("%Y%m%d%H%M%S%f"),
@@ -520,10 +635,13 @@ def abrir_tienda():
                 "total_pagado": total_a_pagar,
                 "productos": lista_items_historial
             }
-            historial.append(registro_compra)
-            guardar_json(historial, HISTORIAL_COMPRAS_FILE)
+            # El stock apartado en el carrito sólo cambió en memoria: aquí se descuenta en el almacén,
+            # antes de registrar la venta para que ambos lleguen juntos al disco.
+            for linea in carrito:
+                ALMACEN.ajustar_stock(linea["producto"]["id"], -linea["cantidad"])
+            ALMACEN.registrar_compra(registro_compra)
 
-            carrito.clear()
+            carrito.vaciar()
             messagebox.showinfo("¡Compra Exitosa!", f"¡Tu compra de ${total_a_pagar:,} ha sido procesada con éxito usando {metodo_seleccionado}! ¡Muchas gracias por tu compra!")
             pago_window.destroy()
             go_carrito()
@@ -532,23 +650,21 @@ def abrir_tienda():
         pago_window.mainloop()
 
     def agregar_carrito(prod_to_add):
-        found_product = None
-        for p in productos_disponibles:
-            if p["nombre"] == prod_to_add["nombre"]:
-                found_product = p
-                break
+        found_product = productos_disponibles.obtener(prod_to_add["id"])
 
         if found_product and found_product["stock"] > 0:
-            found_product["stock"] -= 1
-            carrito.append(found_product)
+            # La vista que esté abierta actualiza sólo la fila de este producto.
+            productos_disponibles.ajustar_stock(found_product, -1)
+            carrito.agregar(found_product)
             messagebox.showinfo("¡Al carrito!", f"¡'{prod_to_add['nombre']}' se ha añadido a tu carrito!")
-            go_inicio()
         elif found_product and found_product["stock"] <= 0:
             messagebox.showerror("¡Sin stock!", f"¡Lo sentimos mucho! '{prod_to_add['nombre']}' se ha agotado.")
         else:
             messagebox.showerror("¡Producto no encontrado!", "Parece que hubo un problema y no pudimos encontrar este producto.")
 
     def go_admin():
+        if esperar_catalogo(go_admin):
+            return
         limpiar()
         tk.Label(frame, text="Panel de Administración", font=("Arial", 16, "bold"), bg="white", fg="#195E5E").pack(pady=10)
 
@@ -598,7 +714,7 @@ def abrir_tienda():
                 messagebox.showerror("¡Error de números!", "El precio y el stock deben ser números válidos. ¡Revísalos!")
                 return
 
-            if any(p["nombre"].lower() == nombre.lower() for p in productos_disponibles):
+            if productos_disponibles.nombre_ocupado(nombre):
                 messagebox.showerror("¡Nombre duplicado!", f"¡Oops! Ya tienes un producto llamado '{nombre}'. Por favor, elige otro nombre.")
                 return
 
@@ -609,12 +725,17 @@ def abrir_tienda():
                 dest_path = os.path.join(IMG_PRODUCTOS_DIR, new_filename)
 
                 shutil.copy(imagen_original_path, dest_path)
-                imagen_guardada_nombre = new_filename
             except Exception as e:
                 messagebox.showerror("Error al guardar imagen", f"No se pudo copiar la imagen: {e}. Intenta con otra imagen.")
                 return
+            try:
+                imagenes.preparar_imagen_producto(dest_path)
+            except Exception as e:
+                messagebox.showerror("Error al procesar imagen", f"No pudimos procesar la imagen (¿está dañada o no es una imagen?): {e}. Intenta con otra imagen.")
+                return
+            imagen_guardada_nombre = new_filename
 
-            productos_disponibles.append({"nombre": nombre, "precio": precio, "imagen": imagen_guardada_nombre, "stock": stock})
+            productos_disponibles.agregar({"nombre": nombre, "precio": precio, "imagen": imagen_guardada_nombre, "stock": stock})
             messagebox.showinfo("¡Producto añadido!", "¡Tu nuevo producto ha sido agregado con éxito!")
             nombre_entry.delete(0, tk.END)
             precio_entry.delete(0, tk.END)
@@ -644,17 +765,26 @@ def abrir_tienda():
                     img_filepath_to_delete = os.path.join(IMG_PRODUCTOS_DIR, img_filename)
                     if os.path.exists(img_filepath_to_delete):
                         os.remove(img_filepath_to_delete)
+                        imagenes.eliminar_derivadas(img_filepath_to_delete)
                         print(f"Imagen '{img_filename}' eliminada del directorio de productos.")
                 except Exception as e:
                     print(f"Error al eliminar la imagen del producto: {e}")
 
-                del productos_disponibles[index]
+                productos_disponibles.eliminar(productos_disponibles[index])
                 messagebox.showinfo("¡Producto eliminado!", "¡El producto ha sido eliminado con éxito!")
                 go_admin()
 
         tk.Button(frame, text="Ver Estadísticas y Reportes de Ventas", command=mostrar_estadisticas_admin, bg="#B7CE63").pack(pady=15)
 
     def mostrar_estadisticas_admin():
+        # Se importan aquí y no al arrancar: tardan segundos y sólo los usan las estadísticas (ver precarga.py).
+        try:
+            import graficas
+            from estadisticas import CalculoEnSegundoPlano
+        except ImportError as e:
+            messagebox.showerror("Estadísticas no disponibles", f"No pudimos cargar las herramientas de análisis (pandas, matplotlib y seaborn): {e}")
+            return
+
         stats_window = tk.Toplevel(root_tienda_app)
         stats_window.title("Estadísticas Clave de tu Tienda")
         stats_window.geometry("800x700") # Ajustamos el tamaño inicial
@@ -666,159 +796,62 @@ def abrir_tienda():
 
         tk.Label(stats_frame, text="Un Vistazo a tus Ventas", font=("Arial", 18, "bold"), bg="white", fg="#195E5E").pack(pady=10)
 
-        historial_raw = cargar_json(HISTORIAL_COMPRAS_FILE)
-
-        if not historial_raw:
-            tk.Label(stats_frame, text="¡Parece que aún no hay datos de compras para mostrarte estadísticas!", bg="white", fg="gray").pack(pady=20)
-            tk.Button(stats_frame, text="Volver al Panel de Administración", command=stats_window.destroy, bg="lightgray").pack(pady=10)
-            stats_window.mainloop()
-            return
-
-        df_compras = pd.DataFrame(historial_raw)
-
-        df_compras['total_pagado'] = pd.to_numeric(df_compras['total_pagado'], errors='coerce')
-        df_compras['fecha'] = pd.to_datetime(df_compras['fecha'], errors='coerce')
-        df_compras.dropna(subset=['total_pagado', 'fecha'], inplace=True)
-
-        if df_compras.empty:
-            tk.Label(stats_frame, text="¡Uy! No hay datos válidos de compras para generar las estadísticas.", bg="white", fg="gray").pack(pady=20)
-            tk.Button(stats_frame, text="Volver al Panel de Administración", command=stats_window.destroy, bg="lightgray").pack(pady=10)
-            stats_window.mainloop()
-            return
+        # --- Progreso: la ventana se muestra ya y se llena a medida que llegan los cálculos ---
+        progreso_frame = tk.Frame(stats_frame, bg="white")
+        progreso_frame.pack(fill="x", padx=20)
+        lbl_progreso = tk.Label(progreso_frame, text="Leyendo las ventas...", bg="white", fg="gray")
+        lbl_progreso.pack()
+        barra_progreso = ttk.Progressbar(progreso_frame, mode="determinate", maximum=1.0, length=300)
+        barra_progreso.pack(pady=5)
 
         # --- Sección de Resumen General ---
         summary_frame = tk.Frame(stats_frame, bg="#E8F5E9", padx=10, pady=10, relief="groove", bd=1)
         summary_frame.pack(pady=10, padx=20, fill="x")
 
-        ganancias_totales = df_compras['total_pagado'].sum()
-        num_compras_totales = df_compras.shape[0]
-        metodo_pago_mas_usado = df_compras['metodo_pago'].mode()[0] if not df_compras['metodo_pago'].empty else "Ninguno"
-
         tk.Label(summary_frame, text="Resumen General:", font=("Arial", 14, "bold"), bg="#E8F5E9", fg="#195E5E").pack(anchor="w")
-        tk.Label(summary_frame, text=f"Ganancias Totales: ${ganancias_totales:,.2f}", font=("Arial", 12), bg="#E8F5E9", fg="darkgreen").pack(anchor="w")
-        tk.Label(summary_frame, text=f"Número de Ventas: {num_compras_totales}", font=("Arial", 12), bg="#E8F5E9").pack(anchor="w")
-        tk.Label(summary_frame, text=f"Método de Pago Preferido: {metodo_pago_mas_usado}", font=("Arial", 12), bg="#E8F5E9").pack(anchor="w")
+        lbl_ganancias = tk.Label(summary_frame, text="Ganancias Totales: ...", font=("Arial", 12), bg="#E8F5E9", fg="darkgreen")
+        lbl_ganancias.pack(anchor="w")
+        lbl_num_ventas = tk.Label(summary_frame, text="Número de Ventas: ...", font=("Arial", 12), bg="#E8F5E9")
+        lbl_num_ventas.pack(anchor="w")
+        lbl_metodo = tk.Label(summary_frame, text="Método de Pago Preferido: ...", font=("Arial", 12), bg="#E8F5E9")
+        lbl_metodo.pack(anchor="w")
 
 
         # --- Contenedor para los gráficos con Scrollbar ---
-        graph_canvas = tk.Canvas(stats_frame, bg="white")
-        graph_canvas.pack(side="left", fill="both", expand=True, padx=10, pady=10)
-
-        graph_scrollbar = tk.Scrollbar(stats_frame, orient="vertical", command=graph_canvas.yview)
-        graph_scrollbar.pack(side="right", fill="y")
-        graph_canvas.configure(yscrollcommand=graph_scrollbar.set)
+        graph_container = ContenedorDesplazable(stats_frame, bg="white")
+        graph_container.pack(side="left", fill="both", expand=True, padx=10, pady=10)
 
         # Frame interno donde se dibujarán los gráficos
-        scrollable_graph_frame = tk.Frame(graph_canvas, bg="white")
-        graph_canvas.create_window((0, 0), window=scrollable_graph_frame, anchor="nw")
-
-        def on_graph_frame_configure(event):
-            graph_canvas.configure(scrollregion=graph_canvas.bbox("all"))
-            # Asegura que el frame interno siempre ocupe el ancho del canvas
-            graph_canvas.itemconfig(graph_canvas.create_window((0, 0), window=scrollable_graph_frame, anchor="nw"), width=graph_canvas.winfo_width())
-
-        scrollable_graph_frame.bind("<Configure>", on_graph_frame_configure)
-        graph_canvas.bind("<Configure>", on_graph_frame_configure)
-
-
-        # --- Función para limpiar el área de gráficos ---
-        def clear_graphs():
-            for widget in scrollable_graph_frame.winfo_children():
-                widget.destroy()
+        scrollable_graph_frame = graph_container.interior
+
+        # Resultados que van llegando del hilo de cálculo (ver estadisticas.PARTES)
+        resultados = {}
+        version_datos = None  # cuántas compras se analizaron; distingue los datos en la caché de gráficas
+
+        # Las gráficas ya dibujadas se guardan: cambiar de gráfico sólo las muestra u oculta.
+        graficas_cache = graficas.CacheGraficas(scrollable_graph_frame, pady=10, fill="both", expand=True)
+        lbl_sin_grafico = tk.Label(scrollable_graph_frame, bg="white", fg="gray")
+
+        # --- Función para mostrar un gráfico (o el aviso de que no hay datos) ---
+        def show_chart(parte, crear_figura, texto_sin_datos):
+            lbl_sin_grafico.pack_forget()
+            datos = resultados[parte]
+            if datos.empty:
+                graficas_cache.ocultar()
+                lbl_sin_grafico.config(text=texto_sin_datos)
+                lbl_sin_grafico.pack(pady=10)
+            else:
+                graficas_cache.mostrar(parte, (), version_datos, lambda: crear_figura(datos))
 
         # --- Funciones para generar y mostrar cada gráfico ---
         def show_payment_methods_chart():
-            clear_graphs()
-            if not df_compras.empty:
-                metodos_pago_counts = df_compras['metodo_pago'].value_counts()
-                if not metodos_pago_counts.empty:
-                    fig1, axes = plt.subplots(1, 2, figsize=(12, 5), dpi=100) # Dos subplots en una figura
-
-                    # Gráfico de Barras
-                    sns.barplot(x=metodos_pago_counts.index, y=metodos_pago_counts.values, ax=axes[0], palette="viridis")
-                    axes[0].set_title('Métodos de Pago Más Usados')
-                    axes[0].set_ylabel('Número de Transacciones')
-                    axes[0].set_xlabel('Método de Pago')
-                    axes[0].tick_params(axis='x', rotation=45)
-
-                    # Gráfico de Torta
-                    axes[1].pie(metodos_pago_counts, labels=metodos_pago_counts.index, autopct='%1.1f%%', startangle=90, colors=sns.color_palette("viridis", len(metodos_pago_counts)))
-                    axes[1].axis('equal') # Equal aspect ratio ensures that pie is drawn as a circle.
-                    axes[1].set_title('Distribución de Métodos de Pago')
-
-                    fig1.tight_layout() # Ajusta el layout para evitar superposiciones
-
-                    canvas = FigureCanvasTkAgg(fig1, master=scrollable_graph_frame)
-                    canvas_widget = canvas.get_tk_widget()
-                    canvas_widget.pack(pady=10, fill="both", expand=True)
-                    canvas.draw()
-                else:
-                    tk.Label(scrollable_graph_frame, text="No hay datos de métodos de pago para graficar.", bg="white", fg="gray").pack(pady=10)
-
+            show_chart("metodos_pago", graficas.figura_metodos_pago, "No hay datos de métodos de pago para graficar.")
 
         def show_top_products_chart():
-            clear_graphs()
-            productos_vendidos_raw = []
-            for _, row in df_compras.iterrows():
-                if 'productos' in row and isinstance(row['productos'], list):
-                    for prod in row['productos']:
-                        productos_vendidos_raw.append({'nombre': prod['nombre'], 'cantidad': prod['cantidad']})
-
-            if productos_vendidos_raw:
-                df_productos_vendidos = pd.DataFrame(productos_vendidos_raw)
-                df_productos_vendidos['cantidad'] = pd.to_numeric(df_productos_vendidos['cantidad'], errors='coerce')
-                df_productos_vendidos.dropna(subset=['cantidad'], inplace=True)
-
-                if not df_productos_vendidos.empty:
-                    top_productos = df_productos_vendidos.groupby('nombre')['cantidad'].sum().sort_values(ascending=False).head(5)
-
-                    if not top_productos.empty:
-                        fig2 = plt.Figure(figsize=(8, 6), dpi=100)
-                        ax2 = fig2.add_subplot(111)
-                        sns.barplot(x=top_productos.values, y=top_productos.index, ax=ax2, palette="magma")
-                        ax2.set_title('Top 5 Productos Más Vendidos')
-                        ax2.set_xlabel('Cantidad Total Vendida')
-                        ax2.set_ylabel('Producto')
-                        fig2.tight_layout()
-
-                        canvas = FigureCanvasTkAgg(fig2, master=scrollable_graph_frame)
-                        canvas_widget = canvas.get_tk_widget()
-                        canvas_widget.pack(pady=10, fill="both", expand=True)
-                        canvas.draw()
-                    else:
-                        tk.Label(scrollable_graph_frame, text="No hay datos de productos vendidos para graficar.", bg="white", fg="gray").pack(pady=10)
-                else:
-                    tk.Label(scrollable_graph_frame, text="No hay datos de productos vendidos para graficar.", bg="white", fg="gray").pack(pady=10)
-            else:
-                tk.Label(scrollable_graph_frame, text="No hay datos de productos vendidos para graficar.", bg="white", fg="gray").pack(pady=10)
-
+            show_chart("top_productos", graficas.figura_top_productos, "No hay datos de productos vendidos para graficar.")
 
         def show_daily_sales_chart():
-            clear_graphs()
-            if not df_compras.empty:
-                df_compras['dia'] = df_compras['fecha'].dt.to_period('D')
-                ventas_diarias = df_compras.groupby('dia')['total_pagado'].sum()
-                ventas_diarias.index = ventas_diarias.index.to_timestamp()
-
-                if not ventas_diarias.empty:
-                    fig3 = plt.Figure(figsize=(10, 6), dpi=100)
-                    ax3 = fig3.add_subplot(111)
-                    sns.lineplot(x=ventas_diarias.index, y=ventas_diarias.values, ax=ax3, marker='o', color='purple')
-                    ax3.set_title('Ventas Totales por Día')
-                    ax3.set_ylabel('Ganancias ($)')
-                    ax3.set_xlabel('Fecha de Venta')
-                    ax3.tick_params(axis='x', rotation=45)
-                    ax3.grid(True) # Añadir una cuadrícula para mejor lectura
-                    fig3.tight_layout()
-
-                    canvas = FigureCanvasTkAgg(fig3, master=scrollable_graph_frame)
-                    canvas_widget = canvas.get_tk_widget()
-                    canvas_widget.pack(pady=10, fill="both", expand=True)
-                    canvas.draw()
-                else:
-                    tk.Label(scrollable_graph_frame, text="No hay datos de ventas diarias para graficar.", bg="white", fg="gray").pack(pady=10)
-            else:
-                tk.Label(scrollable_graph_frame, text="No hay datos de ventas diarias para graficar.", bg="white", fg="gray").pack(pady=10)
+            show_chart("ventas_diarias", graficas.figura_ventas_diarias, "No hay datos de ventas diarias para graficar.")
 
         # --- Menú de Opciones de Gráficos ---
         menu_options_frame = tk.Frame(stats_frame, bg="#F0F8FF", padx=10, pady=10, relief="ridge", bd=1)
@@ -826,12 +859,56 @@ def abrir_tienda():
 
         tk.Label(menu_options_frame, text="Selecciona un tipo de gráfico:", font=("Arial", 12, "bold"), bg="#F0F8FF").pack(anchor="w", pady=5)
 
-        tk.Button(menu_options_frame, text="Métodos de Pago", command=show_payment_methods_chart, bg="#D4EEFF").pack(side="left", padx=5, pady=5, expand=True)
-        tk.Button(menu_options_frame, text="Productos Más Vendidos", command=show_top_products_chart, bg="#D4EEFF").pack(side="left", padx=5, pady=5, expand=True)
-        tk.Button(menu_options_frame, text="Ventas Diarias", command=show_daily_sales_chart, bg="#D4EEFF").pack(side="left", padx=5, pady=5, expand=True)
+        # Cada botón se habilita cuando llega la parte que grafica.
+        botones_graficos = {
+            "metodos_pago": tk.Button(menu_options_frame, text="Métodos de Pago", command=show_payment_methods_chart, bg="#D4EEFF", state="disabled"),
+            "top_productos": tk.Button(menu_options_frame, text="Productos Más Vendidos", command=show_top_products_chart, bg="#D4EEFF", state="disabled"),
+            "ventas_diarias": tk.Button(menu_options_frame, text="Ventas Diarias", command=show_daily_sales_chart, bg="#D4EEFF", state="disabled"),
+        }
+        for boton in botones_graficos.values():
+            boton.pack(side="left", padx=5, pady=5, expand=True)
 
         tk.Button(stats_frame, text="Volver al Panel de Administración", command=stats_window.destroy, bg="lightgray").pack(pady=10)
 
+        def sin_datos(mensaje):
+            summary_frame.pack_forget()
+            lbl_progreso.config(text=mensaje)
+
+        def recibir_resultados():
+            nonlocal version_datos
+            if not stats_window.winfo_exists():
+                return  # la ventana se cerró antes de terminar
+            for parte, datos, progreso in calculo.recibir():
+                barra_progreso["value"] = progreso
+                if parte == "fin":
+                    if resultados:
+                        progreso_frame.pack_forget()
+                    else:
+                        barra_progreso.pack_forget()  # queda a la vista el mensaje de por qué no hay gráficos
+                    return
+                if parte == "error":
+                    sin_datos("No pudimos calcular las estadísticas.")
+                    messagebox.showerror("Error en estadísticas", f"No pudimos calcular las estadísticas: {datos}", parent=stats_window)
+                elif parte == "compras":
+                    version_datos = datos
+                    if datos == 0:
+                        sin_datos("¡Parece que aún no hay datos de compras para mostrarte estadísticas!")
+                    else:
+                        lbl_progreso.config(text=f"Analizando {datos:,} compras...")
+                elif parte == "resumen":
+                    lbl_ganancias.config(text=f"Ganancias Totales: ${datos['ganancias']:,.2f}")
+                    lbl_num_ventas.config(text=f"Número de Ventas: {datos['ventas']}")
+                    lbl_metodo.config(text=f"Método de Pago Preferido: {datos['metodo_preferido']}")
+                elif parte in botones_graficos:
+                    resultados[parte] = datos
+                    botones_graficos[parte].config(state="normal")
+                    if parte == "metodos_pago":
+                        show_payment_methods_chart()  # el primer gráfico se muestra apenas está listo
+            stats_window.after(50, recibir_resultados)
+
+        calculo = CalculoEnSegundoPlano(ALMACEN.leer_agregados)
+        recibir_resultados()
+
         stats_window.mainloop()
 
     # barra de navegación
@@ -841,7 +918,15 @@ def abrir_tienda():
     tk.Button(nav, image=icon_carrito, text="Carrito", compound="top", command=go_carrito, bg="white", fg="black").pack(side="left", expand=True)
     tk.Button(nav, image=icon_admin, text="Admin", compound="top", command=go_admin, bg="white", fg="black").pack(side="left", expand=True)
 
+    def revisar_carga_catalogo():
+        """Entrega los productos al catálogo en cuanto se terminan de leer, esté abierta la vista que esté."""
+        if not catalogo_listo():
+            root_tienda_app.after(100, revisar_carga_catalogo)
+
+    revisar_carga_catalogo()
     go_inicio()
+    if PRECARGAR_ANALISIS:
+        root_tienda_app.after_idle(precarga.precargar)  # cuando la tienda ya se dibujó
     root_tienda_app.mainloop()
 
 # --- Inicio del Programa ---
@@ -850,7 +935,10 @@ if __name__ == "__main__":
         guardar_json([], ARCHIVO_DATOS)
     if not os.path.exists(HISTORIAL_COMPRAS_FILE):
         guardar_json([], HISTORIAL_COMPRAS_FILE)
+    ALMACEN.compactar()
+    empezar_carga_catalogo()  # se lee mientras el usuario inicia sesión
 
     iniciar_autenticacion()
+    ALMACEN.cerrar()  # escribe lo que haya quedado pendiente
 
 
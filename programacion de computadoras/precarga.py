@@ -0,0 +1,25 @@
+import importlib
+import threading
+
+# --- Precarga de Módulos de Análisis ---
+# pandas, matplotlib y seaborn tardan segundos en importarse y sólo los usan las
+# estadísticas. La tienda ya no los importa al arrancar (la ventana de inicio de
+# sesión aparece enseguida): se importan la primera vez que se abren las estadísticas.
+# Para que esa primera vez tampoco espere, precargar() los importa en un hilo aparte
+# mientras se usa la tienda. Si la ventana los pide antes de que termine, Python la
+# hace esperar a que el hilo acabe: nunca se importan dos veces.
+
+MODULOS_ANALISIS = ("estadisticas", "graficas")
+
+
+def precargar(modulos=MODULOS_ANALISIS):
+    """Importa `modulos` en un hilo aparte y devuelve el hilo."""
+    def importar():
+        for nombre in modulos:
+            try:
+                importlib.import_module(nombre)
+            except ImportError:
+                return  # al abrir las estadísticas se vuelve a intentar y se avisa
+    hilo = threading.Thread(target=importar, name="precarga-analisis", daemon=True)
+    hilo.start()
+    return hilo
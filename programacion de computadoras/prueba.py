@@ -1,40 +1,36 @@
 import tkinter as tk
 from tkinter import ttk, messagebox, simpledialog
-import json
 import os
-import pandas as pd
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-import seaborn as sns
 from datetime import datetime
+import almacenamiento
+import precarga
+from catalogo import Catalogo
+import agregados_ventas
+from contrasenas import hash_password, verificar_password
 
 # --- Configuración de Archivos ---
 USUARIOS_FILE = "usuarios.json"
 PRODUCTOS_FILE = "productos.json"
 HISTORIAL_COMPRAS_FILE = "historial_compras.json"
+# "json" usa los archivos de arriba; "sqlite" usa ARCHIVO_BD. Para pasar los datos existentes a SQLite:
+#   python almacenamiento.py --bd tienda_online.db --usuarios usuarios.json --productos productos.json --compras historial_compras.json --clave-usuario usuario
+MOTOR_ALMACEN = "json"
+ARCHIVO_BD = "tienda_online.db"
+# "por_venta": cada venta espera a estar en disco. "agrupada": los cambios se escriben juntos cada segundo.
+DURABILIDAD = "por_venta"
+# "legible" (JSON con sangría), "compacto" (sin espacios) o "tabla" (claves escritas una sola vez).
+FORMATO_DATOS = "legible"
+# matplotlib y seaborn se cargan al abrir las estadísticas; con True, en segundo plano tras iniciar sesión.
+PRECARGAR_ANALISIS = True
 
 # --- Funciones de Utilidad para JSON ---
 def cargar_json(filename):
     """Carga datos desde un archivo JSON. Retorna lista vacía si el archivo no existe o está vacío/corrupto."""
-    if not os.path.exists(filename) or os.stat(filename).st_size == 0:
-        return []
-    try:
-        with open(filename, 'r', encoding='utf-8') as f:
-            return json.load(f)
-    except json.JSONDecodeError:
-        messagebox.showerror("Error de Carga", f"El archivo {filename} está corrupto. Se reiniciará con datos vacíos.")
-        return []
-    except Exception as e:
-        messagebox.showerror("Error de Carga", f"Error al cargar {filename}: {e}")
-        return []
+    return almacenamiento.cargar_json(filename, reportar_error=messagebox.showerror)
 
 def guardar_json(data, filename):
     """Guarda datos en un archivo JSON."""
-    try:
-        with open(filename, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=4, ensure_ascii=False)
-    except Exception as e:
-        messagebox.showerror("Error al Guardar", f"No se pudo guardar en {filename}: {e}")
+    almacenamiento.guardar_json(data, filename, reportar_error=messagebox.showerror)
 
 # --- Clase Principal de la Aplicación de Tienda ---
 class TiendaApp:
@@ -51,9 +47,11 @@ class TiendaApp:
         self._inicializar_archivos()
 
         # Cargar datos iniciales
-        self.usuarios = cargar_json(USUARIOS_FILE)
-        self.productos = cargar_json(PRODUCTOS_FILE)
-        self.historial_compras = cargar_json(HISTORIAL_COMPRAS_FILE)
+        self.almacen = almacenamiento.crear_almacen(MOTOR_ALMACEN, archivo_usuarios=USUARIOS_FILE, archivo_compras=HISTORIAL_COMPRAS_FILE,
+                                                    archivo_productos=PRODUCTOS_FILE, ruta_bd=ARCHIVO_BD, clave_usuario="usuario",
+                                                    durabilidad=DURABILIDAD, formato=FORMATO_DATOS,
+                                                    reportar_error=messagebox.showerror)
+        self.productos = Catalogo(self.almacen.listar_productos())
 
         # Si no hay productos, cargar algunos predeterminados
         if not self.productos:
@@ -70,6 +68,8 @@ class TiendaApp:
 
     def _inicializar_archivos(self):
         """Crea los archivos JSON si no existen."""
+        if MOTOR_ALMACEN != "json":
+            return
         if not os.path.exists(USUARIOS_FILE):
             guardar_json([], USUARIOS_FILE)
         if not os.path.exists(PRODUCTOS_FILE):
@@ -86,8 +86,8 @@ class TiendaApp:
             {"id": "P004", "nombre": "Auriculares con Micrófono", "descripcion": "Sonido envolvente y comunicación clara.", "precio": 49.00, "stock": 75},
             {"id": "P005", "nombre": "Webcam Full HD 1080p", "descripcion": "Ideal para streaming y videollamadas.", "precio": 59.99, "stock": 30}
         ]
-        self.productos = default_products
-        guardar_json(self.productos, PRODUCTOS_FILE)
+        self.productos = Catalogo(default_products)
+        self.almacen.guardar_productos(self.productos)
         messagebox.showinfo("Productos Iniciales", "Se han cargado productos predeterminados.")
 
 
@@ -255,17 +255,21 @@ class TiendaApp:
         if metodo_pago:
             confirm = messagebox.askyesno("Confirmar Compra", f"Confirmas la compra por ${total:.2f} usando {metodo_pago}?", parent=self.root)
             if confirm:
-                # Generar ID de transacción
-                id_transaccion = f"TR{len(self.historial_compras) + 1:05d}"
+                # Generar ID de transacción (el almacén lleva la cuenta: no hace falta leer el historial)
+                try:
+                    id_transaccion = f"TR{self.almacen.siguiente_numero_compra():05d}"
+                except Exception as e:
+                    messagebox.showerror("Error en el pago", f"No pudimos preparar la compra: {e}", parent=self.root)
+                    return
                 fecha_compra = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
 
                 productos_comprados_detalle = []
                 for item_carrito in self.carrito_compras:
                     # Actualizar stock del producto
-                    for prod_tienda in self.productos:
-                        if prod_tienda['id'] == item_carrito['id']:
-                            prod_tienda['stock'] -= item_carrito['cantidad']
-                            break
+                    prod_tienda = self.productos.obtener(item_carrito['id'])
+                    if prod_tienda:
+                        self.productos.ajustar_stock(prod_tienda, -item_carrito['cantidad'])
+                    self.almacen.ajustar_stock(item_carrito['id'], -item_carrito['cantidad'])
                     productos_comprados_detalle.append({
                         "nombre": item_carrito['nombre'],
                         "precio_unitario": item_carrito['precio'],
@@ -273,18 +277,15 @@ class TiendaApp:
                     })
 
                 # Registrar la compra en el historial
-                self.historial_compras.append({
+                registro_compra = {
                     "id_transaccion": id_transaccion,
                     "usuario": self.usuario_actual['usuario'],
                     "fecha": fecha_compra,
                     "total_pagado": total,
                     "metodo_pago": metodo_pago,
                     "productos": productos_comprados_detalle
-                })
-
-                # Guardar cambios
-                guardar_json(self.productos, PRODUCTOS_FILE)
-                guardar_json(self.historial_compras, HISTORIAL_COMPRAS_FILE)
+                }
+                self.almacen.registrar_compra(registro_compra)
 
                 self.carrito_compras = [] # Vaciar carrito
                 messagebox.showinfo("Pago Exitoso", f"Compra realizada con éxito! ID de Transacción: {id_transaccion}")
@@ -327,14 +328,21 @@ class TiendaApp:
         username = self.user_entry.get()
         password = self.pass_entry.get()
 
-        for user in self.usuarios:
-            if user['usuario'] == username and user['password'] == password:
-                self.usuario_actual = user
-                messagebox.showinfo("Login Exitoso", f"¡Bienvenido, {username}!")
-                self.auth_window.destroy()
-                self.root.deiconify()  # Mostrar la ventana principal
-                self.mostrar_inicio() # Cargar la vista de inicio
-                return
+        user = self.almacen.obtener_usuario(username)
+        correcta, actualizar_hash = verificar_password(password, user['password'] if user else None)
+        if correcta:
+            if actualizar_hash:
+                # Contraseña guardada en texto plano: la reemplazamos por el hash nuevo.
+                user['password'] = hash_password(password)
+                self.almacen.actualizar_usuario(username, user)
+            self.usuario_actual = user
+            messagebox.showinfo("Login Exitoso", f"¡Bienvenido, {username}!")
+            self.auth_window.destroy()
+            self.root.deiconify()  # Mostrar la ventana principal
+            self.mostrar_inicio() # Cargar la vista de inicio
+            if PRECARGAR_ANALISIS:
+                self.root.after_idle(lambda: precarga.precargar(("graficas",)))  # esta versión no usa estadisticas
+            return
         messagebox.showerror("Error de Login", "Usuario o contraseña incorrectos.")
 
     def _register(self):
@@ -346,13 +354,12 @@ class TiendaApp:
             messagebox.showwarning("Registro", "Por favor, ingresa un usuario y una contraseña.")
             return
 
-        for user in self.usuarios:
-            if user['usuario'] == username:
-                messagebox.showwarning("Registro", "El nombre de usuario ya existe.")
-                return
+        if self.almacen.nombre_ocupado(username):
+            messagebox.showwarning("Registro", "El nombre de usuario ya existe.")
+            return
 
-        self.usuarios.append({"usuario": username, "password": password, "rol": "cliente"})
-        guardar_json(self.usuarios, USUARIOS_FILE)
+        if not self.almacen.agregar_usuario({"usuario": username, "password": hash_password(password), "rol": "cliente"}):
+            return  # el almacén ya mostró el error
         messagebox.showinfo("Registro Exitoso", "Usuario registrado. Ya puedes iniciar sesión.")
         self.user_entry.delete(0, tk.END)
         self.pass_entry.delete(0, tk.END)
@@ -442,7 +449,7 @@ class TiendaApp:
         """Añade un nuevo producto."""
         dialog = ProductDialog(self.root, "Añadir Nuevo Producto")
         if dialog.result:
-            new_prod_id = f"P{len(self.productos) + 1:03d}"
+            new_prod_id = self.productos.nuevo_id() # no repite ids aunque se hayan borrado productos
             new_product = {
                 "id": new_prod_id,
                 "nombre": dialog.result['nombre'],
@@ -450,8 +457,8 @@ class TiendaApp:
                 "precio": dialog.result['precio'],
                 "stock": dialog.result['stock']
             }
-            self.productos.append(new_product)
-            guardar_json(self.productos, PRODUCTOS_FILE)
+            self.productos.agregar(new_product)
+            self.almacen.guardar_producto(new_product)
             self._cargar_productos_treeview()
             self._cargar_productos_en_inicio() # Actualizar vista de productos
             messagebox.showinfo("Éxito", "Producto añadido correctamente.")
@@ -467,15 +474,13 @@ class TiendaApp:
         prod_id = item_values[0]
         
         # Encontrar el producto en la lista
-        product_to_edit = next((p for p in self.productos if p['id'] == prod_id), None)
+        product_to_edit = self.productos.obtener(prod_id)
         if product_to_edit:
             dialog = ProductDialog(self.root, "Editar Producto", product_to_edit)
             if dialog.result:
-                product_to_edit['nombre'] = dialog.result['nombre']
-                product_to_edit['descripcion'] = dialog.result['descripcion']
-                product_to_edit['precio'] = dialog.result['precio']
-                product_to_edit['stock'] = dialog.result['stock']
-                guardar_json(self.productos, PRODUCTOS_FILE)
+                self.productos.actualizar(product_to_edit, nombre=dialog.result['nombre'], descripcion=dialog.result['descripcion'],
+                                          precio=dialog.result['precio'], stock=dialog.result['stock'])
+                self.almacen.guardar_producto(product_to_edit)
                 self._cargar_productos_treeview()
                 self._cargar_productos_en_inicio() # Actualizar vista de productos
                 messagebox.showinfo("Éxito", "Producto editado correctamente.")
@@ -494,8 +499,10 @@ class TiendaApp:
 
         confirm = messagebox.askyesno("Confirmar Eliminación", f"¿Estás seguro de que quieres eliminar el producto '{item_values[1]} (ID: {prod_id})'?", parent=self.root)
         if confirm:
-            self.productos = [p for p in self.productos if p['id'] != prod_id]
-            guardar_json(self.productos, PRODUCTOS_FILE)
+            producto = self.productos.obtener(prod_id)
+            if producto:
+                self.productos.eliminar(producto)
+            self.almacen.eliminar_producto(prod_id)
             self._cargar_productos_treeview()
             self._cargar_productos_en_inicio() # Actualizar vista de productos
             messagebox.showinfo("Éxito", "Producto eliminado correctamente.")
@@ -503,6 +510,12 @@ class TiendaApp:
     # --- Ventana de Estadísticas (Tu código principal) ---
     def _mostrar_estadisticas(self):
         """Muestra la ventana de estadísticas con gráficos."""
+        try:
+            import graficas  # se importa recién aquí (ver precarga.py)
+        except ImportError as e:
+            messagebox.showerror("Estadísticas no disponibles", f"No pudimos cargar matplotlib y seaborn para las gráficas: {e}")
+            return
+
         stats_window = tk.Toplevel(self.root)
         stats_window.title("Estadísticas de Compras")
         stats_window.geometry("900x700")
@@ -514,53 +527,27 @@ class TiendaApp:
 
         tk.Label(stats_frame, text="Análisis de Estadísticas de Compras", font=("Helvetica", 16, "bold"), bg="white", fg="#4CAF50").pack(pady=10)
 
-        # Convertir historial de compras a DataFrame
-        df_compras = pd.DataFrame(self.historial_compras)
-
-        # Convertir a tipos numéricos y de fecha
-        if not df_compras.empty:
-            df_compras['total_pagado'] = pd.to_numeric(df_compras['total_pagado'], errors='coerce')
-            df_compras['fecha'] = pd.to_datetime(df_compras['fecha'], errors='coerce')
-            df_compras.dropna(subset=['total_pagado', 'fecha'], inplace=True) # Eliminar filas con valores nulos
-
-        # Desglosar productos comprados para análisis detallado
-        productos_comprados_list = []
-        if not df_compras.empty:
-            for _, row in df_compras.iterrows():
-                fecha = row['fecha']
-                usuario = row['usuario']
-                metodo_pago = row['metodo_pago']
-                id_transaccion = row['id_transaccion']
-                if isinstance(row['productos'], list):
-                    for prod in row['productos']:
-                        productos_comprados_list.append({
-                            'fecha': fecha,
-                            'usuario': usuario,
-                            'metodo_pago': metodo_pago,
-                            'nombre_producto': prod['nombre'],
-                            'precio_unitario': prod['precio_unitario'],
-                            'cantidad': prod['cantidad'],
-                            'subtotal': prod['precio_unitario'] * prod['cantidad'],
-                            'id_transaccion': id_transaccion
-                        })
-        df_productos_detallado = pd.DataFrame(productos_comprados_list)
-
-        if df_compras.empty or df_productos_detallado.empty:
+        # Ventas ya agrupadas por día, mes, producto, usuario y método de pago (ver agregados_ventas):
+        # dibujar una gráfica sólo recorre esos grupos, no todo el historial.
+        agregados = self.almacen.listar_agregados()
+
+        if not agregados_ventas.total_ventas(agregados) or not agregados["producto"]:
             tk.Label(stats_frame, text="¡No hay datos válidos para generar estadísticas!", bg="white", fg="gray").pack(pady=20)
             tk.Button(stats_frame, text="Volver al Panel de Administración", command=stats_window.destroy, bg="lightgray").pack(pady=10)
             stats_window.wait_window()
             return
 
         # --- Variables disponibles para ambos ejes ---
+        # "dimension": grupo de los agregados que da el eje X; "medida": valor de cada grupo para el eje Y.
         available_variables = {
-            "Fecha (Diario)": {"df": df_compras, "column_or_logic": lambda df: df['fecha'].dt.date, "type": "temporal", "display_name": "Fecha"},
-            "Fecha (Mensual)": {"df": df_compras, "column_or_logic": lambda df: df['fecha'].dt.to_period('M').astype(str), "type": "temporal", "display_name": "Fecha"},
-            "Producto": {"df": df_productos_detallado, "column_or_logic": 'nombre_producto', "type": "categorical", "display_name": "Producto"},
-            "Usuario": {"df": df_compras, "column_or_logic": 'usuario', "type": "categorical", "display_name": "Usuario"},
-            "Método de Pago": {"df": df_compras, "column_or_logic": 'metodo_pago', "type": "categorical", "display_name": "Método de Pago"},
-            "Total Pagado": {"df": df_compras, "column_or_logic": 'total_pagado', "type": "numerical", "display_name": "Total Pagado"},
-            "Número de Transacciones": {"df": df_compras, "column_or_logic": 'id_transaccion', "type": "numerical_count", "display_name": "Número de Transacciones"},
-            "Cantidad Vendida": {"df": df_productos_detallado, "column_or_logic": 'cantidad', "type": "numerical", "display_name": "Cantidad Vendida"}
+            "Fecha (Diario)": {"dimension": "dia", "type": "temporal", "display_name": "Fecha"},
+            "Fecha (Mensual)": {"dimension": "mes", "type": "temporal", "display_name": "Fecha"},
+            "Producto": {"dimension": "producto", "type": "categorical", "display_name": "Producto"},
+            "Usuario": {"dimension": "usuario", "type": "categorical", "display_name": "Usuario"},
+            "Método de Pago": {"dimension": "metodo_pago", "type": "categorical", "display_name": "Método de Pago"},
+            "Total Pagado": {"medida": "total", "type": "numerical", "display_name": "Total Pagado"},
+            "Número de Transacciones": {"medida": "ventas", "type": "numerical_count", "display_name": "Número de Transacciones"},
+            "Cantidad Vendida": {"medida": "cantidad", "type": "numerical", "display_name": "Cantidad Vendida"}
         }
 
         all_axis_options = list(available_variables.keys())
@@ -587,15 +574,11 @@ class TiendaApp:
         graph_canvas_frame = tk.Frame(stats_frame, bg="white", relief="groove", bd=1)
         graph_canvas_frame.pack(pady=10, padx=20, fill="both", expand=True)
 
-        canvas = None
+        # Las gráficas ya dibujadas se guardan por (tipo, ejes, datos): volver a una es inmediato.
+        graficas_cache = graficas.CacheGraficas(graph_canvas_frame, side=tk.TOP, fill=tk.BOTH, expand=True)
+        version_datos = agregados_ventas.total_ventas(agregados)
 
         def generar_y_mostrar_grafica():
-            nonlocal canvas
-
-            if canvas:
-                canvas.get_tk_widget().destroy()
-                plt.close('all')
-
             tipo_grafica = chart_type_cb.get()
             eje_x_key = x_axis_cb.get()
             eje_y_key = y_axis_cb.get()
@@ -620,128 +603,37 @@ class TiendaApp:
                 return
 
             try:
-                fig, ax = plt.subplots(figsize=(7, 5))
-                plt.style.use('ggplot')
-
-                x_labels = []
-                y_data = []
-
-                if x_info["type"] == "temporal":
-                    if "Diario" in eje_x_key:
-                        grouped_df_compras = df_compras.groupby(df_compras['fecha'].dt.date)
-                        grouped_df_productos = df_productos_detallado.groupby(df_productos_detallado['fecha'].dt.date)
-                        x_labels_raw = sorted(grouped_df_compras.groups.keys())
-                    else: # Mensual
-                        grouped_df_compras = df_compras.groupby(df_compras['fecha'].dt.to_period('M'))
-                        grouped_df_productos = df_productos_detallado.groupby(df_productos_detallado['fecha'].dt.to_period('M'))
-                        x_labels_raw = sorted(grouped_df_compras.groups.keys())
-
-                    x_labels = [str(item) for item in x_labels_raw]
-
-                    if y_info["display_name"] == "Total Pagado":
-                        y_series = grouped_df_compras['total_pagado'].sum()
-                    elif y_info["display_name"] == "Número de Transacciones":
-                        y_series = grouped_df_compras.size()
-                    elif y_info["display_name"] == "Cantidad Vendida":
-                        y_series = grouped_df_productos['cantidad'].sum()
-                    else:
-                        raise ValueError(f"Combinación de ejes X='{eje_x_key}' e Y='{eje_y_key}' no es compatible para agrupamiento temporal.")
-
-                    y_data = y_series.reindex(x_labels_raw, fill_value=0).values
-
-                elif x_info["type"] == "categorical":
-                    if x_info["display_name"] == "Producto":
-                        if y_info["display_name"] == "Cantidad Vendida":
-                            grouped_data = df_productos_detallado.groupby('nombre_producto')['cantidad'].sum()
-                        elif y_info["display_name"] == "Total Pagado":
-                            grouped_data = df_productos_detallado.groupby('nombre_producto')['subtotal'].sum()
-                        elif y_info["display_name"] == "Número de Transacciones":
-                            grouped_data = df_productos_detallado.groupby('nombre_producto')['id_transaccion'].nunique()
-                        else:
-                            raise ValueError(f"Combinación de ejes X='{eje_x_key}' e Y='{eje_y_key}' no es compatible para 'Producto'.")
-                        x_labels = grouped_data.index
-                        y_data = grouped_data.values
-
-                    elif x_info["display_name"] == "Usuario":
-                        if y_info["display_name"] == "Total Pagado":
-                            grouped_data = df_compras.groupby('usuario')['total_pagado'].sum()
-                        elif y_info["display_name"] == "Número de Transacciones":
-                            grouped_data = df_compras.groupby('usuario').size()
-                        elif y_info["display_name"] == "Cantidad Vendida":
-                            merged_df = pd.merge(df_compras, df_productos_detallado, on=['id_transaccion', 'fecha', 'usuario', 'metodo_pago'], how='inner')
-                            grouped_data = merged_df.groupby('usuario')['cantidad'].sum()
-                        else:
-                            raise ValueError(f"Combinación de ejes X='{eje_x_key}' e Y='{eje_y_key}' no es compatible para 'Usuario'.")
-                        x_labels = grouped_data.index
-                        y_data = grouped_data.values
-
-                    elif x_info["display_name"] == "Método de Pago":
-                        if y_info["display_name"] == "Total Pagado":
-                            grouped_data = df_compras.groupby('metodo_pago')['total_pagado'].sum()
-                        elif y_info["display_name"] == "Número de Transacciones":
-                            grouped_data = df_compras.groupby('metodo_pago').size()
-                        elif y_info["display_name"] == "Cantidad Vendida":
-                            merged_df = pd.merge(df_compras, df_productos_detallado, on=['id_transaccion', 'fecha', 'usuario', 'metodo_pago'], how='inner')
-                            grouped_data = merged_df.groupby('metodo_pago')['cantidad'].sum()
-                        else:
-                            raise ValueError(f"Combinación de ejes X='{eje_x_key}' e Y='{eje_y_key}' no es compatible para 'Método de Pago'.")
-                        x_labels = grouped_data.index
-                        y_data = grouped_data.values
-                else:
+                if x_info["type"] not in ["temporal", "categorical"]:
                     raise ValueError("Tipo de eje X no soportado.")
+                if "medida" not in y_info:
+                    raise ValueError(f"Combinación de ejes X='{eje_x_key}' e Y='{eje_y_key}' no es compatible para '{x_info['display_name']}'.")
 
-                if tipo_grafica == "Barras":
-                    ax.bar(x_labels, y_data, color=sns.color_palette("viridis", len(x_labels)))
-                    ax.set_ylabel(y_info["display_name"])
-                    if x_info["type"] == "temporal" or len(x_labels) > 5:
-                        ax.tick_params(axis='x', rotation=45, ha='right')
-                    else:
-                        plt.xticks(rotation=0)
-                elif tipo_grafica == "Líneas":
-                    ax.plot(x_labels, y_data, marker='o', color='purple')
-                    ax.set_ylabel(y_info["display_name"])
-                    if x_info["type"] == "temporal" or len(x_labels) > 5:
-                        ax.tick_params(axis='x', rotation=45, ha='right')
-                    else:
-                        plt.xticks(rotation=0)
-                    ax.grid(True)
-                elif tipo_grafica == "Pastel":
+                # Las claves de fecha son "AAAA-MM-DD" / "AAAA-MM": ordenarlas como texto es ordenarlas en el tiempo.
+                grupos = agregados[x_info["dimension"]]
+                x_labels = sorted(grupos)
+                y_data = [grupos[clave][y_info["medida"]] for clave in x_labels]
+
+                if tipo_grafica == "Pastel":
                     if len(y_data) == 0 or sum(y_data) == 0:
                         messagebox.showwarning("Sin datos para Pastel", "No hay datos para la combinación seleccionada o los valores son cero para generar un gráfico de pastel.")
-                        plt.close(fig)
                         return
 
                     non_zero_indices = [i for i, val in enumerate(y_data) if val > 0]
-                    filtered_y_data = [y_data[i] for i in non_zero_indices]
-                    filtered_x_labels = [x_labels[i] for i in non_zero_indices]
+                    y_data = [y_data[i] for i in non_zero_indices]
+                    x_labels = [x_labels[i] for i in non_zero_indices]
 
-                    if not filtered_y_data:
+                    if not y_data:
                         messagebox.showwarning("Sin datos para Pastel", "Todos los valores son cero después del filtrado.")
-                        plt.close(fig)
                         return
 
-                    ax.pie(filtered_y_data, labels=filtered_x_labels, autopct='%1.1f%%', startangle=90, colors=sns.color_palette("pastel", len(filtered_x_labels)))
-                    ax.axis('equal')
-                    ax.set_title(f'Distribución de {y_info["display_name"]} por {x_info["display_name"]}')
-                    plt.tight_layout()
-                    canvas = FigureCanvasTkAgg(fig, master=graph_canvas_frame)
-                    canvas.draw()
-                    canvas.get_tk_widget().pack(side=tk.TOP, fill=tk.BOTH, expand=True)
-                    return
-
-                ax.set_title(f'{tipo_grafica} de {y_info["display_name"]} por {x_info["display_name"]}')
-                ax.set_xlabel(x_info["display_name"])
-                plt.tight_layout()
-
-                canvas = FigureCanvasTkAgg(fig, master=graph_canvas_frame)
-                canvas.draw()
-                canvas.get_tk_widget().pack(side=tk.TOP, fill=tk.BOTH, expand=True)
+                rotar_x = x_info["type"] == "temporal" or len(x_labels) > 5
+                graficas_cache.mostrar(tipo_grafica, (eje_x_key, eje_y_key), version_datos,
+                                       lambda: graficas.figura_personalizada(tipo_grafica, x_labels, y_data, x_info["display_name"],
+                                                                             y_info["display_name"], rotar_x))
 
             except Exception as e:
                 messagebox.showerror("Error al generar gráfica", f"Ocurrió un error: {e}. Asegúrate de que las variables seleccionadas sean compatibles con el tipo de gráfica y que haya datos para ellas.")
-                if canvas:
-                    canvas.get_tk_widget().destroy()
-                plt.close('all')
+                graficas_cache.ocultar()
 
         tk.Button(controls_frame, text="Generar Gráfica", command=generar_y_mostrar_grafica, bg="#AED581").grid(row=3, column=0, columnspan=2, pady=10)
         tk.Button(stats_frame, text="Volver al Panel de Administración", command=stats_window.destroy, bg="lightgray").pack(pady=10)
@@ -834,4 +726,5 @@ class ProductDialog(tk.Toplevel):
 if __name__ == "__main__":
     root = tk.Tk()
     app = TiendaApp(root)
-    root.mainloop()
\ No newline at end of file
+    root.mainloop()
+    app.almacen.cerrar()  # escribe lo que haya quedado pendiente
\ No newline at end of file
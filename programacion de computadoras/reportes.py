@@ -0,0 +1,186 @@
+import argparse
+import csv
+import datetime
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import agregados_ventas
+import almacenamiento
+
+# --- Reportes sin Ventana ---
+# Genera todas las estadísticas de la tienda sin abrir Tkinter, pensado para correr
+# cada noche:
+#   python reportes.py --compras historial_compras.json
+# En REPORTES_DIR/<fecha>/ deja un CSV por agrupación (día, mes, producto, método de
+# pago y usuario) más el resumen, y cada gráfico en PNG y PDF. Los números salen de
+# los agregados de ventas (ver agregados_ventas), así que no hace falta cargar el
+# historial en un DataFrame; con --detalle además se lee el historial completo y se
+# desglosa en una fila por producto vendido (ver estadisticas.desglosar_lineas). Los gráficos se dibujan en varios procesos a
+# la vez, con el backend Agg de matplotlib (sin pantalla).
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+REPORTES_DIR = os.path.join(BASE_DIR, "reportes_exportados")
+FORMATOS_GRAFICOS = ("png", "pdf")
+USUARIOS_EN_GRAFICO = 20  # el CSV trae a todos; el gráfico, sólo los que más compraron
+
+# Archivo CSV de cada agrupación de los agregados.
+ARCHIVOS_CSV = {
+    "dia": "ventas_diarias.csv",
+    "mes": "ventas_mensuales.csv",
+    "producto": "productos.csv",
+    "metodo_pago": "metodos_pago.csv",
+    "usuario": "usuarios.csv",
+}
+
+
+# --- CSV ---
+def _escribir_csv(ruta, encabezado, filas):
+    with open(ruta, "w", newline="", encoding="utf-8") as f:
+        escritor = csv.writer(f)
+        escritor.writerow(encabezado)
+        escritor.writerows(filas)
+
+
+def escribir_csv_agregados(agregados, carpeta):
+    """Un CSV por agrupación, ordenado por clave, más resumen.csv. Devuelve las rutas escritas."""
+    rutas = []
+    for dimension, nombre in ARCHIVOS_CSV.items():
+        grupo = agregados[dimension]
+        ruta = os.path.join(carpeta, nombre)
+        _escribir_csv(ruta, (dimension, "ventas", "cantidad", "total"),
+                      ((clave, grupo[clave]["ventas"], grupo[clave]["cantidad"], grupo[clave]["total"])
+                       for clave in sorted(grupo)))
+        rutas.append(ruta)
+
+    metodos = agregados["metodo_pago"]
+    ventas = agregados_ventas.total_ventas(agregados)
+    ganancias = sum(valores["total"] for valores in agregados["dia"].values())
+    ruta = os.path.join(carpeta, "resumen.csv")
+    _escribir_csv(ruta, ("metrica", "valor"), [
+        ("ganancias_totales", ganancias),
+        ("numero_de_ventas", ventas),
+        ("ticket_promedio", ganancias / ventas if ventas else 0),
+        ("metodo_preferido", min(metodos, key=lambda m: (-metodos[m]["ventas"], m)) if metodos else "Ninguno"),
+        ("dias_con_ventas", len(agregados["dia"])),
+        ("productos_vendidos", len(agregados["producto"])),
+        ("clientes", len(agregados["usuario"])),
+    ])
+    rutas.append(ruta)
+    return rutas
+
+
+def escribir_csv_detalle(compras, carpeta):
+    """Una fila por producto de cada compra, con su subtotal. Como en las estadísticas, se
+    descartan las compras cuya fecha o total no se pueden leer."""
+    import estadisticas  # trae pandas: sólo hace falta con --detalle
+
+    ruta = os.path.join(carpeta, "lineas_venta.csv")
+    if compras:
+        detalle = estadisticas.desglosar_lineas(estadisticas.preparar_compras(compras))
+        detalle.to_csv(ruta, index=False, encoding="utf-8")
+    else:
+        _escribir_csv(ruta, estadisticas.COLUMNAS_COMPRA + estadisticas.COLUMNAS_LINEA, ())
+    return ruta
+
+
+# --- Gráficos ---
+def tareas_graficos(agregados):
+    """(nombre del archivo, función de graficas, argumentos) de cada gráfico que tiene datos."""
+    import estadisticas  # trae pandas: sólo hace falta para los gráficos
+
+    tareas = []
+    metodos = estadisticas.metodos_de_pago(agregados)
+    if not metodos.empty:
+        tareas.append(("metodos_pago", "figura_metodos_pago", (metodos,)))
+    top = estadisticas.productos_mas_vendidos(agregados)
+    if not top.empty:
+        tareas.append(("productos_mas_vendidos", "figura_top_productos", (top,)))
+    diarias = estadisticas.ventas_por_dia(agregados)
+    if not diarias.empty:
+        tareas.append(("ventas_diarias", "figura_ventas_diarias", (diarias,)))
+    mensuales = estadisticas.serie(agregados, "mes", "total")
+    if not mensuales.empty:
+        tareas.append(("ventas_mensuales", "figura_personalizada",
+                       ("Barras", list(mensuales.index), list(mensuales.values), "Mes", "Total Pagado", True)))
+    usuarios = estadisticas.serie(agregados, "usuario", "total").sort_values(ascending=False, kind="stable").head(USUARIOS_EN_GRAFICO)
+    if not usuarios.empty:
+        tareas.append(("total_por_usuario", "figura_personalizada",
+                       ("Barras", list(usuarios.index), list(usuarios.values), "Usuario", "Total Pagado", True)))
+    return tareas
+
+
+def _iniciar_proceso():
+    import matplotlib
+    matplotlib.use("Agg")  # sin pantalla: cada proceso dibuja directo a archivo
+
+
+def dibujar_grafico(ruta_base, funcion, argumentos, formatos):
+    """Se ejecuta en un proceso aparte: arma la figura y la guarda en cada formato."""
+    import graficas
+
+    figura = getattr(graficas, funcion)(*argumentos)
+    rutas = []
+    for formato in formatos:
+        rutas.append(f"{ruta_base}.{formato}")
+        figura.savefig(rutas[-1], format=formato)
+    figura.clear()
+    return rutas
+
+
+def dibujar_graficos(tareas, carpeta, formatos=FORMATOS_GRAFICOS, procesos=None):
+    """Dibuja las `tareas` repartidas en `procesos` procesos. Devuelve (rutas, errores)."""
+    rutas, errores = [], []
+    with ProcessPoolExecutor(max_workers=procesos, initializer=_iniciar_proceso) as grupo:
+        pendientes = {grupo.submit(dibujar_grafico, os.path.join(carpeta, nombre), funcion, argumentos, formatos): nombre
+                      for nombre, funcion, argumentos in tareas}
+        for futuro in as_completed(pendientes):
+            try:
+                rutas.extend(futuro.result())
+            except Exception as e:
+                errores.append((pendientes[futuro], e))
+    return rutas, errores
+
+
+# --- Reporte Completo ---
+def generar_reporte(almacen, destino=REPORTES_DIR, formatos=FORMATOS_GRAFICOS, procesos=None, detalle=False):
+    """Escribe el reporte del día en `destino`/<AAAA-MM-DD>/. Devuelve (carpeta, rutas, errores)."""
+    carpeta = os.path.join(destino, datetime.date.today().isoformat())
+    os.makedirs(carpeta, exist_ok=True)
+
+    agregados = almacen.leer_agregados()
+    rutas = escribir_csv_agregados(agregados, carpeta)
+    if detalle:
+        rutas.append(escribir_csv_detalle(almacen.leer_compras(), carpeta))
+    errores = []
+    if formatos:
+        rutas_graficos, errores = dibujar_graficos(tareas_graficos(agregados), carpeta, formatos, procesos)
+        rutas.extend(rutas_graficos)
+    return carpeta, rutas, errores
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Genera los reportes de ventas (CSV y gráficos) sin abrir la tienda.")
+    parser.add_argument("--motor", choices=("json", "sqlite"), default="json", help='"json" (archivos) o "sqlite"')
+    parser.add_argument("--compras", default="historial_compras.json", help="archivo del historial de compras (motor json)")
+    parser.add_argument("--modo-historial", choices=("diario", "json"), default="diario",
+                        help='"diario" si las ventas se anexan a un .jsonl (como en la tienda), "json" si no')
+    parser.add_argument("--bd", default="tienda.db", help="archivo de la base de datos (motor sqlite)")
+    parser.add_argument("--destino", default=REPORTES_DIR, help="carpeta de los reportes (por defecto: reportes_exportados)")
+    parser.add_argument("--formatos", nargs="*", default=list(FORMATOS_GRAFICOS), choices=("png", "pdf", "svg"),
+                        help="formatos de los gráficos; sin ninguno, sólo se escriben los CSV")
+    parser.add_argument("--procesos", type=int, help="procesos para dibujar (por defecto: uno por núcleo)")
+    parser.add_argument("--detalle", action="store_true", help="también escribir lineas_venta.csv con cada producto vendido")
+    args = parser.parse_args()
+
+    inicio = time.perf_counter()
+    almacen = almacenamiento.crear_almacen(args.motor, archivo_usuarios=None, archivo_compras=args.compras,
+                                           ruta_bd=args.bd, modo_historial=args.modo_historial)
+    try:
+        carpeta, rutas, errores = generar_reporte(almacen, args.destino, args.formatos, args.procesos, args.detalle)
+    finally:
+        almacen.cerrar()
+    for nombre, e in errores:
+        print(f"No pudimos dibujar '{nombre}': {e}")
+    print(f"Reporte listo en '{carpeta}': {len(rutas)} archivos en {time.perf_counter() - inicio:.1f} s.")
+    raise SystemExit(1 if errores else 0)